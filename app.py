@@ -1,13 +1,70 @@
+import os
 import sys
-import cv2
+from functools import partial
+
 import numpy as np
-import base64
-import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QFileDialog, 
-                             QScrollArea, QMessageBox, QSizePolicy)
+                             QScrollArea, QMessageBox, QSizePolicy, QInputDialog)
 from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+
+from cache import CachedClassifier
+from engine import SpiceClassifier, load_config
+import ingest
+from instrumentation import Instrumentation
+from jobs import ClassificationJob, FunctionJob
+from report import thumbnail, write_report
+from stream import StreamClassifier
+
+# Refresh panel saat mode video (~15 Hz), terlepas dari kecepatan pipeline
+STREAM_DISPLAY_INTERVAL_MS = 66
+# Konfigurasi pipeline (mis. hasil python -m tune); dimuat saat start jika ada
+CONFIG_PATH = os.environ.get("SPICE_CONFIG", "spice_config.json")
+# Panel hanya menampilkan preview: citra tahap diperkecil sekali ke tinggi ini,
+# sehingga resize window tidak pernah menyentuh citra resolusi penuh
+PREVIEW_MAX_HEIGHT = 720
+RESIZE_DEBOUNCE_MS = 80
+
+# Tahap engine -> judul panel
+STAGE_PANELS = {
+    "blur": "2. Pre-processing (Blur)",
+    "hsv_v": "3. Ruang Warna HSV (Channel V)",
+    "mask_red": "4. Masking Merah (Pixel Count)",
+    "mask_green": "5. Masking Hijau (Pixel Count)",
+    "mask_white": "6. Masking Putih (Pixel Count)",
+    "global_mask": "7. Segmentasi Objek Utama",
+    "features": "8. Analisis Bentuk (Box & Hull)",
+    "final": "9. Hasil Akhir",
+}
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(str, float)
+    stage_image = pyqtSignal(str, object)
+    finished = pyqtSignal(object)     # hasil, atau None jika dibatalkan
+    failed = pyqtSignal(str)
+
+
+class JobRunnable(QRunnable):
+    """Menjalankan job dari jobs.py di QThreadPool; callback diteruskan lewat signal."""
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.signals = JobSignals()
+        job.on_progress = self.signals.progress.emit
+        if hasattr(job, "on_stage_image"):
+            job.on_stage_image = self.signals.stage_image.emit
+
+    def run(self):
+        try:
+            result = self.job.run()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
 
 class SpiceClassifierApp(QMainWindow):
     def __init__(self):
@@ -25,6 +82,35 @@ class SpiceClassifierApp(QMainWindow):
         self.step_6_global_mask = None  
         self.step_8_features = None     
         self.final_result_img = None    
+
+        # Cache tampilan per panel: judul -> (citra sumber, preview, QPixmap)
+        self.panel_cache = {}
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.resize_timer.timeout.connect(self.refresh_panels)
+
+        # Mesin klasifikasi headless (lihat engine.py), dengan instrumentasi
+        # agar waktu per tahap bisa ditampilkan di laporan HTML. Hasil di-cache
+        # sehingga klik "Proses" berulang pada gambar yang sama tidak diproses ulang.
+        config = load_config(CONFIG_PATH) if os.path.exists(CONFIG_PATH) else None
+        self.classifier = CachedClassifier(SpiceClassifier(config, instrumentation=Instrumentation()))
+        self.analysis_trace = None
+        self.analysis_config = None
+
+        # Pekerjaan berat berjalan di luar thread GUI. Klasifikasi memakai pool
+        # satu thread karena callback engine dipasang per job (lihat jobs.py)
+        self.job_pool = QThreadPool(self)
+        self.job_pool.setMaxThreadCount(1)
+        self.job = None
+        self.running_jobs = {}
+
+        # Mode video/kamera
+        self.stream = None
+        self.stream_seq = 0
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setInterval(STREAM_DISPLAY_INTERVAL_MS)
+        self.stream_timer.timeout.connect(self.refresh_stream)
         
         # Inisialisasi dictionary laporan
         self.analysis_report = {
@@ -66,6 +152,11 @@ class SpiceClassifierApp(QMainWindow):
         self.btn_report.setEnabled(False)
         self.btn_report.setStyleSheet("padding: 10px; font-weight: bold; background-color: #d4edda;")
         control_layout.addWidget(self.btn_report)
+
+        self.btn_stream = QPushButton("4. Mode Video / Kamera")
+        self.btn_stream.clicked.connect(self.toggle_stream)
+        self.btn_stream.setStyleSheet("padding: 10px; font-weight: bold; background-color: #fff3cd;")
+        control_layout.addWidget(self.btn_stream)
         
         control_layout.addStretch(1)
         self.result_label = QLabel("### Hasil Identifikasi:")
@@ -119,393 +210,221 @@ class SpiceClassifierApp(QMainWindow):
     # --- Utilities Gambar ---
     def convert_cv_to_qt(self, cv_img):
         if cv_img is None: return QPixmap()
-        if len(cv_img.shape) == 3:
-            cv_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-            h, w, ch = cv_img.shape
-            bytes_per_line = 3 * w
-            q_img = QImage(cv_img.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        else:
-            h, w = cv_img.shape
-            bytes_per_line = w
-            q_img = QImage(cv_img.data, w, h, bytes_per_line, QImage.Format_Grayscale8)
+        # QImage langsung membaca buffer numpy (BGR888/Grayscale8) tanpa salinan;
+        # buffer harus tetap hidup selama QImage dipakai (QPixmap menyalin sendiri)
+        cv_img = np.ascontiguousarray(cv_img)
+        h, w = cv_img.shape[:2]
+        fmt = QImage.Format_BGR888 if cv_img.ndim == 3 else QImage.Format_Grayscale8
+        q_img = QImage(cv_img.data, w, h, cv_img.strides[0], fmt)
         return QPixmap.fromImage(q_img)
 
-    def cv_to_base64(self, cv_img):
-        if cv_img is None: return ""
-        _, buffer = cv2.imencode('.jpg', cv_img)
-        b64_str = base64.b64encode(buffer).decode('utf-8')
-        return f"data:image/jpeg;base64,{b64_str}"
-
     def update_display(self, title, img):
-        if img is not None:
-            pixmap = self.convert_cv_to_qt(img)
-            label = self.image_widgets[title]
-            scaled = pixmap.scaled(label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            label.setPixmap(scaled)
+        if img is None:
+            return
+        cached = self.panel_cache.get(title)
+        if cached is None or cached[0] is not img:
+            # Konversi hanya sekali per citra; resize berikutnya memakai pixmap ini
+            preview = thumbnail(img, PREVIEW_MAX_HEIGHT)
+            self.panel_cache[title] = (img, preview, self.convert_cv_to_qt(preview))
+        self.scale_panel(title)
+
+    def scale_panel(self, title):
+        pixmap = self.panel_cache[title][2]
+        label = self.image_widgets[title]
+        label.setPixmap(pixmap.scaled(label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def refresh_panels(self):
+        for title in self.panel_cache:
+            self.scale_panel(title)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        # Refresh visualisasi saat window di-resize
-        if self.original_image is not None: self.update_display("1. Citra Asli (RGB)", self.original_image)
-        if self.step_1_blur is not None: self.update_display("2. Pre-processing (Blur)", self.step_1_blur)
-        if self.step_2_hsv is not None: self.update_display("3. Ruang Warna HSV (Channel V)", self.step_2_hsv)
-        if self.step_3_mask_red is not None: self.update_display("4. Masking Merah (Pixel Count)", self.step_3_mask_red)
-        if self.step_4_mask_green is not None: self.update_display("5. Masking Hijau (Pixel Count)", self.step_4_mask_green)
-        if self.step_5_mask_white is not None: self.update_display("6. Masking Putih (Pixel Count)", self.step_5_mask_white)
-        if self.step_6_global_mask is not None: self.update_display("7. Segmentasi Objek Utama", self.step_6_global_mask)
-        if self.step_8_features is not None: self.update_display("8. Analisis Bentuk (Box & Hull)", self.step_8_features)
-        if self.final_result_img is not None: self.update_display("9. Hasil Akhir", self.final_result_img)
+        # Rentetan event resize digabung: panel di-refresh sekali setelah resize berhenti
+        self.resize_timer.start()
 
     def load_image(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Gambar", "", "Images (*.png *.jpg *.jpeg)")
+        patterns = " ".join(f"*{ext}" for ext in ingest.IMAGE_EXTENSIONS)
+        file_path, _ = QFileDialog.getOpenFileName(self, "Pilih Gambar", "", f"Images ({patterns})")
         if file_path:
-            self.original_image = cv2.imread(file_path)
+            # Job klasifikasi gambar sebelumnya (jika masih berjalan) dibatalkan
+            self.cancel_job()
+            try:
+                self.original_image, _ = ingest.load_image(file_path)
+                error = None
+            except (OSError, ValueError) as e:
+                self.original_image, error = None, str(e)
             if self.original_image is not None:
                 # Reset variable
                 self.step_1_blur = self.step_2_hsv = self.step_3_mask_red = None
                 self.step_4_mask_green = self.step_5_mask_white = self.step_6_global_mask = None
                 self.step_8_features = self.final_result_img = None
+                self.panel_cache.clear()
                 
                 self.update_display("1. Citra Asli (RGB)", self.original_image)
                 self.btn_process.setEnabled(True)
                 self.result_text.setText("Gambar dimuat. Klik Proses.")
             else:
-                QMessageBox.critical(self, "Error", "Gagal memuat gambar.")
+                QMessageBox.critical(self, "Error", f"Gagal memuat gambar: {error}")
 
     # --- LOGIKA PEMROSESAN ---
+    def start_job(self, job, on_finished, pool=None):
+        runnable = JobRunnable(job)
+        runnable.setAutoDelete(False)
+        # Referensi disimpan sampai job selesai agar signal tidak ikut terhapus
+        self.running_jobs[job] = runnable
+        runnable.signals.progress.connect(partial(self.on_job_progress, job))
+        runnable.signals.stage_image.connect(partial(self.on_stage_image, job))
+        runnable.signals.finished.connect(partial(self.on_job_finished, job, on_finished))
+        runnable.signals.failed.connect(partial(self.on_job_failed, job))
+        (pool or self.job_pool).start(runnable)
+        return job
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
     def process_classification(self):
         if self.original_image is None: return
-        
-        # 1. Pre-processing (Median Blur)
-        img_blur = cv2.medianBlur(self.original_image, 5)
-        self.step_1_blur = img_blur.copy()
-        self.update_display("2. Pre-processing (Blur)", self.step_1_blur)
 
-        # 2. HSV Conversion
-        hsv = cv2.cvtColor(img_blur, cv2.COLOR_BGR2HSV)
-        h, s, v = cv2.split(hsv)
-        self.step_2_hsv = v.copy() 
+        self.cancel_job()
+        self.job = self.start_job(ClassificationJob(self.classifier, self.original_image), self.on_classified)
+        self.btn_process.setEnabled(False)
+        self.result_text.setText("Memproses...")
+
+    def on_job_progress(self, job, name, fraction):
+        if job is self.job:
+            self.result_text.setText(f"Memproses... {fraction:.0%}\n({name})")
+
+    def on_stage_image(self, job, name, img):
+        # Panel diperbarui begitu tahapnya selesai, sebelum seluruh pipeline rampung
+        if job is self.job and name in STAGE_PANELS:
+            self.update_display(STAGE_PANELS[name], img)
+
+    def on_job_finished(self, job, on_finished, result):
+        self.running_jobs.pop(job, None)
+        if not job.cancelled:
+            on_finished(job, result)
+
+    def on_job_failed(self, job, message):
+        self.running_jobs.pop(job, None)
+        if job is self.job:
+            self.job = None
+            self.btn_process.setEnabled(self.original_image is not None)
+        self.btn_report.setEnabled(self.final_result_img is not None)
+        QMessageBox.critical(self, "Error", message)
+
+    def on_classified(self, job, result):
+        if job is not self.job: return
+        self.job = None
+        self.btn_process.setEnabled(True)
+        self.show_result(result)
+
+    def show_result(self, result):
+        stages = result.stages
+        if stages["original"] is not self.original_image:
+            # Frame baru dari mode video
+            self.original_image = stages["original"]
+            self.update_display("1. Citra Asli (RGB)", self.original_image)
+
+        self.step_1_blur = stages["blur"]
+        self.step_2_hsv = stages["hsv_v"]
+        self.step_3_mask_red = stages["mask_red"]
+        self.step_4_mask_green = stages["mask_green"]
+        self.step_5_mask_white = stages["mask_white"]
+        self.step_6_global_mask = stages["global_mask"]
+        self.update_display("2. Pre-processing (Blur)", self.step_1_blur)
         self.update_display("3. Ruang Warna HSV (Channel V)", self.step_2_hsv)
+        self.update_display("4. Masking Merah (Pixel Count)", self.step_3_mask_red)
+        self.update_display("5. Masking Hijau (Pixel Count)", self.step_4_mask_green)
+        self.update_display("6. Masking Putih (Pixel Count)", self.step_5_mask_white)
+        self.update_display("7. Segmentasi Objek Utama", self.step_6_global_mask)
 
-        # 3. Masking Warna
-        # MERAH
-        lower_red1, upper_red1 = np.array([0, 40, 40]), np.array([15, 255, 255])
-        lower_red2, upper_red2 = np.array([155, 40, 40]), np.array([180, 255, 255])
-        mask_red = cv2.inRange(hsv, lower_red1, upper_red1) | cv2.inRange(hsv, lower_red2, upper_red2)
-        
-        # HIJAU
-        lower_green, upper_green = np.array([35, 40, 40]), np.array([90, 255, 255])
-        mask_green = cv2.inRange(hsv, lower_green, upper_green)
-        
-        # PUTIH
-        lower_white, upper_white = np.array([0, 0, 140]), np.array([180, 40, 255])
-        mask_white = cv2.inRange(hsv, lower_white, upper_white)
-
-        self.step_3_mask_red = mask_red
-        self.step_4_mask_green = mask_green
-        self.step_5_mask_white = mask_white
-        self.update_display("4. Masking Merah (Pixel Count)", mask_red)
-        self.update_display("5. Masking Hijau (Pixel Count)", mask_green)
-        self.update_display("6. Masking Putih (Pixel Count)", mask_white)
-
-        # 4. Global Masking & Contours
-        combined_mask = mask_red | mask_green | mask_white
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
-        combined_mask = cv2.morphologyEx(combined_mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-        combined_mask = cv2.morphologyEx(combined_mask, cv2.MORPH_OPEN, kernel, iterations=1)
-        
-        self.step_6_global_mask = combined_mask
-        self.update_display("7. Segmentasi Objek Utama", combined_mask)
-
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        final_img = self.original_image.copy()
-        
-        if not contours:
+        if not result.detected:
             self.result_text.setText("Gagal: Tidak ada objek terdeteksi.")
             return
 
-        # 5. Cek Objek Utama vs Background
-        c_main = max(contours, key=cv2.contourArea)
-        area_main = cv2.contourArea(c_main)
-        h_img, w_img = self.original_image.shape[:2]
-        
-        is_bg_detected = False
-        if area_main > 0.90 * (h_img * w_img):
-            is_bg_detected = True
-            cnts_red, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            cnts_green, _ = cv2.findContours(mask_green, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            new_c = None
-            max_area_temp = 0
-            if cnts_red:
-                c_r = max(cnts_red, key=cv2.contourArea)
-                if cv2.contourArea(c_r) > 1000:
-                    new_c, max_area_temp = c_r, cv2.contourArea(c_r)
-            if cnts_green:
-                c_g = max(cnts_green, key=cv2.contourArea)
-                if cv2.contourArea(c_g) > max_area_temp and cv2.contourArea(c_g) > 1000:
-                    new_c = c_g
-            
-            if new_c is not None:
-                c_main = new_c
-                area_main = cv2.contourArea(c_main)
-
-        # 6. Hitung Pixel dalam Mask Objek
-        mask_object_only = np.zeros_like(combined_mask)
-        cv2.drawContours(mask_object_only, [c_main], -1, 255, -1)
-
-        pixels_red = cv2.countNonZero(cv2.bitwise_and(mask_red, mask_object_only))
-        pixels_green = cv2.countNonZero(cv2.bitwise_and(mask_green, mask_object_only))
-        pixels_white = 0 if is_bg_detected else cv2.countNonZero(cv2.bitwise_and(mask_white, mask_object_only))
-        
-        total_pixels = pixels_red + pixels_green + pixels_white
-        if total_pixels == 0: total_pixels = 1 
-
-        pct_red = (pixels_red / total_pixels) * 100
-        pct_green = (pixels_green / total_pixels) * 100
-        pct_white = (pixels_white / total_pixels) * 100
-
-        # 7. Klasifikasi
-        predicted_type = "Tidak Dikenali"
-        dominant_color_name = "Campuran"
-        logic_explanation = ""
-        
-        # Hitung Shape Features (Default)
-        rect = cv2.minAreaRect(c_main)
-        (cx, cy), (w, h), angle = rect
-        aspect_ratio_val = max(w, h) / min(w, h) if min(w,h) > 0 else 0
-        
-        hull = cv2.convexHull(c_main)
-        hull_area = cv2.contourArea(hull)
-        solidity = area_main / hull_area if hull_area > 0 else 0
-        
-        perimeter = cv2.arcLength(c_main, True)
-        if perimeter == 0: perimeter = 1
-        circularity = (4 * np.pi * area_main) / (perimeter ** 2)
-
-        # VISUALISASI FITUR (Box & Hull)
-        box = cv2.boxPoints(rect)
-        box = np.int32(box)
-        cv2.drawContours(final_img, [box], 0, (255, 0, 0), 2) # Box Biru
-        cv2.drawContours(final_img, [hull], 0, (0, 255, 255), 1) # Hull Kuning
-
-        # --- DECISION TREE LOGIC ---
-        if pct_green > 10: 
-            predicted_type = "CABAI HIJAU"
-            dominant_color_name = "Hijau"
-            logic_explanation = "Terdeteksi piksel HIJAU signifikan (>10%)."
-        
-        elif pct_red > 40:
-            dominant_color_name = "Merah/Ungu"
-            # Cek Bentuk
-            if aspect_ratio_val > 1.6 or solidity < 0.8 or circularity < 0.4:
-                predicted_type = "CABAI MERAH"
-                logic_explanation = "Warna MERAH dominan. Bentuk MEMANJANG (Ratio tinggi) atau MELENGKUNG (Solidity rendah)."
-            else:
-                predicted_type = "BAWANG MERAH"
-                logic_explanation = "Warna MERAH dominan. Bentuk BULAT/PADAT (Ratio rendah, Solidity tinggi)."
-        
-        else:
-            predicted_type = "BAWANG PUTIH"
-            dominant_color_name = "Putih"
-            logic_explanation = "Minim warna Merah/Hijau. Didominasi warna PUTIH."
-
-        # Update Visual Akhir
-        if not is_bg_detected:
-            cv2.drawContours(final_img, [c_main], -1, (0, 255, 0), 2)
-        
-        cv2.putText(final_img, predicted_type, (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
-        self.step_8_features = final_img
-        self.final_result_img = final_img
+        self.step_8_features = stages["features"]
+        self.final_result_img = stages["final"]
         self.update_display("8. Analisis Bentuk (Box & Hull)", self.step_8_features)
         self.update_display("9. Hasil Akhir", self.final_result_img)
 
         # Update UI & Save Report Data
-        self.result_text.setText(f"Hasil: {predicted_type}\n({logic_explanation})")
+        self.result_text.setText(f"Hasil: {result.prediction}\n({result.logic_path})")
         self.btn_report.setEnabled(True)
+        self.analysis_report = result.to_report()
+        self.analysis_trace = result.trace
+        self.analysis_config = self.classifier.config
+
+    # --- MODE VIDEO / KAMERA ---
+    def toggle_stream(self):
+        if self.stream is not None:
+            self.stop_stream()
+            return
 
-        self.analysis_report = {
-            "prediction": predicted_type,
-            "dominant_color": dominant_color_name,
-            "aspect_ratio": f"{aspect_ratio_val:.2f}",
-            "solidity": f"{solidity:.2f}",
-            "circularity": f"{circularity:.2f}",
-            "metrics": {
-                "pct_red": f"{pct_red:.1f}", 
-                "pct_green": f"{pct_green:.1f}", 
-                "pct_white": f"{pct_white:.1f}"
-            },
-            "pixels": {"R": pixels_red, "G": pixels_green, "W": pixels_white},
-            "logic_path": logic_explanation
-        }
+        source, ok = QInputDialog.getText(self, "Sumber Video",
+                                          "Path file video atau index kamera (mis. 0):", text="0")
+        if not ok or not source.strip():
+            return
+        self.cancel_job()
+        try:
+            self.stream = StreamClassifier(source.strip(), self.classifier.classifier.config,
+                                           keep_stages=True).start()
+        except IOError as e:
+            self.stream = None
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        self.stream_seq = 0
+        self.stream_timer.start()
+        self.btn_stream.setText("4. Hentikan Video")
+        self.btn_process.setEnabled(False)
+
+    def stop_stream(self):
+        self.stream_timer.stop()
+        if self.stream is not None:
+            self.stream.stop()
+            s = self.stream.stats()
+            self.result_text.setText(f"Video selesai: {s['processed']} frame, "
+                                     f"{s['dropped']} dibuang, {s['fps']} FPS")
+            self.stream = None
+        self.btn_stream.setText("4. Mode Video / Kamera")
+        self.btn_process.setEnabled(self.original_image is not None)
+
+    def refresh_stream(self):
+        # Dipanggil QTimer pada laju tampilan; hanya frame terbaru yang digambar
+        latest = self.stream.latest
+        if latest is not None and latest[0] != self.stream_seq:
+            self.stream_seq, frame, result, label = latest
+            self.show_result(result)
+            s = self.stream.stats()
+            self.result_text.setText(f"Hasil: {label or '-'}\n({s['fps']} FPS, {s['dropped']} frame dibuang)")
+        if self.stream.finished.is_set():
+            self.stop_stream()
 
     def generate_report(self):
         if self.final_result_img is None: return
-        
-        # Helper images
-        imgs = [
-            self.cv_to_base64(self.original_image),      # 0
-            self.cv_to_base64(self.step_1_blur),         # 1
-            self.cv_to_base64(self.step_2_hsv),          # 2
-            self.cv_to_base64(self.step_3_mask_red),     # 3
-            self.cv_to_base64(self.step_4_mask_green),   # 4
-            self.cv_to_base64(self.step_5_mask_white),   # 5
-            self.cv_to_base64(self.step_6_global_mask),  # 6
-            self.cv_to_base64(self.step_8_features),     # 7 (Feature Vis)
-            self.cv_to_base64(self.final_result_img)     # 8
-        ]
-        
-        r = self.analysis_report
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Laporan Detil Klasifikasi Bumbu</title>
-            <style>
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f4f9; color: #333; padding: 20px; }}
-                h1, h2, h3 {{ color: #2c3e50; border-bottom: 2px solid #ddd; padding-bottom: 10px; }}
-                .container {{ max-width: 1000px; margin: auto; background: white; padding: 30px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }}
-                .summary-box {{ background-color: #e8f4fc; padding: 20px; border-radius: 8px; border-left: 5px solid #3498db; margin-bottom: 30px; }}
-                .result-title {{ font-size: 32px; font-weight: bold; color: #e74c3c; margin: 0; }}
-                .logic-text {{ font-size: 16px; font-style: italic; color: #555; margin-top: 5px; }}
-                
-                .step-card {{ margin-bottom: 40px; }}
-                .step-header {{ background-color: #34495e; color: white; padding: 10px 15px; font-size: 18px; border-radius: 5px 5px 0 0; }}
-                .step-content {{ border: 1px solid #ddd; border-top: none; padding: 20px; display: flex; gap: 20px; align-items: flex-start; }}
-                
-                table {{ width: 100%; border-collapse: collapse; font-size: 14px; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                
-                .img-container {{ flex: 1; text-align: center; }}
-                .img-container img {{ max-width: 100%; max-height: 250px; border: 1px solid #999; box-shadow: 2px 2px 5px rgba(0,0,0,0.2); }}
-                .text-container {{ flex: 1; }}
-                .metric-value {{ font-weight: bold; color: #2980b9; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div style="text-align: center;">
-                    <h1>Laporan Analisis Citra Komputer</h1>
-                    <p>Waktu Analisis: {datetime.datetime.now().strftime("%d %B %Y, %H:%M WIB")}</p>
-                </div>
-
-                <div class="summary-box">
-                    <h3>KESIMPULAN AKHIR</h3>
-                    <p class="result-title">{r['prediction']}</p>
-                    <p class="logic-text">" {r['logic_path']} "</p>
-                </div>
-
-                <h2>Rincian Proses & Analisis</h2>
-
-                <div class="step-card">
-                    <div class="step-header">Tahap 1: Pre-processing (Noise Reduction)</div>
-                    <div class="step-content">
-                        <div class="img-container">
-                            <img src="{imgs[0]}" alt="Asli"><br><small>Citra Asli</small>
-                            <br><br>
-                            <img src="{imgs[1]}" alt="Blur"><br><small>Median Blur</small>
-                        </div>
-                        <div class="text-container">
-                            <h4>Analisis:</h4>
-                            <p>Citra asli sering mengandung <i>noise</i> (bintik-bintik kecil) yang dapat mengganggu deteksi warna.</p>
-                            <ul>
-                                <li><b>Metode:</b> Median Blur (Kernel 5x5).</li>
-                                <li><b>Tujuan:</b> Menghaluskan tekstur bumbu tanpa menghilangkan tepi (edge) objek terlalu banyak. Ini penting agar bintik putih pada cabai tidak dianggap sebagai bawang putih.</li>
-                            </ul>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="step-card">
-                    <div class="step-header">Tahap 2: Segmentasi Warna (HSV)</div>
-                    <div class="step-content">
-                        <div class="img-container">
-                            <img src="{imgs[2]}" alt="HSV V-Channel"><br><small>Channel V (Brightness)</small>
-                        </div>
-                        <div class="text-container">
-                            <h4>Analisis Warna:</h4>
-                            <p>Sistem mengonversi citra RGB ke HSV untuk memisahkan intensitas cahaya dari informasi warna.</p>
-                            <table>
-                                <tr><th>Target Warna</th><th>Deteksi Pixel</th><th>Persentase</th></tr>
-                                <tr><td><b>Merah</b> (Cabai/Bawang Merah)</td><td>{r['pixels']['R']} px</td><td class="metric-value">{r['metrics']['pct_red']}%</td></tr>
-                                <tr><td><b>Hijau</b> (Cabai Hijau)</td><td>{r['pixels']['G']} px</td><td class="metric-value">{r['metrics']['pct_green']}%</td></tr>
-                                <tr><td><b>Putih</b> (Bawang Putih)</td><td>{r['pixels']['W']} px</td><td class="metric-value">{r['metrics']['pct_white']}%</td></tr>
-                            </table>
-                            <p><i>*Persentase dihitung relatif terhadap luas area objek yang terdeteksi.</i></p>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="step-card">
-                    <div class="step-header">Tahap 3: Analisis Geometri (Bentuk)</div>
-                    <div class="step-content">
-                        <div class="img-container">
-                            <img src="{imgs[7]}" alt="Shape Analysis"><br><small>Bounding Box (Biru) & Convex Hull (Kuning)</small>
-                        </div>
-                        <div class="text-container">
-                            <h4>Analisis Morfologi:</h4>
-                            <p>Jika warna dominan adalah Merah, sistem membedakan Cabai dan Bawang Merah berdasarkan bentuk.</p>
-                            <table>
-                                <tr><th>Metrik</th><th>Nilai</th><th>Interpretasi</th></tr>
-                                <tr>
-                                    <td><b>Aspect Ratio</b><br>(Panjang / Lebar)</td>
-                                    <td class="metric-value">{r['aspect_ratio']}</td>
-                                    <td>
-                                        > 1.5 : Cenderung Lonjong (Cabai)<br>
-                                        ~ 1.0 : Cenderung Bulat (Bawang)
-                                    </td>
-                                </tr>
-                                <tr>
-                                    <td><b>Solidity</b><br>(Area / Hull)</td>
-                                    <td class="metric-value">{r['solidity']}</td>
-                                    <td>
-                                        < 0.8 : Melengkung/Tidak Padat (Cabai)<br>
-                                        > 0.9 : Padat/Cembung (Bawang)
-                                    </td>
-                                </tr>
-                                <tr>
-                                    <td><b>Circularity</b><br>(Kebulatan)</td>
-                                    <td class="metric-value">{r['circularity']}</td>
-                                    <td>
-                                        Mendekati 1.0 = Lingkaran Sempurna.
-                                    </td>
-                                </tr>
-                            </table>
-                        </div>
-                    </div>
-                </div>
-
-                <div class="step-card">
-                    <div class="step-header">Tahap 4: Hasil Visualisasi Akhir</div>
-                    <div class="step-content">
-                        <div class="img-container">
-                            <img src="{imgs[8]}" style="max-height: 400px;" alt="Final Result">
-                        </div>
-                        <div class="text-container">
-                            <h4>Keputusan Algoritma:</h4>
-                            <ol>
-                                <li>Cek Hijau: <b>{r['metrics']['pct_green']}%</b> (Threshold > 10%)</li>
-                                <li>Cek Merah: <b>{r['metrics']['pct_red']}%</b> (Threshold > 40%)</li>
-                                <li>Jika Merah Dominan, cek Rasio & Solidity.</li>
-                                <li>Jika tidak ada warna kuat, diasumsikan Bawang Putih.</li>
-                            </ol>
-                            <p><b>Prediksi Final: {r['prediction']}</b></p>
-                        </div>
-                    </div>
-                </div>
-
-            </div>
-        </body>
-        </html>
-        """
-        
+
         file_path, _ = QFileDialog.getSaveFileName(self, "Simpan Laporan", "Laporan_Analisis_Bumbu.html", "HTML Files (*.html)")
         if file_path:
-            with open(file_path, 'w') as f:
-                f.write(html)
-            QMessageBox.information(self, "Sukses", f"Laporan lengkap disimpan di:\n{file_path}")
+            stages = {
+                "original": self.original_image,
+                "blur": self.step_1_blur,
+                "hsv_v": self.step_2_hsv,
+                "mask_red": self.step_3_mask_red,
+                "mask_green": self.step_4_mask_green,
+                "mask_white": self.step_5_mask_white,
+                "global_mask": self.step_6_global_mask,
+                "features": self.step_8_features,
+                "final": self.final_result_img,
+            }
+            job = FunctionJob(write_report, file_path, self.analysis_report, stages, self.analysis_trace,
+                              config=self.analysis_config)
+            self.btn_report.setEnabled(False)
+            self.start_job(job, partial(self.on_report_written, file_path), QThreadPool.globalInstance())
+
+    def on_report_written(self, file_path, job, encode_seconds):
+        self.btn_report.setEnabled(self.final_result_img is not None)
+        QMessageBox.information(self, "Sukses", f"Laporan lengkap disimpan di:\n{file_path}")
 
 if __name__ == '__main__':
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
@@ -0,0 +1,234 @@
+"""Klasifikasi batch satu direktori (rekursif) memakai pool proses.
+
+Contoh:
+    python -m batch classify dataset/ --workers 8 --output hasil.csv
+    python -m batch classify dataset/ --output hasil.jsonl
+
+Hasil ditulis (streaming) ke CSV/JSONL begitu tiap gambar selesai, sehingga
+memori tidak bertambah seiring jumlah gambar.
+"""
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import cv2
+
+from engine import CLASSES, PipelineConfig
+from ingest import IMAGE_EXTENSIONS, load_image, working_target
+from instrumentation import parse_statsd_address, peak_rss_mb
+from profiles import DEFAULT_PROFILE, check_overrides, check_profile, open_classifier
+
+
+FIELDS = [
+    "path", "prediction", "dominant_color",
+    "pct_red", "pct_green", "pct_white",
+    "pixels_red", "pixels_green", "pixels_white",
+    "aspect_ratio", "solidity", "circularity",
+    "is_bg_detected", "detected", "logic_path", "config_hash", "decode_factor", "error",
+]
+
+# Kolom mode multi-objek: jumlah objek per kelas
+MULTI_FIELDS = ["path", "objects", *CLASSES, "is_bg_detected", "config_hash", "decode_factor", "error"]
+
+_classifier = None
+
+
+def iter_images(root, extensions=IMAGE_EXTENSIONS):
+    # Walk direktori secara lazy & terurut agar output deterministik
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+
+def _init_worker(config=None, statsd=None, profiles=None, profile=DEFAULT_PROFILE):
+    global _classifier
+    # Satu thread OpenCV per proses agar tidak terjadi oversubscription
+    cv2.setNumThreads(1)
+    instrumentation = parse_statsd_address(statsd) if statsd else None
+    _classifier = open_classifier(profiles, profile, config, instrumentation=instrumentation)
+
+
+def _load(path, row):
+    # JPEG di-decode langsung mendekati resolusi kerja profil aktif -> (citra, faktor)
+    try:
+        return load_image(path, working_target(_classifier.config))
+    except (OSError, ValueError) as e:
+        row["error"] = f"Gagal memuat gambar: {e}"
+        return None, 1
+
+
+def _run(method, image, factor, row):
+    # Error pipeline pada satu gambar dicatat di barisnya, run tetap lanjut
+    try:
+        return method(image, decode_factor=factor)
+    except Exception as e:
+        row["error"] = f"Gagal memproses gambar: {type(e).__name__}: {e}"
+        return None
+
+
+def classify_path(path):
+    row = {"path": path, "error": ""}
+    image, factor = _load(path, row)
+    if image is None:
+        return row
+
+    result = _run(_classifier.classify, image, factor, row)
+    if result is None:
+        return row
+    row.update({
+        "prediction": result.prediction,
+        "dominant_color": result.dominant_color,
+        "pct_red": round(result.pct_red, 2),
+        "pct_green": round(result.pct_green, 2),
+        "pct_white": round(result.pct_white, 2),
+        "pixels_red": result.pixels_red,
+        "pixels_green": result.pixels_green,
+        "pixels_white": result.pixels_white,
+        "aspect_ratio": round(result.aspect_ratio, 4),
+        "solidity": round(result.solidity, 4),
+        "circularity": round(result.circularity, 4),
+        "is_bg_detected": result.is_bg_detected,
+        "detected": result.detected,
+        "logic_path": result.logic_path,
+        "config_hash": result.config_hash,
+        "decode_factor": result.decode_factor,
+    })
+    return row
+
+
+def classify_objects_path(path):
+    row = {"path": path, "error": ""}
+    image, factor = _load(path, row)
+    if image is None:
+        return row
+
+    result = _run(_classifier.classify_objects, image, factor, row)
+    if result is None:
+        return row
+    report = result.to_report()
+    row.update(result.counts)
+    row.update(objects=report["objects"], is_bg_detected=result.is_bg_detected, items=report["items"],
+               config_hash=result.config_hash, decode_factor=result.decode_factor)
+    return row
+
+
+def _worker_task(item):
+    # Baris hasil + (pid, RSS puncak) worker untuk ringkasan memori
+    multi, path = item
+    row = classify_objects_path(path) if multi else classify_path(path)
+    row["_worker"] = os.getpid(), peak_rss_mb()
+    return row
+
+
+class CsvWriter:
+    def __init__(self, stream, fields=FIELDS):
+        self.writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def run_classify(root, output=None, fmt=None, workers=None, chunksize=4, config=None, statsd=None, multi=False,
+                 profiles=None, profile=DEFAULT_PROFILE):
+    workers = workers or os.cpu_count() or 1
+    if fmt is None:
+        fmt = "jsonl" if output and output.endswith((".jsonl", ".json")) else "csv"
+
+    stream = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+    writer = JsonlWriter(stream) if fmt == "jsonl" else CsvWriter(stream, MULTI_FIELDS if multi else FIELDS)
+    tasks = ((multi, path) for path in iter_images(root))
+
+    count = errors = 0
+    worker_rss = {}
+    pool = None
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            _init_worker(config, statsd, profiles, profile)
+            rows = map(_worker_task, tasks)
+        else:
+            pool = mp.Pool(workers, initializer=_init_worker, initargs=(config, statsd, profiles, profile))
+            rows = pool.imap_unordered(_worker_task, tasks, chunksize=chunksize)
+
+        for row in rows:
+            pid, rss = row.pop("_worker")
+            worker_rss[pid] = rss
+            writer.write(row)
+            count += 1
+            if row["error"]:
+                errors += 1
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if output:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"{count} gambar ({errors} gagal) dalam {elapsed:.2f} s "
+          f"-> {rate:.1f} gambar/detik dengan {workers} worker", file=sys.stderr)
+    if worker_rss and None not in worker_rss.values():
+        print("RSS puncak per worker: " + ", ".join(f"{pid}={mb:.0f} MB" for pid, mb in sorted(worker_rss.items())),
+              file=sys.stderr)
+    return count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Klasifikasi bumbu dapur secara batch.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_cls = sub.add_parser("classify", help="Klasifikasi semua gambar dalam direktori (rekursif).")
+    p_cls.add_argument("root", help="Direktori atau file gambar.")
+    p_cls.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker (default: jumlah core).")
+    p_cls.add_argument("--output", "-o", default=None, help="File output .csv/.jsonl (default: stdout).")
+    p_cls.add_argument("--format", dest="fmt", choices=("csv", "jsonl"), default=None)
+    p_cls.add_argument("--chunksize", type=int, default=4, help="Jumlah gambar per pengiriman ke worker.")
+    p_cls.add_argument("--working-size", type=int, default=0,
+                       help="Sisi terpanjang resolusi kerja dalam piksel (default: resolusi asli).")
+    p_cls.add_argument("--refine", action="store_true",
+                       help="Hitung ulang kontur utama pada resolusi asli di dalam bounding box.")
+    p_cls.add_argument("--multi", action="store_true",
+                       help="Mode multi-objek: hitung semua objek per gambar (bukan hanya yang terbesar).")
+    p_cls.add_argument("--statsd", default=None, metavar="HOST:PORT",
+                       help="Kirim metrik per tahap ke server StatsD.")
+    p_cls.add_argument("--model", default="", help="File model (python -m models train) pengganti decision tree.")
+    p_cls.add_argument("--profiles", default=None, help="File profil konfigurasi (JSON/TOML/YAML), dimuat ulang otomatis.")
+    p_cls.add_argument("--profile", default=DEFAULT_PROFILE, help="Nama profil yang dipakai.")
+
+    args = parser.parse_args(argv)
+    if args.command == "classify":
+        error = None if not args.profiles else (
+            check_overrides({"--working-size": args.working_size, "--refine": args.refine, "--model": args.model})
+            or check_profile(args.profiles, args.profile))
+        if error:
+            parser.error(error)
+        config = None if args.profiles else PipelineConfig(working_long_side=args.working_size,
+                                                           refine_full_res=args.refine, model_path=args.model)
+        run_classify(args.root, args.output, args.fmt, args.workers, args.chunksize, config, args.statsd, args.multi,
+                     args.profiles, args.profile)
+
+
+if __name__ == "__main__":
+    main()
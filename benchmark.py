@@ -0,0 +1,475 @@
+"""Benchmark & regression harness di atas gambar berlabel (default: dataset/).
+
+Contoh:
+    python -m benchmark dataset/ --output bench.json
+    python -m benchmark dataset/ --compare bench.json --max-slowdown 0.2
+
+Yang diukur:
+  * akurasi & confusion matrix (ground truth dari nama file, mis. cabe-merah-1.jpg)
+  * latensi p50/p95 pipeline headless
+  * waktu per tahap (blur, labels, morphology, contours, features, decision,
+    render, encode laporan) pada jalur GUI (keep_stages=True)
+  * throughput & memori puncak pada beberapa ukuran citra
+  * microbenchmark segmentasi (morfologi + kontur utama + fallback
+    background): jalur saat ini vs implementasi lama (``--segmentation``)
+  * decode per format (JPEG/PNG/WebP/BMP/TIFF): decode penuh vs decode
+    langsung ke resolusi kerja (``--decode``)
+  * soak test: RSS proses selama ratusan ribu klasifikasi harus datar
+    (``--soak 100000``)
+
+Hasil berupa JSON agar bisa dibandingkan antar commit (--compare).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from batch import iter_images
+from engine import (CLASSES, LABEL_GREEN, LABEL_RED, PipelineConfig, SpiceClassifier, label_from_path,
+                    mask_from_labels, mask_nonzero)
+from ingest import decode, load_image, probe, reduction_for
+from instrumentation import peak_rss_mb, rss_mb
+from report import AssetWriter, encode_assets
+
+
+DEFAULT_SIZES = (640, 1280, 2560, 4000)
+
+
+def load_dataset(root):
+    items = []
+    for path in iter_images(root):
+        try:
+            image, _ = load_image(path)
+        except (OSError, ValueError) as e:
+            print(f"Lewati (gagal dimuat): {path}: {e}", file=sys.stderr)
+            continue
+        items.append((path, image, label_from_path(path)))
+    return items
+
+
+def _summary(values):
+    arr = np.asarray(values, dtype=np.float64) * 1000
+    return {
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "n": int(arr.size),
+    }
+
+
+def _resize_long_side(image, long_side):
+    h, w = image.shape[:2]
+    scale = long_side / max(h, w)
+    interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    return cv2.resize(image, (max(1, int(round(w * scale))), max(1, int(round(h * scale)))), interpolation=interp)
+
+
+def encode_report_images(stages):
+    # Sama seperti laporan GUI: citra unik, diperkecil, inline base64
+    return encode_assets(AssetWriter(), stages)
+
+
+def bench_accuracy(classifier, items):
+    confusion = {c: defaultdict(int) for c in CLASSES}
+    errors = []
+    correct = total = 0
+    for path, image, label in items:
+        if label is None:
+            continue
+        prediction = classifier.classify(image).prediction
+        confusion.setdefault(label, defaultdict(int))[prediction] += 1
+        total += 1
+        if prediction == label:
+            correct += 1
+        else:
+            errors.append({"path": path, "label": label, "prediction": prediction})
+    return {
+        "accuracy": round(correct / total, 4) if total else None,
+        "correct": correct,
+        "total": total,
+        "confusion": {label: dict(row) for label, row in confusion.items()},
+        "errors": errors,
+    }
+
+
+def bench_latency(classifier, items, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for _, image, _ in items:
+            t0 = time.perf_counter()
+            classifier.classify(image)
+            latencies.append(time.perf_counter() - t0)
+    return _summary(latencies)
+
+
+def bench_stages(config, items, repeat):
+    timings = defaultdict(list)
+    classifier = SpiceClassifier(config, on_stage=lambda name, sec: timings[name].append(sec))
+    for _ in range(repeat):
+        for _, image, _ in items:
+            result = classifier.classify(image, keep_stages=True)
+            t0 = time.perf_counter()
+            encode_report_images(result.stages)
+            timings["report_encode"].append(time.perf_counter() - t0)
+    return {name: _summary(values) for name, values in timings.items()}
+
+
+def bench_throughput(classifier, items, sizes, repeat):
+    rows = []
+    for size in sizes:
+        images = [_resize_long_side(image, size) for _, image, _ in items]
+        classifier.classify(images[0])  # warm-up
+
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for image in images:
+                t0 = time.perf_counter()
+                classifier.classify(image)
+                latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+
+        # Memori puncak satu klasifikasi (alokasi NumPy/OpenCV yang terlacak)
+        tracemalloc.start()
+        classifier.classify(max(images, key=lambda im: im.size))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        lat = _summary(latencies)
+        rows.append({
+            "long_side": size,
+            "images_per_sec": round(len(latencies) / elapsed, 2),
+            "p50_ms": lat["p50"],
+            "p95_ms": lat["p95"],
+            "peak_alloc_mb": round(peak / 2 ** 20, 2),
+        })
+        del images
+    return rows
+
+
+def _legacy_segmentation(classifier, labels, kernel, min_area):
+    # Jalur sebelum connectedComponentsWithStats: morfologi satu frame penuh,
+    # findContours + contourArea berulang, fallback dengan dua findContours
+    cfg = classifier.config
+    mask = mask_nonzero(labels)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=cfg.close_iterations)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=cfg.open_iterations)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    c_main = max(contours, key=cv2.contourArea)
+    area_main = cv2.contourArea(c_main)
+    if area_main > cfg.bg_ratio * mask.size:
+        cnts_red, _ = cv2.findContours(mask_from_labels(labels, LABEL_RED), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cnts_green, _ = cv2.findContours(mask_from_labels(labels, LABEL_GREEN), cv2.RETR_EXTERNAL,
+                                         cv2.CHAIN_APPROX_SIMPLE)
+        max_area_temp = 0
+        if cnts_red:
+            c_r = max(cnts_red, key=cv2.contourArea)
+            if cv2.contourArea(c_r) > min_area:
+                c_main, max_area_temp = c_r, cv2.contourArea(c_r)
+        if cnts_green:
+            c_g = max(cnts_green, key=cv2.contourArea)
+            if cv2.contourArea(c_g) > max_area_temp and cv2.contourArea(c_g) > min_area:
+                c_main = c_g
+        area_main = cv2.contourArea(c_main)
+    return c_main, area_main
+
+
+def bench_segmentation(config, items, repeat, sizes=(0,)):
+    """Waktu morfologi + kontur utama per citra (ms): implementasi lama vs saat ini.
+
+    Citra label dihitung sekali di luar pengukuran; ``early_background``
+    diukur terpisah karena hasilnya bisa berbeda dari jalur penuh.
+    """
+    config = config if config is not None else PipelineConfig()
+    current = SpiceClassifier(config)
+    early = SpiceClassifier(replace(config, early_background=True))
+    rows = []
+    for size in sizes:
+        prepared = []
+        for _, image, _ in items:
+            if size:
+                image = _resize_long_side(image, size)
+            ksize, kernel, min_area = current._params(1.0)
+            _, labels, _ = current._segment(image, ksize, kernel, timed=False)
+            prepared.append((labels, kernel, min_area))
+
+        def run(fn):
+            times = []
+            for _ in range(repeat):
+                for labels, kernel, min_area in prepared:
+                    t0 = time.perf_counter()
+                    fn(labels, kernel, min_area)
+                    times.append(time.perf_counter() - t0)
+            return _summary(times)
+
+        legacy = run(lambda lb, k, a: _legacy_segmentation(current, lb, k, a))
+        now = run(lambda lb, k, a: current._main_contour(lb, current._morphology(mask_nonzero(lb), k),
+                                                         a, k))
+        fast = run(lambda lb, k, a: early._main_contour(
+            lb, None if cv2.countNonZero(lb) > config.bg_ratio * lb.size else
+            early._morphology(mask_nonzero(lb), k), a, k))
+        rows.append({"long_side": size or "asli", "legacy": legacy, "current": now, "early_background": fast,
+                     "speedup": round(legacy["p50"] / now["p50"], 2) if now["p50"] else None})
+    return rows
+
+
+DECODE_FORMATS = {
+    "jpeg": (".jpg", [cv2.IMWRITE_JPEG_QUALITY, 90]),
+    "png": (".png", [cv2.IMWRITE_PNG_COMPRESSION, 3]),
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, 90]),
+    "bmp": (".bmp", []),
+    "tiff": (".tiff", []),
+}
+
+
+def bench_decode(items, repeat, sizes=(4000,), target=1024, limit=8):
+    """Waktu decode bytes -> BGR per format (ms): penuh vs dengan target resolusi kerja.
+
+    ``limit`` gambar pertama di-encode ulang di memori pada tiap ukuran; hanya
+    JPEG yang bisa di-decode tereduksi, format lain selalu penuh.
+    """
+    rows = []
+    for size in sizes:
+        images = [_resize_long_side(image, size) if size else image for _, image, _ in items[:limit]]
+        for fmt, (ext, params) in DECODE_FORMATS.items():
+            blobs = [cv2.imencode(ext, image, params)[1].tobytes() for image in images]
+
+            def run(target_long_side):
+                times = []
+                for _ in range(repeat):
+                    for data in blobs:
+                        t0 = time.perf_counter()
+                        decode(data, target_long_side, max_pixels=0)
+                        times.append(time.perf_counter() - t0)
+                return _summary(times)
+
+            full, reduced = run(0), run(target)
+            factor, _ = reduction_for(probe(blobs[0]), target)
+            rows.append({"long_side": size or "asli", "format": fmt, "target": target, "reduction": factor,
+                         "kb": round(sum(map(len, blobs)) / len(blobs) / 1024, 1), "full": full, "reduced": reduced,
+                         "speedup": round(full["p50"] / reduced["p50"], 2) if reduced["p50"] else None})
+    return rows
+
+
+def _round_mb(value):
+    return round(value, 1) if value is not None else None
+
+
+def bench_soak(items, count, config=None, sample_every=1000, stream=None):
+    """RSS proses (MB) selama ``count`` klasifikasi berulang atas ``items``.
+
+    Ukuran citra dataset bervariasi, jadi buffer PipelineContext ikut
+    berganti; yang diukur adalah pertumbuhan RSS setelah satu putaran warm-up.
+    """
+    if rss_mb() is None:
+        raise SystemExit("Soak butuh RSS dari /proc (Linux).")
+    classifier = SpiceClassifier(config)
+    for _, image, _ in items:
+        classifier.classify(image)
+    start_rss = rss_mb()
+    samples = []
+    t0 = time.perf_counter()
+    for i in range(count):
+        classifier.classify(items[i % len(items)][1])
+        if (i + 1) % sample_every == 0 or i + 1 == count:
+            samples.append((i + 1, round(rss_mb(), 1)))
+            if stream is not None:
+                print(f"  {i + 1:>8} gambar: RSS {samples[-1][1]} MB", file=stream, flush=True)
+    elapsed = time.perf_counter() - t0
+    values = [rss for _, rss in samples]
+    return {
+        "images": count,
+        "images_per_sec": round(count / elapsed, 2) if elapsed > 0 else None,
+        "rss_start_mb": round(start_rss, 1),
+        "rss_end_mb": values[-1],
+        "rss_max_mb": max(values),
+        "growth_mb": round(values[-1] - start_rss, 1),
+        "peak_rss_mb": _round_mb(peak_rss_mb()),
+        "buffer_mb": round(classifier.context.nbytes / 2 ** 20, 1),
+        "samples": samples,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(root, sizes=DEFAULT_SIZES, repeat=3, config=None):
+    cv2.setNumThreads(1)
+    items = load_dataset(root)
+    if not items:
+        raise SystemExit(f"Tidak ada gambar di {root}")
+
+    classifier = SpiceClassifier(config)
+    classifier.classify(items[0][1])  # warm-up (LUT, kernel)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "images": len(items),
+            "repeat": repeat,
+        },
+        "accuracy": bench_accuracy(classifier, items),
+        "latency_ms": bench_latency(classifier, items, repeat),
+        "stages_ms": bench_stages(config, items, repeat),
+        "throughput": bench_throughput(classifier, items, sizes, repeat),
+        "segmentation_ms": bench_segmentation(config, items, repeat),
+        # None jika platform tidak menyediakan modul resource (mis. Windows)
+        "max_rss_mb": _round_mb(peak_rss_mb()),
+    }
+
+
+def compare(current, baseline, max_slowdown=0.2):
+    """Daftar regresi (string) antara hasil sekarang dan baseline."""
+    problems = []
+    acc, acc_base = current["accuracy"]["accuracy"], baseline["accuracy"]["accuracy"]
+    if acc is not None and acc_base is not None and acc < acc_base:
+        problems.append(f"akurasi turun: {acc_base:.4f} -> {acc:.4f}")
+
+    p50, p50_base = current["latency_ms"]["p50"], baseline["latency_ms"]["p50"]
+    if p50 > p50_base * (1 + max_slowdown):
+        problems.append(f"latensi p50 naik: {p50_base:.2f} ms -> {p50:.2f} ms")
+
+    base_rows = {row["long_side"]: row for row in baseline.get("throughput", [])}
+    for row in current.get("throughput", []):
+        base = base_rows.get(row["long_side"])
+        if base and row["images_per_sec"] < base["images_per_sec"] * (1 - max_slowdown):
+            problems.append(f"throughput {row['long_side']} px turun: "
+                            f"{base['images_per_sec']} -> {row['images_per_sec']} gambar/detik")
+    return problems
+
+
+def print_segmentation(rows, stream=sys.stdout):
+    print("Segmentasi (morfologi + kontur, p50 ms):", file=stream)
+    for row in rows:
+        print(f"  {row['long_side']!s:>5} px: lama {row['legacy']['p50']:.3f}, sekarang {row['current']['p50']:.3f} "
+              f"({row['speedup']}x), early_background {row['early_background']['p50']:.3f}", file=stream)
+
+
+def print_decode(rows, stream=sys.stdout):
+    print("Decode per format (p50 ms):", file=stream)
+    for row in rows:
+        print(f"  {row['long_side']!s:>5} px {row['format']:<5} {row['kb']:>9.1f} KB: penuh {row['full']['p50']:.2f}, "
+              f"target {row['target']} px {row['reduced']['p50']:.2f} (1/{row['reduction']}, {row['speedup']}x)",
+              file=stream)
+
+
+def print_soak(res, stream=sys.stdout):
+    print(f"Soak {res['images']} gambar ({res['images_per_sec']} gambar/detik): RSS awal {res['rss_start_mb']} MB, "
+          f"akhir {res['rss_end_mb']} MB, maks {res['rss_max_mb']} MB, pertumbuhan {res['growth_mb']} MB; "
+          f"RSS puncak proses {res['peak_rss_mb']} MB, buffer kerja {res['buffer_mb']} MB", file=stream)
+
+
+def print_summary(res, stream=sys.stdout):
+    acc = res["accuracy"]
+    print(f"Akurasi: {acc['correct']}/{acc['total']} = {acc['accuracy']}", file=stream)
+    labels = list(acc["confusion"])
+    print("Confusion matrix (baris = label, kolom = prediksi):", file=stream)
+    print("  " + " " * 14 + "".join(f"{c[:12]:>14}" for c in labels), file=stream)
+    for label in labels:
+        row = acc["confusion"][label]
+        print(f"  {label[:14]:<14}" + "".join(f"{row.get(c, 0):>14}" for c in labels), file=stream)
+
+    lat = res["latency_ms"]
+    print(f"Latensi headless: p50 {lat['p50']:.2f} ms, p95 {lat['p95']:.2f} ms", file=stream)
+    print("Waktu per tahap (ms, jalur GUI):", file=stream)
+    for name, s in res["stages_ms"].items():
+        print(f"  {name:<14} mean {s['mean']:>8.3f}  p50 {s['p50']:>8.3f}  p95 {s['p95']:>8.3f}", file=stream)
+    print("Throughput:", file=stream)
+    for row in res["throughput"]:
+        print(f"  {row['long_side']:>5} px: {row['images_per_sec']:>8.2f} gambar/detik, "
+              f"p50 {row['p50_ms']:.1f} ms, p95 {row['p95_ms']:.1f} ms, alokasi puncak {row['peak_alloc_mb']} MB",
+              file=stream)
+    print_segmentation(res["segmentation_ms"], stream)
+    print(f"Max RSS: {res['max_rss_mb']} MB", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmark kecepatan & akurasi klasifikasi.")
+    parser.add_argument("root", nargs="?", default="dataset", help="Direktori gambar berlabel (default: dataset).")
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan per gambar.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+                        help="Sisi terpanjang citra untuk uji throughput.")
+    parser.add_argument("--output", "-o", default=None, help="Simpan hasil JSON ke file ini.")
+    parser.add_argument("--compare", default=None, help="File JSON baseline untuk deteksi regresi.")
+    parser.add_argument("--max-slowdown", type=float, default=0.2,
+                        help="Batas perlambatan relatif sebelum dianggap regresi (default 0.2 = 20%%).")
+    parser.add_argument("--segmentation", action="store_true",
+                        help="Hanya microbenchmark segmentasi (lama vs sekarang) pada ukuran --sizes.")
+    parser.add_argument("--decode", action="store_true",
+                        help="Hanya benchmark decode per format pada ukuran --sizes.")
+    parser.add_argument("--target", type=int, default=1024,
+                        help="Sisi terpanjang resolusi kerja untuk decode tereduksi (--decode).")
+    parser.add_argument("--soak", type=int, default=0, metavar="N",
+                        help="Hanya soak test: N klasifikasi berulang sambil memantau RSS.")
+    parser.add_argument("--max-rss-growth", type=float, default=32,
+                        help="Batas pertumbuhan RSS (MB) pada soak test sebelum dianggap regresi.")
+    args = parser.parse_args(argv)
+
+    if args.soak:
+        cv2.setNumThreads(1)
+        items = load_dataset(args.root)
+        res = bench_soak(items, args.soak, sample_every=max(1, args.soak // 20), stream=sys.stderr)
+        print_soak(res)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(res, f, indent=2, ensure_ascii=False)
+        if res["growth_mb"] > args.max_rss_growth:
+            print(f"REGRESI: RSS tumbuh {res['growth_mb']} MB (> {args.max_rss_growth} MB)", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.decode:
+        cv2.setNumThreads(1)
+        items = load_dataset(args.root)
+        print_decode(bench_decode(items, args.repeat, args.sizes, args.target))
+        return
+
+    if args.segmentation:
+        cv2.setNumThreads(1)
+        items = load_dataset(args.root)
+        print_segmentation(bench_segmentation(None, items, args.repeat, [0] + args.sizes))
+        return
+
+    res = run_benchmark(args.root, args.sizes, args.repeat)
+    print_summary(res)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(res, baseline, args.max_slowdown)
+        for p in problems:
+            print(f"REGRESI: {p}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print("Tidak ada regresi terhadap baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
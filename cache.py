@@ -0,0 +1,251 @@
+"""Cache hasil klasifikasi berbasis isi (content-addressed).
+
+Key = hash piksel citra hasil decode (+ shape) dan hash konfigurasi pipeline
+(``engine.config_hash``, termasuk isi file model), sehingga gambar yang
+dikirim ulang tidak diproses lagi dan perubahan konfigurasi atau model
+otomatis tidak pernah memakai hasil lama.
+
+Dua tingkat:
+  * memori: LRU dengan batas jumlah entri dan total byte
+  * disk (opsional): SQLite, bertahan setelah restart
+
+Contoh:
+    cached = CachedClassifier(SpiceClassifier(), ResultCache(disk_path="cache.sqlite"))
+    result = cached.classify(image)           # miss -> pipeline
+    result = cached.classify(image)           # hit  -> tanpa pipeline
+    cached.cache.stats()
+"""
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields
+
+import numpy as np
+
+from engine import ClassificationResult, config_hash
+
+
+# stages disimpan terpisah; trace (waktu per tahap) hanya berlaku untuk run yang
+# mengukurnya, jadi hasil dari cache selalu tanpa trace
+_RESULT_FIELDS = [f.name for f in fields(ClassificationResult) if f.name not in ("stages", "trace")]
+
+
+def image_key(image, cfg_hash, decode_factor=1):
+    # decode_factor ikut key: citra sama dengan faktor berbeda berarti satuan hasil berbeda
+    h = hashlib.blake2b(digest_size=16)
+    meta = (image.shape, image.dtype.str) if decode_factor == 1 else (image.shape, image.dtype.str, decode_factor)
+    h.update(repr(meta).encode("ascii"))
+    h.update(np.ascontiguousarray(image).data)
+    return f"{cfg_hash}:{h.hexdigest()}"
+
+
+def _stages_nbytes(stages):
+    if not stages:
+        return 0
+    # Citra yang sama (mis. features & final) hanya dihitung sekali
+    return sum(img.nbytes for img in {id(img): img for img in stages.values() if img is not None}.values())
+
+
+def _pack_stages(stages):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **{k: v for k, v in stages.items() if v is not None})
+    return buf.getvalue()
+
+
+def _unpack_stages(blob):
+    with np.load(io.BytesIO(blob)) as data:
+        stages = {k: data[k] for k in data.files}
+    if "features" in stages and "final" in stages:
+        # Di pipeline keduanya adalah array yang sama
+        stages["final"] = stages["features"]
+    return stages
+
+
+class _Entry:
+    __slots__ = ("data", "stages", "nbytes")
+
+    def __init__(self, data, stages):
+        self.data = data
+        self.stages = stages
+        self.nbytes = len(json.dumps(data)) + _stages_nbytes(stages)
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, max_bytes=512 * 2 ** 20, disk_path=None, max_disk_entries=100_000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_entries = max_disk_entries
+        self._mem = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits_memory": 0, "hits_disk": 0, "misses": 0,
+                       "evictions_memory": 0, "evictions_disk": 0, "invalidated": 0}
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, config_hash TEXT NOT NULL, data TEXT NOT NULL,
+                stages BLOB, accessed REAL NOT NULL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_config ON results(config_hash)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed)")
+            self._db.commit()
+
+    # --- Memori ---
+    def _mem_put(self, key, entry):
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= old.nbytes
+        self._mem[key] = entry
+        self._mem_bytes += entry.nbytes
+        while self._mem and (len(self._mem) > self.max_entries or self._mem_bytes > self.max_bytes):
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= evicted.nbytes
+            self._stats["evictions_memory"] += 1
+
+    def get(self, key, need_stages=False):
+        """Kembalikan (data_hasil, stages) atau None jika miss."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and (entry.stages is not None or not need_stages):
+                self._mem.move_to_end(key)
+                self._stats["hits_memory"] += 1
+                return entry.data, entry.stages
+
+            if self._db is not None:
+                col = "stages" if need_stages else "NULL"
+                row = self._db.execute(f"SELECT data, {col} FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None and (row[1] is not None or not need_stages):
+                    self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    data = json.loads(row[0])
+                    stages = _unpack_stages(row[1]) if row[1] is not None else None
+                    self._mem_put(key, _Entry(data, stages))
+                    self._stats["hits_disk"] += 1
+                    return data, stages
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, data, stages=None):
+        cfg_hash = key.split(":", 1)[0]
+        with self._lock:
+            self._mem_put(key, _Entry(data, stages))
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                                 (key, cfg_hash, json.dumps(data),
+                                  _pack_stages(stages) if stages else None, time.time()))
+                self._evict_disk()
+                self._db.commit()
+
+    def _evict_disk(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute("DELETE FROM results WHERE key IN "
+                             "(SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,))
+            self._stats["evictions_disk"] += excess
+
+    def invalidate(self, keep_config=None, drop_config=None):
+        """Hapus entri dari konfigurasi lain (atau semua jika keep_config None).
+
+        ``drop_config`` hanya menghapus entri satu konfigurasi; dipakai saat
+        beberapa profil berbagi satu cache.
+        """
+        with self._lock:
+            if drop_config is not None:
+                stale = [k for k in self._mem if k.startswith(drop_config + ":")]
+            else:
+                stale = [k for k in self._mem if keep_config is None or not k.startswith(keep_config + ":")]
+            for k in stale:
+                self._mem_bytes -= self._mem.pop(k).nbytes
+            removed = len(stale)
+            if self._db is not None:
+                if drop_config is not None:
+                    cur = self._db.execute("DELETE FROM results WHERE config_hash = ?", (drop_config,))
+                elif keep_config is None:
+                    cur = self._db.execute("DELETE FROM results")
+                else:
+                    cur = self._db.execute("DELETE FROM results WHERE config_hash != ?", (keep_config,))
+                removed += cur.rowcount
+                self._db.commit()
+            self._stats["invalidated"] += removed
+            return removed
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._stats)
+            out.update(memory_entries=len(self._mem), memory_bytes=self._mem_bytes)
+            if self._db is not None:
+                out["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            lookups = out["hits_memory"] + out["hits_disk"] + out["misses"]
+            out["hit_rate"] = round((out["hits_memory"] + out["hits_disk"]) / lookups, 4) if lookups else 0.0
+            return out
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedClassifier:
+    """Pembungkus SpiceClassifier yang memakai ResultCache."""
+
+    def __init__(self, classifier, cache=None, shared=False):
+        self.cache = cache if cache is not None else ResultCache()
+        # shared=True: cache dipakai bersama classifier lain (mis. profil lain),
+        # jadi saat konfigurasi berubah hanya entri konfigurasi lama yang dibuang
+        self.shared = shared
+        self._config_hash = None
+        self._config = None
+        self.last_hit = False
+        self.classifier = classifier
+
+    @property
+    def classifier(self):
+        return self._classifier
+
+    @classifier.setter
+    def classifier(self, classifier):
+        # Konfigurasi berubah -> entri milik konfigurasi lama dibuang
+        self._classifier = classifier
+        self._config = classifier.config
+        new_hash = config_hash(self._config)
+        if self._config_hash is not None and new_hash != self._config_hash:
+            if self.shared:
+                self.cache.invalidate(drop_config=self._config_hash)
+            else:
+                self.cache.invalidate(keep_config=new_hash)
+        self._config_hash = new_hash
+
+    @property
+    def config(self):
+        return self._classifier.config
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        if self._classifier.config is not self._config:
+            # Classifier memuat ulang konfigurasi (mis. profiles.ProfiledClassifier)
+            self.classifier = self._classifier
+        key = image_key(image, self._config_hash, decode_factor)
+        hit = self.cache.get(key, need_stages=keep_stages)
+        self.last_hit = hit is not None
+        if hit is not None:
+            data, stages = hit
+            result = ClassificationResult(**{k: data[k] for k in _RESULT_FIELDS if k in data})
+            if keep_stages:
+                result.stages = dict(stages, original=image)
+            return result
+
+        result = self._classifier.classify(image, keep_stages=keep_stages, decode_factor=decode_factor)
+        data = {k: getattr(result, k) for k in _RESULT_FIELDS}
+        stages = None
+        if keep_stages and result.stages is not None:
+            # Citra asli tidak perlu disimpan: selalu tersedia dari pemanggil
+            stages = {k: v for k, v in result.stages.items() if k != "original"}
+        self.cache.put(key, data, stages)
+        return result
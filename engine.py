@@ -0,0 +1,987 @@
+"""Mesin klasifikasi bumbu dapur tanpa GUI (headless).
+
+Modul ini hanya bergantung pada OpenCV dan NumPy sehingga bisa dipakai oleh
+worker/proses batch tanpa PyQt5 maupun display server. GUI di ``app.py``
+hanyalah klien tipis dari modul ini.
+"""
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields, replace
+from functools import lru_cache
+import hashlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+# Nama tahap visualisasi (urutan sesuai panel GUI)
+STAGE_NAMES = (
+    "original",      # 1. Citra Asli
+    "blur",          # 2. Median Blur
+    "hsv_v",         # 3. Channel V dari HSV
+    "mask_red",      # 4. Mask Merah
+    "mask_green",    # 5. Mask Hijau
+    "mask_white",    # 6. Mask Putih
+    "global_mask",   # 7. Segmentasi Objek Utama
+    "features",      # 8. Box & Hull
+    "final",         # 9. Hasil Akhir
+)
+
+
+# Kelas keluaran decision tree
+CLASSES = ("BAWANG MERAH", "BAWANG PUTIH", "CABAI HIJAU", "CABAI MERAH")
+
+# Prefix nama file dataset -> kelas (mis. "cabe-merah-1.jpg")
+_FILENAME_LABELS = {
+    "bawang-merah": "BAWANG MERAH",
+    "bawang-putih": "BAWANG PUTIH",
+    "cabe-hijau": "CABAI HIJAU",
+    "cabai-hijau": "CABAI HIJAU",
+    "cabe-merah": "CABAI MERAH",
+    "cabai-merah": "CABAI MERAH",
+}
+
+
+def label_from_path(path):
+    """Ground truth dari nama file (atau nama folder induk); None jika tidak dikenali."""
+    for part in (os.path.basename(path), os.path.basename(os.path.dirname(path))):
+        name = part.lower().replace("_", "-").replace(" ", "-")
+        for prefix, label in _FILENAME_LABELS.items():
+            if name.startswith(prefix):
+                return label
+    return None
+
+
+# Bit label warna pada citra label (satu piksel bisa masuk >1 rentang HSV)
+LABEL_RED = 1
+LABEL_GREEN = 2
+LABEL_WHITE = 4
+
+# Morfologi per tile (lihat SpiceClassifier._morphology): ukuran tile (px),
+# fraksi tile campuran maksimum, dan ukuran citra minimum; di luar batas itu
+# satu pass frame penuh lebih cepat (diukur dengan python -m benchmark --segmentation)
+MORPH_TILE = 64
+MORPH_MAX_MIXED = 0.35
+MORPH_TILE_MIN_PIXELS = 2_000_000
+
+
+@dataclass
+class PipelineConfig:
+    # Pre-processing & morfologi
+    median_ksize: int = 5
+    morph_kernel: tuple = (5, 5)
+    close_iterations: int = 2
+    open_iterations: int = 1
+
+    # Logika background
+    bg_ratio: float = 0.90
+    min_fallback_area: float = 1000
+    # Jika True, frame yang piksel berlabelnya (sebelum morfologi) sudah
+    # > bg_ratio dianggap background tanpa morfologi & kontur utama; objek
+    # langsung dicari dari mask merah/hijau. Lebih cepat, tapi bisa berbeda
+    # dari jalur penuh pada frame di sekitar ambang.
+    early_background: bool = False
+
+    # Mode multi-objek: luas minimum komponen (px, resolusi asli)
+    min_object_area: float = 1000
+
+    # Resolusi kerja: sisi terpanjang citra diperkecil ke nilai ini sebelum
+    # diproses (0 = resolusi asli). Kernel & ambang luas diskalakan otomatis.
+    # Jika refine_full_res aktif, kontur utama dihitung ulang pada resolusi
+    # asli di dalam bounding box objek; ROI diperluas selama kontur menyentuh
+    # tepinya, sehingga hasilnya sama dengan resolusi penuh.
+    # Toleransi tanpa refine, diukur pada gambar dataset/ ukuran asli
+    # (348-1366 px) dengan working_long_side 256-1024 (tests/test_engine.py):
+    #   persentase warna +-2.5 poin, aspect ratio +-3%, solidity +-0.07,
+    #   circularity +-0.2
+    # Di luar kondisi itu TIDAK dijamin: objek yang bagian tipisnya hilang saat
+    # diperkecil bisa berbeda > 10 poin (bawang-putih-1 diperbesar ke 4098 px).
+    working_long_side: int = 0
+    refine_full_res: bool = False
+
+    # Rentang HSV (lower, upper)
+    red1: tuple = ((0, 40, 40), (15, 255, 255))
+    red2: tuple = ((155, 40, 40), (180, 255, 255))
+    green: tuple = ((35, 40, 40), (90, 255, 255))
+    white: tuple = ((0, 0, 140), (180, 40, 255))
+
+    # Ambang decision tree
+    green_pct: float = 10
+    red_pct: float = 40
+    aspect_ratio: float = 1.6
+    solidity: float = 0.8
+    circularity: float = 0.4
+
+    # Backend keputusan: kosong = aturan di atas (default), atau path file
+    # model hasil ``python -m models train`` (lihat models.py)
+    model_path: str = ""
+
+
+def config_hash(config):
+    """Hash pendek & stabil dari seluruh parameter PipelineConfig.
+
+    Jika ``model_path`` diisi, isi file model ikut di-hash: model yang dilatih
+    ulang di path yang sama menghasilkan hash (dan key cache) baru.
+    """
+    h = hashlib.sha1(json.dumps(asdict(config), sort_keys=True, default=list).encode("utf-8"))
+    if config.model_path:
+        # File .npz hanya beberapa KB; file yang tidak ada gagal saat load_model
+        try:
+            with open(config.model_path, "rb") as f:
+                h.update(hashlib.sha1(f.read()).digest())
+        except OSError:
+            pass
+    return h.hexdigest()[:16]
+
+
+def _as_tuple(value):
+    return tuple(_as_tuple(v) for v in value) if isinstance(value, list) else value
+
+
+def _shape_of(value):
+    return tuple(_shape_of(v) for v in value) if isinstance(value, tuple) else None
+
+
+def _flatten(value):
+    return [x for v in value for x in _flatten(v)] if isinstance(value, tuple) else [value]
+
+
+def _check_field(f, value):
+    # Skema bertipe: tipe anotasi PipelineConfig; tuple harus sebentuk default-nya
+    if f.type is bool:
+        ok = isinstance(value, bool)
+    elif f.type is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif f.type is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif f.type is tuple:
+        flat = _flatten(value) if _shape_of(value) == _shape_of(f.default) else None
+        ok = flat is not None and all(isinstance(v, int) and not isinstance(v, bool) for v in flat)
+    else:
+        ok = isinstance(value, f.type)
+    if not ok:
+        raise ValueError(f"Nilai {f.name}={value!r} tidak sesuai tipe {f.type.__name__} (default {f.default!r}).")
+
+
+def validate_config(config):
+    """Periksa batas nilai; ValueError jika tidak valid."""
+    if config.median_ksize < 1 or config.median_ksize % 2 == 0:
+        raise ValueError("median_ksize harus ganjil dan >= 1.")
+    if min(config.morph_kernel) < 1 or config.close_iterations < 0 or config.open_iterations < 0:
+        raise ValueError("morph_kernel harus >= 1 dan jumlah iterasi >= 0.")
+    if not 0 < config.bg_ratio <= 1:
+        raise ValueError("bg_ratio harus di antara 0 dan 1.")
+    for name in ("red1", "red2", "green", "white"):
+        lower, upper = getattr(config, name)
+        if any(lo > up for lo, up in zip(lower, upper)) or max(upper[1:]) > 255 or upper[0] > 180:
+            raise ValueError(f"Rentang HSV {name} tidak valid: {lower} - {upper}.")
+    return config
+
+
+def config_from_dict(data, base=None):
+    """PipelineConfig dari dict (JSON/TOML/YAML); field yang tidak ada diambil dari ``base``."""
+    by_name = {f.name: f for f in fields(PipelineConfig)}
+    unknown = set(data) - set(by_name)
+    if unknown:
+        raise ValueError(f"Parameter konfigurasi tidak dikenal: {', '.join(sorted(unknown))}")
+    # JSON/TOML/YAML tidak punya tuple; rentang HSV & kernel dikembalikan ke tuple
+    values = {k: _as_tuple(v) for k, v in data.items()}
+    for k, v in values.items():
+        _check_field(by_name[k], v)
+    return validate_config(replace(base if base is not None else PipelineConfig(), **values))
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        return config_from_dict(json.load(f))
+
+
+def save_config(config, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(asdict(config), f, indent=2)
+        f.write("\n")
+
+
+@dataclass
+class ClassificationResult:
+    prediction: str = "Tidak Dikenali"
+    dominant_color: str = "Unknown"
+    aspect_ratio: float = 0.0
+    solidity: float = 0.0
+    circularity: float = 0.0
+    # 7 Hu moments kontur, skala log: -sign(h) * log10|h|
+    hu_moments: tuple = ()
+    pct_red: float = 0.0
+    pct_green: float = 0.0
+    pct_white: float = 0.0
+    pixels_red: int = 0
+    pixels_green: int = 0
+    pixels_white: int = 0
+    logic_path: str = "Tidak ada data"
+    is_bg_detected: bool = False
+    detected: bool = False
+    # Cabang decision tree: green / red_elongated / red_round / white / none
+    branch: str = "none"
+    # Bounding box objek utama (x, y, w, h) pada resolusi asli
+    bbox: tuple = (0, 0, 0, 0)
+    # config_hash() dari PipelineConfig yang menghasilkan hasil ini
+    config_hash: str = ""
+    # Faktor pengecilan decode JPEG (ingest.decode); piksel, bbox & luas tetap satuan file asli
+    decode_factor: int = 1
+    # Citra per tahap, hanya terisi jika diminta (keep_stages=True)
+    stages: dict = field(default=None, repr=False)
+    # Data instrumentasi (lihat instrumentation.py), hanya jika diaktifkan
+    trace: dict = field(default=None, repr=False)
+
+    def to_report(self):
+        # Format sama dengan SpiceClassifierApp.analysis_report
+        return {
+            "prediction": self.prediction,
+            "dominant_color": self.dominant_color,
+            "aspect_ratio": f"{self.aspect_ratio:.2f}",
+            "solidity": f"{self.solidity:.2f}",
+            "circularity": f"{self.circularity:.2f}",
+            "metrics": {
+                "pct_red": f"{self.pct_red:.1f}",
+                "pct_green": f"{self.pct_green:.1f}",
+                "pct_white": f"{self.pct_white:.1f}"
+            },
+            "pixels": {"R": self.pixels_red, "G": self.pixels_green, "W": self.pixels_white},
+            "logic_path": self.logic_path,
+            "config_hash": self.config_hash,
+            "decode_factor": self.decode_factor
+        }
+
+
+@dataclass
+class ObjectResult(ClassificationResult):
+    # Satu objek pada mode multi-objek (koordinat resolusi asli)
+    area: float = 0.0
+    centroid: tuple = (0.0, 0.0)
+
+    def to_report(self):
+        report = super().to_report()
+        report.update(bbox=list(self.bbox), area=round(self.area, 1),
+                      centroid=[round(self.centroid[0], 1), round(self.centroid[1], 1)])
+        return report
+
+
+@dataclass
+class MultiObjectResult:
+    objects: list = field(default_factory=list)
+    counts: dict = field(default_factory=dict)      # kelas -> jumlah objek
+    is_bg_detected: bool = False
+    config_hash: str = ""
+    decode_factor: int = 1
+    stages: dict = field(default=None, repr=False)
+
+    def to_report(self):
+        return {
+            "objects": len(self.objects),
+            "counts": dict(self.counts),
+            "is_bg_detected": self.is_bg_detected,
+            "config_hash": self.config_hash,
+            "decode_factor": self.decode_factor,
+            "items": [obj.to_report() for obj in self.objects],
+        }
+
+
+def _as_range(r):
+    return tuple(tuple(int(x) for x in bound) for bound in r)
+
+
+# Jumlah nilai R per potongan saat membangun LUT (16 potongan x 2^20 warna):
+# buffer sementara ~10 MB, bukan ~250 MB jika 2^24 warna dikonversi sekaligus
+_LUT_CHUNK_R = 16
+
+
+@lru_cache(maxsize=4)
+def _build_color_lut(red1, red2, green, white):
+    # Semua 2^24 warna BGR dikonversi ke HSV per potongan (citra 256 x 65536);
+    # hasil inRange digabung menjadi bit label.
+    # Index LUT = B | G << 8 | R << 16 (urutan byte BGRA little-endian).
+    lut = np.empty(1 << 24, dtype=np.uint8)
+    chunk = _LUT_CHUNK_R << 16
+    idx = np.arange(chunk, dtype=np.uint32)
+    bgr = np.empty((chunk, 3), dtype=np.uint8)
+    bgr[:, 0] = idx & 0xFF
+    bgr[:, 1] = (idx >> 8) & 0xFF
+    del idx
+    ranges = [(r, LABEL_RED) for r in (red1, red2)] + [(green, LABEL_GREEN), (white, LABEL_WHITE)]
+    ranges = [(np.array(lower), np.array(upper), bit) for (lower, upper), bit in ranges]
+    mask = np.empty((_LUT_CHUNK_R * 256, 256), dtype=np.uint8)
+    for r0 in range(0, 256, _LUT_CHUNK_R):
+        bgr[:, 2] = np.repeat(np.arange(r0, r0 + _LUT_CHUNK_R, dtype=np.uint8), 1 << 16)
+        hsv = cv2.cvtColor(bgr.reshape(-1, 256, 3), cv2.COLOR_BGR2HSV)
+        out = lut[r0 << 16:(r0 + _LUT_CHUNK_R) << 16].reshape(mask.shape)
+        out[:] = 0
+        for lower, upper, bit in ranges:
+            out |= cv2.inRange(hsv, lower, upper, dst=mask) & bit
+    return lut
+
+
+def build_color_lut(config):
+    """LUT BGR -> bit label warna (16 MB), di-cache per kombinasi rentang HSV."""
+    return _build_color_lut(_as_range(config.red1), _as_range(config.red2),
+                            _as_range(config.green), _as_range(config.white))
+
+
+def label_colors(image, lut, out=None, bgra=None):
+    # Satu pass: BGR -> BGRA, baca tiap piksel sebagai uint32, lalu lookup
+    # (``out``/``bgra``: buffer opsional untuk dipakai ulang)
+    bgra = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA, dst=bgra)
+    idx = bgra.view(np.uint32).reshape(image.shape[:2])
+    idx &= 0xFFFFFF
+    return lut.take(idx, mode="clip", out=out)
+
+
+def mask_nonzero(image, dst=None):
+    # 255 pada piksel > 0. Bukan cv2.compare(image, 0, ...): skalar dibaca
+    # sebagai array 4 elemen dan gagal pada citra 1x1
+    return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY, dst=dst)[1]
+
+
+def mask_from_labels(labels, bit, dst=None):
+    return mask_nonzero(np.bitwise_and(labels, bit, out=dst), dst)
+
+
+class PipelineContext:
+    """Buffer kerja yang dipakai ulang antar panggilan (lewat ``dst=``/``out=``).
+
+    Buffer dikelompokkan per resolusi (tinggi, lebar); hanya ``max_shapes``
+    resolusi terakhir yang disimpan, jadi memori tetap terbatas walau ukuran
+    input berganti-ganti. Satu konteks tidak boleh dipakai dua thread sekaligus.
+    """
+
+    def __init__(self, max_shapes=2):
+        self.max_shapes = max_shapes
+        self.allocations = 0
+        self._groups = OrderedDict()
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        """Array ``shape``/``dtype`` milik konteks (isinya sisa panggilan sebelumnya)."""
+        key = tuple(shape[:2])
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = {}
+            while len(self._groups) > self.max_shapes:
+                self._groups.popitem(last=False)
+        else:
+            self._groups.move_to_end(key)
+        buf = group.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = group[name] = np.empty(shape, dtype)
+            self.allocations += 1
+        return buf
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for group in self._groups.values() for buf in group.values())
+
+    def clear(self):
+        self._groups.clear()
+
+
+def _buffer(ctx, name, shape, dtype=np.uint8):
+    # Buffer dari konteks, atau None (OpenCV/NumPy lalu mengalokasikan baru)
+    return ctx.buffer(name, shape, dtype) if ctx is not None else None
+
+
+def _box_sum(a, r):
+    # Jumlah tiap elemen beserta tetangganya dalam radius r (di luar batas = 0)
+    c = np.pad(a, r + 1)[:-1, :-1].cumsum(0).cumsum(1)  # pad depan r+1 (baris/kolom 0 = nol), belakang r
+    n = 2 * r + 1
+    return c[n:, n:] - c[:-n, n:] - c[n:, :-n] + c[:-n, :-n]
+
+
+def largest_contour(contours):
+    """(kontur, luas) dengan ``contourArea`` terbesar, atau (None, 0); luas tiap kontur dihitung sekali."""
+    if not contours:
+        return None, 0.0
+    areas = [cv2.contourArea(c) for c in contours]
+    i = int(np.argmax(areas))
+    return contours[i], areas[i]
+
+
+# Matriks 8x3: bin label -> (merah, hijau, putih)
+_LABEL_BITS = np.array([[(i & bit) != 0 for bit in (LABEL_RED, LABEL_GREEN, LABEL_WHITE)]
+                        for i in range(8)], dtype=np.int64)
+
+
+def count_labels(labels, mask=None):
+    # Histogram 8 bin dari citra label -> jumlah piksel (merah, hijau, putih)
+    hist = cv2.calcHist([labels], [0], mask, [8], [0, 8]).ravel()
+    bins = np.arange(8)
+    return tuple(int(hist[(bins & bit) != 0].sum()) for bit in (LABEL_RED, LABEL_GREEN, LABEL_WHITE))
+
+
+def _decoded_geometry(contour, decode_factor):
+    # Kontur satuan file asli -> (kontur, rect, hull) pada citra hasil decode, untuk digambar
+    contour = np.int32(np.round(contour / decode_factor))
+    return contour, cv2.minAreaRect(contour), cv2.convexHull(contour)
+
+
+class SpiceClassifier:
+    def __init__(self, config=None, on_stage=None, instrumentation=None, on_stage_image=None, model=None,
+                 context=None):
+        self.config = config if config is not None else PipelineConfig()
+        self.config_hash = config_hash(self.config)
+        self.lut = build_color_lut(self.config)
+        # Backend keputusan opsional (objek dengan method decide(result)); tanpa
+        # model, decision tree berbasis ambang config yang dipakai
+        if model is None and self.config.model_path:
+            from models import load_model
+            model = load_model(self.config.model_path)
+        self.model = model
+        # Buffer kerja yang dipakai ulang antar panggilan tanpa keep_stages
+        # (citra tahap yang disimpan di hasil selalu dialokasikan baru)
+        self.context = context if context is not None else PipelineContext()
+        self._scaled = {}
+        # Callback opsional on_stage(nama_tahap, detik) untuk profiling dan
+        # objek instrumentasi (lihat instrumentation.py)
+        self.on_stage = on_stage
+        self.instrumentation = instrumentation
+        # Callback opsional on_stage_image(nama, citra) begitu citra tahap
+        # (keep_stages=True) selesai, mis. untuk menampilkan hasil bertahap
+        self.on_stage_image = on_stage_image
+        self._trace = None
+
+    @property
+    def _timed(self):
+        return self.on_stage is not None or self._trace is not None
+
+    def _start(self):
+        return time.perf_counter() if self._timed else 0.0
+
+    def _lap(self, name, t0):
+        # Tanpa callback/instrumentasi, timing dilewati sama sekali
+        if not self._timed: return 0.0
+        now = time.perf_counter()
+        seconds = now - t0
+        if self.on_stage is not None:
+            self.on_stage(name, seconds)
+        if self._trace is not None:
+            stages = self._trace["stages"]
+            stages[name] = stages.get(name, 0.0) + seconds
+            self.instrumentation.on_stage(name, seconds)
+        return now
+
+    def _emit_stages(self, stages, names):
+        if self.on_stage_image is not None:
+            for name in names:
+                self.on_stage_image(name, stages[name])
+
+    def _params(self, scale):
+        # Parameter yang bergantung resolusi: (median ksize, kernel, luas minimum)
+        params = self._scaled.get(scale)
+        if params is None:
+            cfg = self.config
+            ksize = int(round(cfg.median_ksize * scale)) | 1
+            kw, kh = cfg.morph_kernel
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (max(1, int(round(kw * scale))),
+                                                                   max(1, int(round(kh * scale)))))
+            params = self._scaled[scale] = (ksize, kernel, cfg.min_fallback_area * scale * scale)
+        return params
+
+    def _working_scale(self, shape):
+        # Skala citra -> resolusi kerja (1.0 jika tidak perlu diperkecil)
+        long_side = self.config.working_long_side
+        if not long_side or max(shape[:2]) <= long_side:
+            return 1.0
+        return long_side / max(shape[:2])
+
+    def _to_working(self, image, ctx=None):
+        # Perkecil ke resolusi kerja jika diminta; kembalikan (citra, skala)
+        scale = self._working_scale(image.shape)
+        if scale == 1.0:
+            return image, 1.0
+        t = self._start()
+        h_full, w_full = image.shape[:2]
+        w, h = max(1, int(round(w_full * scale))), max(1, int(round(h_full * scale)))
+        work = cv2.resize(image, (w, h), dst=_buffer(ctx, "work", (h, w) + image.shape[2:]),
+                          interpolation=cv2.INTER_AREA)
+        self._lap("resize", t)
+        if self._trace is not None:
+            self._trace["work_height"], self._trace["work_width"] = work.shape[:2]
+        return work, scale
+
+    def _segment(self, image, ksize, kernel, timed=True, early_background=False, ctx=None):
+        # ctx: PipelineContext opsional; hasil lalu menunjuk ke buffer konteks
+        # dan hanya valid sampai pemanggilan berikutnya
+        t = self._start() if timed else 0.0
+        h, w = image.shape[:2]
+        # 1. Pre-processing (Median Blur); ksize 1 berarti tanpa blur
+        img_blur = cv2.medianBlur(image, ksize, dst=_buffer(ctx, "blur", image.shape)) if ksize > 1 else image
+        if timed: t = self._lap("blur", t)
+
+        # 2-3. Masking Warna: satu pass lewat LUT BGR -> label (tanpa konversi HSV)
+        labels = label_colors(img_blur, self.lut, _buffer(ctx, "labels", (h, w)), _buffer(ctx, "bgra", (h, w, 4)))
+        if timed: t = self._lap("labels", t)
+
+        # 4. Global Masking
+        combined_mask = mask_nonzero(labels, _buffer(ctx, "mask", (h, w)))
+        if early_background and cv2.countNonZero(combined_mask) > self.config.bg_ratio * combined_mask.size:
+            # Frame background: morfologi dilewati (lihat PipelineConfig.early_background)
+            combined_mask = None
+        else:
+            combined_mask = self._morphology(combined_mask, kernel, _buffer(ctx, "morph", (h, w)))
+        if timed: self._lap("morphology", t)
+        return img_blur, labels, combined_mask
+
+    def _morphology_full(self, mask, kernel, out=None):
+        cfg = self.config
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, dst=out, iterations=cfg.close_iterations)
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, dst=out, iterations=cfg.open_iterations)
+
+    def _morphology(self, mask, kernel, out=None):
+        """Close lalu open, hanya pada tile yang isinya tidak seragam.
+
+        Piksel keluaran hanya bergantung pada input dalam radius ``reach``.
+        Tile yang lingkungannya seragam (semua 0 atau semua 255) pasti
+        menghasilkan nilai yang sama, jadi cukup disalin. Tile campuran yang
+        bersebelahan dalam satu baris diproses sebagai satu blok; hasilnya
+        identik dengan morfologi satu frame penuh. ``out`` (opsional, bukan
+        ``mask``) menampung hasil.
+        """
+        cfg = self.config
+        h, w = mask.shape[:2]
+        if h * w < MORPH_TILE_MIN_PIXELS:
+            return self._morphology_full(mask, kernel, out)
+        reach = 2 * (cfg.close_iterations + cfg.open_iterations) * (max(kernel.shape) // 2)
+        tile = MORPH_TILE
+        ys, xs = np.arange(0, h, tile), np.arange(0, w, tile)
+        # Jumlah piksel (x255) per tile: reduce per pita baris lalu per kolom tile
+        sums = np.stack([np.add.reduceat(cv2.reduce(mask[y:y + tile], 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S)[0], xs)
+                         for y in ys]).astype(np.int64)
+        areas = 255 * np.minimum(tile, h - ys)[:, None] * np.minimum(tile, w - xs)[None, :]
+        # Lingkungan tile = tile tetangga dalam radius reach (dibulatkan ke atas per tile)
+        r = -(-reach // tile)
+        sums, areas = _box_sum(sums, r), _box_sum(areas, r)
+        mixed = (sums > 0) & (sums < areas)
+        if mixed.mean() > MORPH_MAX_MIXED:
+            return self._morphology_full(mask, kernel, out)
+
+        # Tile seragam sudah bernilai benar; hanya tile campuran yang ditimpa
+        if out is None:
+            out = mask.copy()
+        else:
+            np.copyto(out, mask)
+        for i, row in enumerate(mixed):
+            cols = np.flatnonzero(row)
+            if cols.size == 0:
+                continue
+            # Kelompokkan tile campuran yang berurutan menjadi satu blok (+ margin reach)
+            breaks = np.flatnonzero(np.diff(cols) > 1)
+            by0, by1 = max(0, ys[i] - reach), min(h, ys[i] + tile + reach)
+            for first, last in zip(np.r_[cols[0], cols[breaks + 1]], np.r_[cols[breaks], cols[-1]]):
+                bx0, bx1 = max(0, xs[first] - reach), min(w, xs[last] + tile + reach)
+                block = self._morphology_full(mask[by0:by1, bx0:bx1], kernel)
+                ty, tx = ys[i] - by0, xs[first] - bx0
+                th, tw = min(tile, h - ys[i]), min(xs[last] + tile, w) - xs[first]
+                out[ys[i]:ys[i] + th, xs[first]:xs[first] + tw] = block[ty:ty + th, tx:tx + tw]
+        return out
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        """Klasifikasi satu citra BGR.
+
+        Jika ``keep_stages`` bernilai True, citra tiap tahap disimpan di
+        ``result.stages`` (key sesuai ``STAGE_NAMES``); jika tidak, tidak ada
+        citra visualisasi yang dialokasikan dan buffer kerja dipakai ulang
+        dari ``self.context``. Dengan ``working_long_side``, citra tahap 2-7
+        berada pada resolusi kerja.
+
+        ``decode_factor``: citra sudah diperkecil 1/faktor saat decode
+        (``ingest.decode``). Ukuran kernel, ambang luas, jumlah piksel, bbox
+        dan luas tetap dihitung dalam satuan piksel file asli.
+        """
+        if self.instrumentation is None:
+            return self._classify(image, keep_stages, decode_factor)
+
+        h, w = image.shape[:2]
+        trace = self._trace = {
+            "width": w, "height": h, "work_width": w, "work_height": h,
+            "stages": {}, "contours": 0, "fallback_contours": None,
+        }
+        t0 = time.perf_counter()
+        try:
+            result = self._classify(image, keep_stages, decode_factor)
+        finally:
+            self._trace = None
+        trace["total"] = time.perf_counter() - t0
+        trace.update(is_bg_detected=result.is_bg_detected, branch=result.branch,
+                     prediction=result.prediction, detected=result.detected)
+        result.trace = trace
+        self.instrumentation.on_frame(trace)
+        return result
+
+    def _classify(self, image, keep_stages, decode_factor=1):
+        cfg = self.config
+        result = ClassificationResult(config_hash=self.config_hash, decode_factor=decode_factor)
+        stages = {"original": image} if keep_stages else None
+        # Citra tahap yang disimpan di hasil tidak boleh menunjuk ke buffer bersama
+        ctx = None if keep_stages else self.context
+
+        # scale: file asli -> resolusi kerja (termasuk pengecilan saat decode)
+        work, scale = self._to_working(image, ctx)
+        scale /= decode_factor
+        ksize, kernel, min_area = self._params(scale)
+
+        img_blur, labels, combined_mask = self._segment(work, ksize, kernel, early_background=cfg.early_background,
+                                                        ctx=ctx)
+        t = self._start()
+        if keep_stages:
+            # Channel V pada HSV OpenCV = max(B, G, R)
+            b, g, r = cv2.split(img_blur)
+            stages["blur"] = img_blur
+            stages["hsv_v"] = cv2.max(cv2.max(b, g), r)
+            stages["mask_red"] = mask_from_labels(labels, LABEL_RED)
+            stages["mask_green"] = mask_from_labels(labels, LABEL_GREEN)
+            stages["mask_white"] = mask_from_labels(labels, LABEL_WHITE)
+            # Pada frame early_background mask global hanya dihitung untuk ditampilkan
+            stages["global_mask"] = combined_mask if combined_mask is not None else \
+                self._morphology(mask_nonzero(labels), kernel)
+            result.stages = stages
+            t = self._lap("stage_images", t)
+            self._emit_stages(stages, STAGE_NAMES[1:7])
+
+        main = self._main_contour(labels, combined_mask, min_area, kernel, ctx)
+        if main is None:
+            result.logic_path = "Tidak ada objek terdeteksi."
+            self._lap("contours", t)
+            return result
+        result.detected = True
+        c_main, area_main, is_bg_detected, fallback_bit = main
+        result.is_bg_detected = is_bg_detected
+        t = self._lap("contours", t)
+
+        if scale < 1 and cfg.refine_full_res and decode_factor == 1:
+            # Hitung ulang kontur pada resolusi asli, hanya di dalam bounding box
+            c_main, labels, mask_object_only, (x0, y0) = self._refine(image, c_main, scale, is_bg_detected, fallback_bit)
+            area_main = cv2.contourArea(c_main)
+            pixels = count_labels(labels, mask_object_only)
+            c_main = c_main + np.array([x0, y0], dtype=c_main.dtype)
+            t = self._lap("refine", t)
+        else:
+            # 6. Hitung Pixel dalam Mask Objek (cukup di dalam bounding box kontur)
+            x, y, w, h = cv2.boundingRect(c_main)
+            mask_object_only = np.zeros((h, w), dtype=np.uint8)
+            cv2.drawContours(mask_object_only, [c_main], -1, 255, -1, offset=(-x, -y))
+            pixels = count_labels(labels[y:y + h, x:x + w], mask_object_only)
+            if scale < 1:
+                # Kembalikan ke satuan piksel & koordinat resolusi asli
+                pixels = tuple(int(round(p / (scale * scale))) for p in pixels)
+                c_main = np.int32(np.round(c_main / scale))
+                area_main = cv2.contourArea(c_main)
+
+        pixels_red, pixels_green, pixels_white = pixels
+        if is_bg_detected: pixels_white = 0
+        self._set_color_metrics(result, pixels_red, pixels_green, pixels_white)
+
+        # 7. Shape Features & Klasifikasi
+        result.bbox = cv2.boundingRect(c_main)
+        rect = cv2.minAreaRect(c_main)
+        hull = cv2.convexHull(c_main)
+        self._set_shape_features(result, c_main, area_main, rect, hull)
+        t = self._lap("features", t)
+        self._decide(result)
+        t = self._lap("decision", t)
+
+        # Visualisasi Fitur (Box & Hull) + Hasil Akhir
+        if keep_stages:
+            if decode_factor != 1:
+                c_main, rect, hull = _decoded_geometry(c_main, decode_factor)
+            final_img = self.draw_result(image, result, c_main, rect, hull)
+            stages["features"] = final_img
+            stages["final"] = final_img
+            self._lap("render", t)
+            self._emit_stages(stages, ("features", "final"))
+
+        return result
+
+    def classify_objects(self, image, keep_stages=False, decode_factor=1):
+        """Klasifikasi SEMUA objek (komponen terhubung) di atas ``min_object_area``.
+
+        Jumlah piksel warna per objek dihitung sekaligus untuk semua komponen
+        (satu ``bincount`` atas indeks komponen*8 + label); fitur bentuk
+        dihitung per objek hanya di dalam bounding box masing-masing.
+        ``decode_factor`` sama seperti pada ``classify``.
+        """
+        cfg = self.config
+        result = MultiObjectResult(counts={c: 0 for c in CLASSES}, config_hash=self.config_hash,
+                                   decode_factor=decode_factor)
+        ctx = None if keep_stages else self.context
+        work, scale = self._to_working(image, ctx)
+        scale /= decode_factor
+        ksize, kernel, _ = self._params(scale)
+        min_area = cfg.min_object_area * scale * scale
+
+        img_blur, labels, combined_mask = self._segment(work, ksize, kernel, ctx=ctx)
+        t = self._start()
+        h_img, w_img = work.shape[:2]
+        cc = _buffer(ctx, "components", (h_img, w_img), np.int32)
+        n, cc, stats, centroids = cv2.connectedComponentsWithStats(combined_mask, labels=cc, connectivity=8)
+        if n > 1 and stats[1:, cv2.CC_STAT_AREA].max() > cfg.bg_ratio * (h_img * w_img):
+            # Background ikut tersegmentasi: komponen dicari ulang dari mask merah/hijau
+            result.is_bg_detected = True
+            combined_mask = mask_from_labels(labels, LABEL_RED | LABEL_GREEN, _buffer(ctx, "fallback", (h_img, w_img)))
+            n, cc, stats, centroids = cv2.connectedComponentsWithStats(combined_mask, labels=cc, connectivity=8)
+        keep = np.flatnonzero(stats[:, cv2.CC_STAT_AREA] >= min_area)
+        keep = keep[keep > 0]
+        if self._trace is not None:
+            self._trace["contours"] = int(keep.size)
+        t = self._lap("components", t)
+
+        # Histogram label warna per komponen dalam satu pass
+        index = np.multiply(cc, 8, out=_buffer(ctx, "index", (h_img, w_img), np.int32))
+        index += labels
+        hist = np.bincount(index.ravel(), minlength=n * 8).reshape(n, 8)
+        pixels = hist[keep] @ _LABEL_BITS
+        if result.is_bg_detected:
+            pixels[:, 2] = 0
+        if scale < 1:
+            pixels = np.rint(pixels / (scale * scale)).astype(np.int64)
+        t = self._lap("colors", t)
+
+        drawn = []
+        for row, lbl in enumerate(keep):
+            x, y, w, h = (int(v) for v in stats[lbl, :4])
+            mask = np.equal(cc[y:y + h, x:x + w], lbl).view(np.uint8)
+            cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x, y))
+            contour = max(cnts, key=cv2.contourArea)
+            if scale < 1:
+                contour = np.int32(np.round(contour / scale))
+
+            cx, cy = centroids[lbl]
+            obj = ObjectResult(detected=True, is_bg_detected=result.is_bg_detected, config_hash=self.config_hash,
+                               decode_factor=decode_factor,
+                               bbox=cv2.boundingRect(contour), area=float(stats[lbl, cv2.CC_STAT_AREA]) / (scale * scale),
+                               centroid=(float(cx) / scale, float(cy) / scale))
+            self._set_color_metrics(obj, *pixels[row])
+            rect = cv2.minAreaRect(contour)
+            hull = cv2.convexHull(contour)
+            self._set_shape_features(obj, contour, cv2.contourArea(contour), rect, hull)
+            self._decide(obj)
+            result.objects.append(obj)
+            result.counts[obj.prediction] = result.counts.get(obj.prediction, 0) + 1
+            if keep_stages:
+                if decode_factor != 1:
+                    contour, rect, hull = _decoded_geometry(contour, decode_factor)
+                drawn.append((obj, contour, rect, hull))
+        t = self._lap("features", t)
+
+        if keep_stages:
+            b, g, r = cv2.split(img_blur)
+            final_img = image.copy()
+            for obj, contour, rect, hull in drawn:
+                self.draw_object(final_img, obj, contour, rect, hull)
+            result.stages = {
+                "original": image, "blur": img_blur, "hsv_v": cv2.max(cv2.max(b, g), r),
+                "mask_red": mask_from_labels(labels, LABEL_RED),
+                "mask_green": mask_from_labels(labels, LABEL_GREEN),
+                "mask_white": mask_from_labels(labels, LABEL_WHITE),
+                "global_mask": combined_mask, "features": final_img, "final": final_img,
+            }
+            self._lap("render", t)
+        return result
+
+    def object_mask(self, image, decode_factor=1):
+        """Segmentasi & objek utama seperti ``classify``, tanpa fitur dan keputusan.
+
+        Mengembalikan ``(blur, labels, mask)`` pada resolusi kerja: citra
+        setelah median blur, citra label warna (bit ``LABEL_*``) dan mask 255
+        objek utama; None jika tidak ada objek terdeteksi. Ketiganya array
+        baru (bukan buffer ``self.context``). Dipakai ``tune`` untuk histogram
+        HSV piksel objek.
+        """
+        work, scale = self._to_working(image)
+        ksize, kernel, min_area = self._params(scale / decode_factor)
+        img_blur, labels, combined_mask = self._segment(work, ksize, kernel, timed=False,
+                                                        early_background=self.config.early_background)
+        main = self._main_contour(labels, combined_mask, min_area, kernel)
+        if main is None:
+            return None
+        mask = np.zeros_like(labels)
+        cv2.drawContours(mask, [main[0]], -1, 255, -1)
+        return img_blur, labels, mask
+
+    def _refine(self, image, contour, scale, is_bg_detected, fallback_bit):
+        h_full, w_full = image.shape[:2]
+        ksize, kernel, _ = self._params(1.0)
+        # Jangkauan blur & morfologi; margin ditambah galat kuantisasi downscale
+        reach = 2 * max(ksize, *kernel.shape) * (self.config.close_iterations + 1)
+        margin = int(np.ceil(1 / scale)) + reach
+        x, y, w, h = cv2.boundingRect(contour)
+        x0 = max(0, int(x / scale) - margin)
+        y0 = max(0, int(y / scale) - margin)
+        x1 = min(w_full, int((x + w) / scale) + margin)
+        y1 = min(h_full, int((y + h) / scale) + margin)
+
+        while True:
+            _, labels, mask = self._segment(image[y0:y1, x0:x1], ksize, kernel, timed=False)
+            if is_bg_detected and fallback_bit:
+                # Objek hasil fallback berasal dari mask warna mentah (tanpa morfologi)
+                mask = mask_from_labels(labels, fallback_bit)
+
+            c_roi, _ = largest_contour(cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+            if c_roi is None:
+                c_roi = np.int32(np.round(contour / scale)) - np.array([x0, y0], dtype=np.int32)
+                break
+            # Objek pada resolusi asli bisa melewati ROI (mis. bagian tipis yang
+            # hilang saat downscale): perluas sisi ROI yang tersentuh kontur
+            cx, cy, cw, ch = cv2.boundingRect(c_roi)
+            grow_w, grow_h = max(margin, x1 - x0), max(margin, y1 - y0)
+            nx0 = max(0, x0 - grow_w) if x0 > 0 and cx < reach else x0
+            ny0 = max(0, y0 - grow_h) if y0 > 0 and cy < reach else y0
+            nx1 = min(w_full, x1 + grow_w) if x1 < w_full and cx + cw > x1 - x0 - reach else x1
+            ny1 = min(h_full, y1 + grow_h) if y1 < h_full and cy + ch > y1 - y0 - reach else y1
+            if (nx0, ny0, nx1, ny1) == (x0, y0, x1, y1):
+                break
+            x0, y0, x1, y1 = nx0, ny0, nx1, ny1
+
+        mask_object_only = np.zeros_like(mask)
+        cv2.drawContours(mask_object_only, [c_roi], -1, 255, -1)
+        return c_roi, labels, mask_object_only, (x0, y0)
+
+    def _main_contour(self, labels, combined_mask, min_area, kernel=None, ctx=None):
+        """(kontur, luas, is_bg_detected, bit_fallback) objek utama, atau None.
+
+        ``combined_mask`` None berarti frame sudah dianggap background oleh
+        ``_segment`` (early_background); mask global baru dihitung (butuh
+        ``kernel``) jika fallback merah/hijau tidak menemukan objek.
+        """
+        if combined_mask is None:
+            new_c, area, fallback_bit = self._fallback_contour(labels, min_area, ctx)
+            if new_c is not None:
+                return new_c, area, True, fallback_bit
+            combined_mask = self._morphology(mask_nonzero(labels, _buffer(ctx, "mask", labels.shape)),
+                                             kernel, _buffer(ctx, "morph", labels.shape))
+
+        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if self._trace is not None:
+            self._trace["contours"] = len(contours)
+        if not contours:
+            return None
+
+        # 5. Cek Objek Utama vs Background
+        c_main, area_main = largest_contour(contours)
+        h_img, w_img = combined_mask.shape[:2]
+
+        is_bg_detected = False
+        fallback_bit = 0
+        if area_main > self.config.bg_ratio * (h_img * w_img):
+            is_bg_detected = True
+            new_c, area, fallback_bit = self._fallback_contour(labels, min_area, ctx)
+            if new_c is not None:
+                c_main, area_main = new_c, area
+        return c_main, area_main, is_bg_detected, fallback_bit
+
+    def _fallback_contour(self, labels, min_area, ctx=None):
+        # Background ikut tersegmentasi: cari ulang objek dari mask merah/hijau
+        # (keduanya diturunkan dari citra label yang sama; findContours tidak
+        # mengubah input, jadi satu buffer cukup untuk kedua mask)
+        dst = _buffer(ctx, "fallback", labels.shape)
+        cnts_red, _ = cv2.findContours(mask_from_labels(labels, LABEL_RED, dst), cv2.RETR_EXTERNAL,
+                                       cv2.CHAIN_APPROX_SIMPLE)
+        cnts_green, _ = cv2.findContours(mask_from_labels(labels, LABEL_GREEN, dst), cv2.RETR_EXTERNAL,
+                                         cv2.CHAIN_APPROX_SIMPLE)
+        if self._trace is not None:
+            self._trace["fallback_contours"] = {"red": len(cnts_red), "green": len(cnts_green)}
+
+        c_r, area_r = largest_contour(cnts_red)
+        c_g, area_g = largest_contour(cnts_green)
+
+        new_c, area, bit = None, 0.0, 0
+        if c_r is not None and area_r > min_area:
+            new_c, area, bit = c_r, area_r, LABEL_RED
+        if c_g is not None and area_g > area and area_g > min_area:
+            new_c, area, bit = c_g, area_g, LABEL_GREEN
+        return new_c, area, bit
+
+    @staticmethod
+    def _set_color_metrics(result, pixels_red, pixels_green, pixels_white):
+        total_pixels = pixels_red + pixels_green + pixels_white
+        if total_pixels == 0: total_pixels = 1
+
+        result.pixels_red = int(pixels_red)
+        result.pixels_green = int(pixels_green)
+        result.pixels_white = int(pixels_white)
+        result.pct_red = (pixels_red / total_pixels) * 100
+        result.pct_green = (pixels_green / total_pixels) * 100
+        result.pct_white = (pixels_white / total_pixels) * 100
+
+    @staticmethod
+    def _set_shape_features(result, contour, area, rect, hull):
+        (cx, cy), (w, h), angle = rect
+        result.aspect_ratio = max(w, h) / min(w, h) if min(w, h) > 0 else 0
+
+        hull_area = cv2.contourArea(hull)
+        result.solidity = area / hull_area if hull_area > 0 else 0
+
+        perimeter = cv2.arcLength(contour, True)
+        if perimeter == 0: perimeter = 1
+        result.circularity = (4 * np.pi * area) / (perimeter ** 2)
+
+        hu = cv2.HuMoments(cv2.moments(contour)).ravel()
+        result.hu_moments = tuple(float(v) for v in -np.sign(hu) * np.log10(np.abs(hu) + 1e-30))
+
+    def _decide(self, result):
+        if self.model is not None:
+            self.model.decide(result)
+            return
+
+        # --- DECISION TREE LOGIC ---
+        cfg = self.config
+        if result.pct_green > cfg.green_pct:
+            result.prediction = "CABAI HIJAU"
+            result.dominant_color = "Hijau"
+            result.branch = "green"
+            result.logic_path = f"Terdeteksi piksel HIJAU signifikan (>{cfg.green_pct:g}%)."
+
+        elif result.pct_red > cfg.red_pct:
+            result.dominant_color = "Merah/Ungu"
+            # Cek Bentuk
+            if (result.aspect_ratio > cfg.aspect_ratio or result.solidity < cfg.solidity
+                    or result.circularity < cfg.circularity):
+                result.prediction = "CABAI MERAH"
+                result.branch = "red_elongated"
+                result.logic_path = (f"Warna MERAH dominan (>{cfg.red_pct:g}%). Bentuk MEMANJANG (Ratio > {cfg.aspect_ratio:g}) "
+                                     f"atau MELENGKUNG (Solidity < {cfg.solidity:g} / Circularity < {cfg.circularity:g}).")
+            else:
+                result.prediction = "BAWANG MERAH"
+                result.branch = "red_round"
+                result.logic_path = (f"Warna MERAH dominan (>{cfg.red_pct:g}%). Bentuk BULAT/PADAT "
+                                     f"(Ratio <= {cfg.aspect_ratio:g}, Solidity >= {cfg.solidity:g}).")
+
+        else:
+            result.prediction = "BAWANG PUTIH"
+            result.dominant_color = "Putih"
+            result.branch = "white"
+            result.logic_path = (f"Minim warna Merah/Hijau (hijau <= {cfg.green_pct:g}%, merah <= {cfg.red_pct:g}%). "
+                                 "Didominasi warna PUTIH.")
+
+    @staticmethod
+    def draw_result(image, result, contour, rect, hull):
+        final_img = image.copy()
+        box = np.int32(cv2.boxPoints(rect))
+        cv2.drawContours(final_img, [box], 0, (255, 0, 0), 2) # Box Biru
+        cv2.drawContours(final_img, [hull], 0, (0, 255, 255), 1) # Hull Kuning
+        if not result.is_bg_detected:
+            cv2.drawContours(final_img, [contour], -1, (0, 255, 0), 2)
+        cv2.putText(final_img, result.prediction, (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+        return final_img
+
+
+    @staticmethod
+    def draw_object(img, obj, contour, rect, hull):
+        cv2.drawContours(img, [np.int32(cv2.boxPoints(rect))], 0, (255, 0, 0), 2) # Box Biru
+        cv2.drawContours(img, [hull], 0, (0, 255, 255), 1) # Hull Kuning
+        if not obj.is_bg_detected:
+            cv2.drawContours(img, [contour], -1, (0, 255, 0), 2)
+        x, y = cv2.boundingRect(contour)[:2]
+        cv2.putText(img, obj.prediction, (x, max(20, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+
+def classify_image(image, config=None, keep_stages=False):
+    return SpiceClassifier(config).classify(image, keep_stages=keep_stages)
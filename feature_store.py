@@ -0,0 +1,344 @@
+"""Penyimpanan fitur per gambar dalam format kolom (memmap), inkremental.
+
+Pipeline dijalankan SEKALI per gambar; hasil fiturnya ditambahkan ke file
+biner per kolom (``<kolom>.bin``, dtype tetap). Pembacaan memakai
+``np.memmap`` sehingga tidak ada salinan: sweep ambang atau pelatihan model
+atas jutaan baris cukup membaca kolom yang dibutuhkan.
+
+Struktur direktori store:
+    manifest.sqlite   path -> (mtime, ukuran, baris), jumlah baris, hash konfigurasi
+    <kolom>.bin       satu file per kolom (lihat ``COLUMNS``)
+
+Hanya gambar baru atau yang berubah (mtime/ukuran) yang diproses ulang. Baris
+lama milik gambar yang berubah ditandai ``valid = 0``.
+
+Contoh:
+    python -m feature_store extract dataset/ --store fitur/
+    python -m feature_store info --store fitur/
+
+    store = FeatureStore("fitur/")
+    red = store.column("pct_red")                 # np.memmap, tanpa salinan
+    X, y = store.matrix(["pct_red", "pct_green"])  # hanya baris valid & terdeteksi
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, replace
+
+import cv2
+import numpy as np
+
+from batch import iter_images
+from engine import CLASSES, PipelineConfig, SpiceClassifier, config_hash, label_from_path
+from ingest import load_image, working_target
+
+
+COLUMNS = {
+    "pixels_red": np.int32, "pixels_green": np.int32, "pixels_white": np.int32,
+    "pct_red": np.float32, "pct_green": np.float32, "pct_white": np.float32,
+    "aspect_ratio": np.float32, "solidity": np.float32, "circularity": np.float32,
+    **{f"hu{i}": np.float32 for i in range(1, 8)},
+    "bbox_x": np.int32, "bbox_y": np.int32, "bbox_w": np.int32, "bbox_h": np.int32,
+    "is_bg_detected": np.uint8, "detected": np.uint8,
+    "decode_factor": np.uint8,  # pengecilan decode JPEG; fitur tetap satuan file asli (0: store lama)
+    "label": np.int8,          # index CLASSES, -1 jika tidak diketahui dari path
+    "valid": np.uint8,         # 0 jika gambar sudah berubah & punya baris baru
+}
+
+# Ambang keputusan tidak memengaruhi fitur, jadi tidak ikut hash store
+_DECISION_FIELDS = ("green_pct", "red_pct", "aspect_ratio", "solidity", "circularity", "model_path")
+
+FLUSH_ROWS = 1024
+
+
+def feature_config_hash(config):
+    defaults = PipelineConfig()
+    return config_hash(replace(config, **{f: getattr(defaults, f) for f in _DECISION_FIELDS}))
+
+
+def result_row(result, label):
+    x, y, w, h = result.bbox
+    hu = result.hu_moments or (0.0,) * 7
+    row = {
+        "pixels_red": result.pixels_red, "pixels_green": result.pixels_green, "pixels_white": result.pixels_white,
+        "pct_red": result.pct_red, "pct_green": result.pct_green, "pct_white": result.pct_white,
+        "aspect_ratio": result.aspect_ratio, "solidity": result.solidity, "circularity": result.circularity,
+        "bbox_x": x, "bbox_y": y, "bbox_w": w, "bbox_h": h,
+        "is_bg_detected": result.is_bg_detected, "detected": result.detected,
+        "decode_factor": result.decode_factor,
+        "label": CLASSES.index(label) if label in CLASSES else -1,
+        "valid": 1,
+    }
+    row.update({f"hu{i}": v for i, v in enumerate(hu, 1)})
+    return row
+
+
+# --- Ekstraksi (pool proses) ---
+_classifier = None
+
+
+def _init_worker(config=None):
+    global _classifier
+    cv2.setNumThreads(1)
+    _classifier = SpiceClassifier(config)
+
+
+def _extract(item):
+    path, stamp = item
+    try:
+        image, factor = load_image(path, working_target(_classifier.config))
+    except (OSError, ValueError):
+        return path, stamp, None
+    try:
+        result = _classifier.classify(image, decode_factor=factor)
+    except Exception as e:
+        # Dicatat sebagai gagal; pool tetap jalan
+        print(f"Gagal memproses {path}: {type(e).__name__}: {e}", file=sys.stderr)
+        return path, stamp, None
+    return path, stamp, result_row(result, label_from_path(path))
+
+
+class FeatureStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "manifest.sqlite"))
+        self._db.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, row INTEGER NOT NULL)""")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        self._repair()
+        self._normalize_paths()
+
+    # --- Metadata ---
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def __len__(self):
+        return int(self._meta("rows", 0))
+
+    @property
+    def config_hash(self):
+        return self._meta("config_hash")
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".bin")
+
+    def _repair(self):
+        # Tulisan yang terputus (crash sebelum commit manifest) dipotong kembali
+        rows = len(self)
+        for name, dtype in COLUMNS.items():
+            path = self._path(name)
+            expected = rows * np.dtype(dtype).itemsize
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            if os.path.getsize(path) != expected:
+                os.truncate(path, expected)
+
+    def clear(self):
+        self._db.execute("DELETE FROM files")
+        self._db.execute("DELETE FROM meta")
+        self._db.commit()
+        self._repair()
+        self._normalize_paths()
+
+    # --- Baca (zero-copy) ---
+    def column(self, name):
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=COLUMNS[name])
+        return np.memmap(self._path(name), dtype=COLUMNS[name], mode="r", shape=(n,))
+
+    def columns(self, names):
+        return {name: self.column(name) for name in names}
+
+    def mask(self, detected_only=True):
+        keep = self.column("valid") != 0
+        if detected_only:
+            keep &= self.column("detected") != 0
+        return keep
+
+    def matrix(self, names, labelled_only=True, root=None):
+        """(X float32 [n, len(names)], y label) untuk baris valid & terdeteksi.
+
+        ``root`` (opsional): hanya baris milik gambar di bawah direktori/file itu.
+        """
+        keep = self.mask()
+        labels = self.column("label")
+        if labelled_only:
+            keep &= labels >= 0
+        if root is not None:
+            keep &= self.under(root)
+        rows = np.flatnonzero(keep)
+        X = np.empty((len(rows), len(names)), dtype=np.float32)
+        for j, name in enumerate(names):
+            X[:, j] = self.column(name)[rows]
+        return X, np.asarray(CLASSES)[labels[rows]]
+
+    def missed_labels(self, root=None):
+        """Label baris valid & berlabel yang objeknya tidak terdeteksi (lihat ``models.evaluate``)."""
+        labels = self.column("label")
+        keep = self.mask(detected_only=False) & (self.column("detected") == 0) & (labels >= 0)
+        if root is not None:
+            keep &= self.under(root)
+        return np.asarray(CLASSES, dtype=object)[labels[keep]]
+
+    def paths(self):
+        """Path per baris (None untuk baris yang sudah digantikan)."""
+        out = np.full(len(self), None, dtype=object)
+        for path, row in self._db.execute("SELECT path, row FROM files WHERE row >= 0"):
+            out[row] = path
+        return out
+
+    def under(self, root):
+        """Mask baris yang gambarnya berada di bawah ``root`` (direktori atau file)."""
+        prefix = os.path.join(os.path.realpath(root), "")
+        return np.array([p is not None and (p + os.sep).startswith(prefix) for p in self.paths()], dtype=bool)
+
+    # --- Tulis ---
+    def _append(self, rows):
+        for name, dtype in COLUMNS.items():
+            with open(self._path(name), "ab") as f:
+                np.asarray([r[name] for r in rows], dtype=dtype).tofile(f)
+
+    def _invalidate(self, rows):
+        if rows:
+            valid = np.memmap(self._path("valid"), dtype=np.uint8, mode="r+", shape=(len(self),))
+            valid[rows] = 0
+            valid.flush()
+            del valid
+
+    def _normalize_paths(self):
+        # Manifest lama menyimpan path apa adanya (relatif/absolut bercampur):
+        # samakan ke realpath; baris ganda untuk file yang sama ditandai tidak valid
+        if self._meta("paths") == "realpath":
+            return
+        entries = self._db.execute("SELECT path, mtime_ns, size, row FROM files ORDER BY row").fetchall()
+        merged, stale = {}, []
+        for path, mtime, size, row in entries:
+            key = os.path.realpath(path)
+            old = merged.get(key)
+            if old is not None:
+                if row < 0:
+                    continue
+                if old[2] >= 0:
+                    stale.append(old[2])
+            merged[key] = (mtime, size, row)
+        self._invalidate(stale)
+        self._db.execute("DELETE FROM files")
+        self._db.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", [(k, *v) for k, v in merged.items()])
+        self._set_meta("paths", "realpath")
+        self._db.commit()
+
+    def update(self, root, config=None, workers=None):
+        """Proses gambar baru/berubah di ``root``; kembalikan jumlah per status.
+
+        Manifest memakai ``os.path.realpath``, jadi ``root`` yang ditulis
+        berbeda (relatif/absolut/symlink) tidak menambah baris ganda.
+        """
+        config = replace(config if config is not None else PipelineConfig(), model_path="")
+        cfg_hash = feature_config_hash(config)
+        if self.config_hash is None:
+            self._set_meta("config_hash", cfg_hash)
+            self._set_meta("config", json.dumps(asdict(config)))
+            self._db.commit()
+        elif self.config_hash != cfg_hash:
+            raise ValueError(f"Store {self.directory} dibuat dengan konfigurasi lain; "
+                             "gunakan direktori lain atau --rebuild.")
+
+        known = {p: (m, s, r) for p, m, s, r in self._db.execute("SELECT path, mtime_ns, size, row FROM files")}
+        todo, stale = [], []
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        for path in iter_images(root):
+            path = os.path.realpath(path)
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            old = known.get(path)
+            if old is not None and old[:2] == stamp:
+                counts["unchanged"] += 1
+                continue
+            if old is not None and old[2] >= 0:
+                stale.append(old[2])
+            todo.append((path, stamp))
+            counts["updated" if old is not None else "added"] += 1
+        if not todo:
+            return counts
+
+        self._invalidate(stale)
+        pending, files = [], []
+        with mp.Pool(workers or os.cpu_count() or 1, initializer=_init_worker, initargs=(config,)) as pool:
+            for path, stamp, row in pool.imap_unordered(_extract, todo, chunksize=4):
+                if row is None:
+                    counts["failed"] += 1
+                    files.append((path, *stamp, -1))
+                else:
+                    files.append((path, *stamp, len(self) + len(pending)))
+                    pending.append(row)
+                if len(files) >= FLUSH_ROWS:
+                    self._flush(pending, files)
+                    pending, files = [], []
+        self._flush(pending, files)
+        return counts
+
+    def _flush(self, rows, files):
+        # Kolom ditulis dulu; manifest (jumlah baris) di-commit setelahnya
+        if rows:
+            self._append(rows)
+        self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", files)
+        self._set_meta("rows", len(self) + len(rows))
+        self._db.commit()
+
+    def info(self):
+        n = len(self)
+        valid = self.mask(detected_only=False)
+        labels = self.column("label")[valid]
+        return {
+            "rows": n,
+            "valid": int(valid.sum()),
+            "detected": int(self.mask().sum()),
+            "config_hash": self.config_hash,
+            "labels": {c: int((labels == i).sum()) for i, c in enumerate(CLASSES)},
+            "bytes": sum(os.path.getsize(self._path(name)) for name in COLUMNS),
+        }
+
+    def close(self):
+        self._db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m feature_store", description="Penyimpanan fitur per gambar.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ext = sub.add_parser("extract", help="Ekstrak fitur gambar baru/berubah ke store.")
+    p_ext.add_argument("root", help="Direktori atau file gambar.")
+    p_ext.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker.")
+    p_ext.add_argument("--working-size", type=int, default=0, help="Sisi terpanjang resolusi kerja (px).")
+    p_ext.add_argument("--rebuild", action="store_true", help="Kosongkan store sebelum ekstraksi.")
+
+    p_info = sub.add_parser("info", help="Ringkasan isi store.")
+    for p in (p_ext, p_info):
+        p.add_argument("--store", "-s", default="fitur", help="Direktori store.")
+    args = parser.parse_args(argv)
+
+    store = FeatureStore(args.store)
+    if args.command == "extract":
+        if args.rebuild:
+            store.clear()
+        start = time.perf_counter()
+        counts = store.update(args.root, PipelineConfig(working_long_side=args.working_size), args.workers)
+        print(f"{counts} dalam {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    json.dump(store.info(), sys.stdout, indent=2)
+    print()
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
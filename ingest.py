@@ -0,0 +1,177 @@
+"""Decode gambar untuk pipeline: cepat, sadar orientasi, dan dibatasi ukurannya.
+
+Format: JPEG, PNG, WebP, BMP, TIFF, dari path maupun bytes di memori.
+
+* Ukuran citra dibaca dari header (``probe``) SEBELUM decode, sehingga
+  upload raksasa ditolak (``ImageTooLarge``) tanpa mengalokasikan buffernya.
+* Jika ``target_long_side`` diisi (mis. ``working_long_side``), JPEG
+  di-decode langsung pada 1/2, 1/4 atau 1/8 resolusi (skala DCT libjpeg,
+  ``cv2.IMREAD_REDUCED_COLOR_*``) selama sisi terpanjangnya masih >= target.
+  Format lain selalu di-decode penuh; pengecilan dilakukan engine.
+  ``decode``/``load_image`` mengembalikan ``(citra, faktor)``; teruskan
+  faktor ke ``classify(..., decode_factor=faktor)`` agar jumlah piksel,
+  bbox dan luas tetap dalam satuan file asli.
+* Orientasi EXIF diterapkan oleh decoder OpenCV (mode ``IMREAD_COLOR`` dan
+  ``IMREAD_REDUCED_*``); ``probe`` melaporkan nilai tag-nya.
+
+Contoh:
+    image, factor = load_image("foto.jpg", target_long_side=1024)
+    image, _ = decode(request_body, max_pixels=20_000_000)
+"""
+import os
+import struct
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff")
+
+# Batas jumlah piksel hasil decode (~300 MB BGR); bisa diubah lewat SPICE_MAX_PIXELS
+MAX_PIXELS = int(os.environ.get("SPICE_MAX_PIXELS", 100_000_000))
+
+_REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# Marker JPEG Start-Of-Frame yang memuat ukuran citra (bukan DHT/JPG/DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class ImageInfo:
+    format: str
+    width: int
+    height: int
+    orientation: int = 1   # tag EXIF 0x0112; 5-8 berarti lebar & tinggi tertukar saat ditampilkan
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+
+def _tiff_tags(data, offset, wanted):
+    # Baca tag (SHORT/LONG) dari IFD pertama struktur TIFF mulai di ``offset``
+    order = {b"II": "<", b"MM": ">"}.get(bytes(data[offset:offset + 2]))
+    if order is None:
+        return {}
+    ifd = offset + struct.unpack_from(order + "I", data, offset + 4)[0]
+    count = struct.unpack_from(order + "H", data, ifd)[0]
+    out = {}
+    for i in range(count):
+        tag, typ, _, value = struct.unpack_from(order + "HHI4s", data, ifd + 2 + 12 * i)
+        if tag in wanted and typ in (3, 4):
+            out[tag] = struct.unpack_from(order + ("H" if typ == 3 else "I"), value)[0]
+    return out
+
+
+def _probe_jpeg(data):
+    pos, orientation = 2, 1
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            raise ValueError("Struktur JPEG rusak.")
+        marker = data[pos + 1]
+        if marker == 0xFF:          # byte pengisi
+            pos += 1
+            continue
+        if marker in (0x01, *range(0xD0, 0xD9)):
+            pos += 2
+            continue
+        length = struct.unpack_from(">H", data, pos + 2)[0]
+        if marker == 0xE1 and bytes(data[pos + 4:pos + 10]) == b"Exif\x00\x00":
+            orientation = _tiff_tags(data, pos + 10, (0x0112,)).get(0x0112, 1)
+        elif marker in _JPEG_SOF:
+            height, width = struct.unpack_from(">HH", data, pos + 5)
+            return ImageInfo("jpeg", width, height, orientation)
+        elif marker == 0xDA:
+            break
+        pos += 2 + length
+    raise ValueError("Header JPEG tidak memuat ukuran citra.")
+
+
+def _probe_webp(data):
+    chunk = bytes(data[12:16])
+    if chunk == b"VP8X":
+        w, h = (int.from_bytes(data[o:o + 3], "little") + 1 for o in (24, 27))
+    elif chunk == b"VP8L":
+        bits = int.from_bytes(data[21:25], "little")
+        w, h = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    elif chunk == b"VP8 ":
+        w, h = (v & 0x3FFF for v in struct.unpack_from("<HH", data, 26))
+    else:
+        raise ValueError("Chunk WebP tidak dikenal.")
+    return ImageInfo("webp", w, h)
+
+
+def probe(data):
+    """Format, ukuran & orientasi dari header (tanpa decode); ValueError jika tidak dikenal."""
+    data = memoryview(data)
+    head = bytes(data[:16])
+    try:
+        if head.startswith(b"\xff\xd8"):
+            return _probe_jpeg(data)
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            w, h = struct.unpack_from(">II", data, 16)
+            return ImageInfo("png", w, h)
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            return _probe_webp(data)
+        if head.startswith(b"BM"):
+            if struct.unpack_from("<I", data, 14)[0] == 12:     # BITMAPCOREHEADER
+                w, h = struct.unpack_from("<HH", data, 18)
+            else:
+                w, h = struct.unpack_from("<ii", data, 18)
+            return ImageInfo("bmp", abs(w), abs(h))
+        if head[:4] in (b"II*\x00", b"MM\x00*"):
+            tags = _tiff_tags(data, 0, (256, 257, 0x0112))
+            if 256 in tags and 257 in tags:
+                return ImageInfo("tiff", tags[256], tags[257], tags.get(0x0112, 1))
+    except struct.error:
+        raise ValueError("Header gambar terpotong.")
+    raise ValueError("Format gambar tidak didukung (JPEG/PNG/WebP/BMP/TIFF).")
+
+
+def reduction_for(info, target_long_side):
+    """Faktor pengecilan decode (1, 2, 4, 8) dan flag imread-nya."""
+    if target_long_side and info.format == "jpeg":
+        long_side = max(info.width, info.height)
+        for factor, flag in _REDUCED_FLAGS:
+            if long_side // factor >= target_long_side:
+                return factor, flag
+    return 1, cv2.IMREAD_COLOR
+
+
+def working_target(config):
+    """``target_long_side`` untuk sebuah PipelineConfig.
+
+    0 (decode penuh) jika ``refine_full_res`` aktif, karena refine membutuhkan
+    piksel resolusi asli.
+    """
+    return 0 if config.refine_full_res else config.working_long_side
+
+
+def decode(data, target_long_side=0, max_pixels=MAX_PIXELS):
+    """Bytes (atau buffer) gambar -> (citra BGR uint8, faktor pengecilan 1/2/4/8).
+
+    ValueError jika format tidak dikenal / rusak, ImageTooLarge jika hasil
+    decode melebihi ``max_pixels``.
+    """
+    info = probe(data)
+    factor, flag = reduction_for(info, target_long_side)
+    pixels = -(-info.width // factor) * -(-info.height // factor)
+    if max_pixels and pixels > max_pixels:
+        raise ImageTooLarge(f"Gambar terlalu besar: {info.width}x{info.height} "
+                            f"({pixels / 1e6:.1f} MP > batas {max_pixels / 1e6:.1f} MP).")
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if image is None:
+        raise ValueError(f"Gagal decode gambar {info.format}.")
+    return image, factor
+
+
+def load_image(path, target_long_side=0, max_pixels=MAX_PIXELS):
+    """Baca & decode file gambar (lihat ``decode``); OSError jika file tidak bisa dibaca."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return decode(data, target_long_side, max_pixels)
@@ -0,0 +1,190 @@
+"""Instrumentasi pipeline klasifikasi (timing per tahap & info keputusan).
+
+Pasang objek instrumentasi ke ``SpiceClassifier(instrumentation=...)``. Setiap
+frame menghasilkan satu ``trace`` (dict) berisi:
+
+    width, height          ukuran citra input
+    work_width, work_height ukuran resolusi kerja
+    stages                 {nama_tahap: detik}
+    total                  total detik
+    contours               jumlah kontur pada mask global
+    fallback_contours      {"red": n, "green": n} jika cabang background aktif
+    is_bg_detected, branch, prediction, detected
+
+Tanpa instrumentasi (default), engine tidak memanggil ``perf_counter`` sama
+sekali sehingga overhead-nya praktis nol.
+
+``rss_mb``/``peak_rss_mb`` melaporkan memori proses (mis. per worker batch).
+"""
+import os
+import socket
+import sys
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Instrumentation:
+    """Basis no-op; subclass cukup override method yang dibutuhkan."""
+
+    def on_stage(self, name, seconds):
+        pass
+
+    def on_frame(self, trace):
+        pass
+
+
+class CallbackInstrumentation(Instrumentation):
+    def __init__(self, on_stage=None, on_frame=None):
+        self._on_stage = on_stage
+        self._on_frame = on_frame
+
+    def on_stage(self, name, seconds):
+        if self._on_stage is not None:
+            self._on_stage(name, seconds)
+
+    def on_frame(self, trace):
+        if self._on_frame is not None:
+            self._on_frame(trace)
+
+
+class MultiInstrumentation(Instrumentation):
+    def __init__(self, *targets):
+        self.targets = [t for t in targets if t is not None]
+
+    def on_stage(self, name, seconds):
+        for t in self.targets:
+            t.on_stage(name, seconds)
+
+    def on_frame(self, trace):
+        for t in self.targets:
+            t.on_frame(trace)
+
+
+class StatsDExporter(Instrumentation):
+    """Kirim metrik via UDP dalam format StatsD (fire-and-forget)."""
+
+    def __init__(self, host="127.0.0.1", port=8125, prefix="spice"):
+        self.addr = (host, int(port))
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+    def _send(self, lines):
+        try:
+            self.sock.sendto("\n".join(lines).encode("ascii"), self.addr)
+        except OSError:
+            # Metrik tidak boleh mengganggu pipeline
+            pass
+
+    def on_frame(self, trace):
+        p = self.prefix
+        lines = [f"{p}.stage.{name}:{sec * 1000:.3f}|ms" for name, sec in trace["stages"].items()]
+        lines.append(f"{p}.frame:{trace['total'] * 1000:.3f}|ms")
+        lines.append(f"{p}.contours:{trace['contours']}|h")
+        lines.append(f"{p}.branch.{trace['branch']}:1|c")
+        if trace["is_bg_detected"]:
+            lines.append(f"{p}.bg_detected:1|c")
+        self._send(lines)
+
+
+class PrometheusExporter(Instrumentation):
+    """Agregasi metrik dalam memori, diekspos dalam format teks Prometheus."""
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, prefix="spice"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._hist = defaultdict(lambda: [0] * (len(self.BUCKETS) + 1))   # stage -> counts per bucket (+Inf)
+        self._sum = defaultdict(float)
+        self._frames = defaultdict(int)                                   # (prediction, branch) -> count
+        self._bg = 0
+        self._contours_sum = 0
+
+    def _observe(self, key, seconds):
+        counts = self._hist[key]
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sum[key] += seconds
+
+    def on_frame(self, trace):
+        with self._lock:
+            for name, sec in trace["stages"].items():
+                self._observe(name, sec)
+            self._observe("total", trace["total"])
+            self._frames[(trace["prediction"], trace["branch"])] += 1
+            self._contours_sum += trace["contours"]
+            if trace["is_bg_detected"]:
+                self._bg += 1
+
+    def render(self):
+        p = self.prefix
+        out = [f"# TYPE {p}_stage_seconds histogram"]
+        with self._lock:
+            for stage, counts in sorted(self._hist.items()):
+                cumulative = 0
+                for bound, c in zip(self.BUCKETS + (float("inf"),), counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                out.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {self._sum[stage]:.6f}')
+                out.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+            out.append(f"# TYPE {p}_frames_total counter")
+            for (prediction, branch), n in sorted(self._frames.items()):
+                out.append(f'{p}_frames_total{{prediction="{prediction}",branch="{branch}"}} {n}')
+            out.append(f"# TYPE {p}_bg_detected_total counter")
+            out.append(f"{p}_bg_detected_total {self._bg}")
+            out.append(f"# TYPE {p}_contours_total counter")
+            out.append(f"{p}_contours_total {self._contours_sum}")
+        return "\n".join(out) + "\n"
+
+    def serve(self, port=9108, host="0.0.0.0"):
+        """Jalankan endpoint /metrics di thread daemon; mengembalikan server."""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def parse_statsd_address(value):
+    host, _, port = value.rpartition(":")
+    return StatsDExporter(host or "127.0.0.1", int(port or 8125))
+
+
+def rss_mb():
+    """RSS proses saat ini (MB) dari /proc; None jika tidak tersedia."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """RSS puncak proses sejak mulai (MB); None jika tidak tersedia (mis. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KiB di Linux, byte di macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,108 @@
+"""Pekerjaan latar belakang yang bisa dibatalkan (tanpa Qt).
+
+GUI membungkus objek di sini ke dalam QRunnable dan meneruskan callback ke
+signal Qt; logikanya sendiri bisa dijalankan dan diuji tanpa event loop:
+
+    job = ClassificationJob(SpiceClassifier(), image,
+                            on_progress=print, on_stage_image=lambda n, img: ...)
+    result = job.run()          # None jika job.cancel() dipanggil di tengah jalan
+
+Pembatalan bersifat kooperatif: dicek di setiap batas tahap pipeline.
+"""
+import threading
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Basis job: ``run()`` memanggil ``execute()`` dan menangani pembatalan."""
+
+    def __init__(self, on_progress=None):
+        # on_progress(nama_tahap, fraksi_selesai)
+        self.on_progress = on_progress
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, name, fraction):
+        self.check()
+        if self.on_progress is not None:
+            self.on_progress(name, fraction)
+
+    def run(self):
+        """Jalankan job; mengembalikan hasil, atau None jika dibatalkan."""
+        try:
+            self.check()
+            return self.execute()
+        except JobCancelled:
+            return None
+
+    def execute(self):
+        raise NotImplementedError
+
+
+class FunctionJob(Job):
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+# Tahap yang dilaporkan engine lewat on_stage, urut seperti di pipeline
+# ("resize" dan "refine" hanya muncul pada resolusi kerja)
+PIPELINE_STAGES = ("resize", "blur", "labels", "morphology", "stage_images", "contours",
+                   "refine", "features", "decision", "render")
+
+
+class ClassificationJob(Job):
+    """Klasifikasi satu citra dengan keep_stages=True.
+
+    ``classifier`` boleh SpiceClassifier atau pembungkusnya (CachedClassifier).
+    Callback engine dipasang selama job berjalan, jadi satu classifier tidak
+    boleh dipakai dua job bersamaan (GUI memakai pool satu thread).
+    """
+
+    def __init__(self, classifier, image, on_progress=None, on_stage_image=None):
+        super().__init__(on_progress)
+        self.classifier = classifier
+        self.image = image
+        self.on_stage_image = on_stage_image
+
+    def _stage(self, name, seconds):
+        # Dipanggil engine di setiap batas tahap: titik pembatalan
+        done = PIPELINE_STAGES.index(name) + 1 if name in PIPELINE_STAGES else 0
+        self.progress(name, done / len(PIPELINE_STAGES))
+
+    def _stage_image(self, name, img):
+        self.check()
+        if self.on_stage_image is not None:
+            self.on_stage_image(name, img)
+
+    def execute(self):
+        # Buka pembungkus (CachedClassifier, ProfiledClassifier) sampai SpiceClassifier
+        engine = self.classifier
+        while hasattr(engine, "classifier"):
+            engine = engine.classifier
+        previous = engine.on_stage, engine.on_stage_image
+        engine.on_stage, engine.on_stage_image = self._stage, self._stage_image
+        try:
+            result = self.classifier.classify(self.image, keep_stages=True)
+        finally:
+            engine.on_stage, engine.on_stage_image = previous
+        self.progress("done", 1.0)
+        return result
@@ -0,0 +1,118 @@
+"""Load test sederhana untuk server.py (asyncio, tanpa dependensi tambahan).
+
+Contoh:
+    python -m server --workers 4 &
+    python -m loadtest dataset/ --concurrency 32 --requests 2000
+
+Setiap klien memakai koneksi keep-alive sendiri dan mengirim bytes gambar
+mentah (dipilih bergiliran dari direktori). Di akhir ditampilkan throughput,
+latensi p50/p95/p99, dan jumlah per status HTTP.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from batch import iter_images
+
+
+async def _request(reader, writer, host, data):
+    head = (f"POST /classify HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/octet-stream\r\nContent-Length: {len(data)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + data)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Koneksi ditutup server.")
+    status = int(status_line.split()[1])
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        key = key.strip().lower()
+        if key == "content-length":
+            length = int(value)
+        elif key == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    body = await reader.readexactly(length)
+    return status, body, keep_alive
+
+
+async def _client(host, port, payloads, counter, latencies, statuses, total):
+    reader = writer = None
+    while True:
+        i = counter[0]
+        if i >= total:
+            break
+        counter[0] += 1
+        data = payloads[i % len(payloads)]
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            t0 = time.perf_counter()
+            status, _, keep_alive = await _request(reader, writer, host, data)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            statuses["connection_error"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_loadtest(root, host="127.0.0.1", port=8080, concurrency=16, requests=500):
+    payloads = []
+    for path in iter_images(root):
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        raise SystemExit(f"Tidak ada gambar di {root}")
+
+    counter = [0]
+    latencies = []
+    statuses = Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, payloads, counter, latencies, statuses, requests)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    lat = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(statuses[200] / elapsed, 2),
+        "latency_ms": {q: round(float(np.percentile(lat, int(q[1:]))), 2) for q in ("p50", "p95", "p99")},
+        "status": {str(k): v for k, v in statuses.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Load test server klasifikasi.")
+    parser.add_argument("root", nargs="?", default="dataset", help="Direktori gambar yang dikirim.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", "-c", type=int, default=16, help="Jumlah klien paralel.")
+    parser.add_argument("--requests", "-n", type=int, default=500, help="Total request.")
+    args = parser.parse_args(argv)
+
+    res = asyncio.run(run_loadtest(args.root, args.host, args.port, args.concurrency, args.requests))
+    json.dump(res, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Backend keputusan terlatih (NumPy murni) untuk fitur warna & bentuk.
+
+Fitur per objek (``FEATURE_NAMES``): persentase merah/hijau/putih, aspect
+ratio, solidity, circularity, dan 7 Hu moments (skala log).
+
+Backend:
+    rules     decision tree ambang PipelineConfig (default engine)
+    logistic  regresi logistik multinomial (softmax)
+    knn       k-nearest neighbours pada fitur terstandarisasi
+
+Model disimpan sebagai satu file .npz kecil (tanpa pickle) dan dipakai lewat
+``PipelineConfig(model_path=...)`` atau ``SpiceClassifier(model=load_model(...))``.
+
+Contoh:
+    python -m models train dataset/ --kind logistic --output model.npz
+    python -m models evaluate held_out/ --model model.npz
+
+``train`` melaporkan akurasi stratified k-fold (bukan akurasi data latih);
+``evaluate`` mengukur model tersimpan pada direktori yang tidak dipakai melatihnya.
+Gambar berlabel yang objeknya tidak terdeteksi (atau gagal diproses) dihitung
+sebagai prediksi salah ``UNDETECTED``, sama seperti ``tune``.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from batch import iter_images
+from engine import CLASSES, PipelineConfig, SpiceClassifier, label_from_path
+from ingest import load_image, working_target
+
+
+FEATURE_NAMES = ("pct_red", "pct_green", "pct_white", "aspect_ratio", "solidity", "circularity",
+                 *(f"hu{i}" for i in range(1, 8)))
+
+# Prediksi untuk gambar berlabel yang tidak menghasilkan fitur
+UNDETECTED = "tidak terdeteksi"
+
+DOMINANT_COLORS = {
+    "CABAI HIJAU": "Hijau",
+    "CABAI MERAH": "Merah/Ungu",
+    "BAWANG MERAH": "Merah/Ungu",
+    "BAWANG PUTIH": "Putih",
+}
+
+
+def feature_vector(result):
+    return np.array([result.pct_red, result.pct_green, result.pct_white, result.aspect_ratio,
+                     result.solidity, result.circularity, *(result.hu_moments or (0.0,) * 7)],
+                    dtype=np.float32)
+
+
+class Model:
+    """Basis backend: subclass mengimplementasikan ``predict_proba(X)``."""
+
+    kind = None
+
+    def __init__(self, classes=CLASSES):
+        self.classes = np.asarray(classes)
+
+    def predict_proba(self, X):
+        raise NotImplementedError
+
+    def predict(self, X):
+        """Prediksi label untuk banyak baris fitur sekaligus (n, n_fitur)."""
+        return self.classes[self.predict_proba(np.atleast_2d(X)).argmax(axis=1)]
+
+    def decide(self, result):
+        # Dipanggil engine menggantikan decision tree
+        proba = self.predict_proba(feature_vector(result)[None])[0]
+        i = int(proba.argmax())
+        label = str(self.classes[i])
+        result.prediction = label
+        result.dominant_color = DOMINANT_COLORS.get(label, "Unknown")
+        result.branch = "model"
+        result.logic_path = f"Model {self.kind}: {label} (keyakinan {proba[i]:.0%})."
+
+
+class RuleModel(Model):
+    """Decision tree default dalam bentuk tervektorisasi (untuk evaluasi batch)."""
+
+    kind = "rules"
+
+    def __init__(self, config=None):
+        super().__init__()
+        self.config = config if config is not None else PipelineConfig()
+
+    def predict_proba(self, X):
+        cfg = self.config
+        X = np.atleast_2d(X)
+        red, green, ar, sol, circ = X[:, 0], X[:, 1], X[:, 3], X[:, 4], X[:, 5]
+        elongated = (ar > cfg.aspect_ratio) | (sol < cfg.solidity) | (circ < cfg.circularity)
+        index = {c: i for i, c in enumerate(self.classes)}
+        pick = np.select([green > cfg.green_pct, (red > cfg.red_pct) & elongated, red > cfg.red_pct],
+                         [index["CABAI HIJAU"], index["CABAI MERAH"], index["BAWANG MERAH"]],
+                         index["BAWANG PUTIH"])
+        proba = np.zeros((len(X), len(self.classes)), dtype=np.float32)
+        proba[np.arange(len(X)), pick] = 1.0
+        return proba
+
+
+class _Standardized(Model):
+    # Model yang bekerja pada fitur terstandarisasi (mean 0, std 1)
+    def __init__(self, classes=CLASSES, mean=None, scale=None):
+        super().__init__(classes)
+        self.mean = mean
+        self.scale = scale
+
+    def _fit_scaler(self, X):
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+
+    def _transform(self, X):
+        return (np.atleast_2d(X).astype(np.float32) - self.mean) / self.scale
+
+
+class LogisticModel(_Standardized):
+    kind = "logistic"
+
+    def __init__(self, classes=CLASSES, mean=None, scale=None, weights=None, bias=None):
+        super().__init__(classes, mean, scale)
+        self.weights = weights
+        self.bias = bias
+
+    def fit(self, X, y, epochs=2000, lr=0.5, l2=1e-3):
+        X = np.asarray(X, dtype=np.float32)
+        self._fit_scaler(X)
+        Z = self._transform(X)
+        Y = (np.asarray(y)[:, None] == self.classes[None, :]).astype(np.float32)
+        n, d = Z.shape
+        self.weights = np.zeros((d, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        # Full-batch gradient descent (dataset fitur kecil, cukup cepat di NumPy)
+        for _ in range(epochs):
+            P = self._softmax(Z @ self.weights + self.bias)
+            grad = (P - Y) / n
+            self.weights -= lr * (Z.T @ grad + l2 * self.weights)
+            self.bias -= lr * grad.sum(axis=0)
+        return self
+
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=1, keepdims=True)
+        e = np.exp(logits)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, X):
+        return self._softmax(self._transform(X) @ self.weights + self.bias)
+
+    def params(self):
+        return {"weights": self.weights, "bias": self.bias}
+
+
+class KNNModel(_Standardized):
+    kind = "knn"
+
+    # Baris per blok saat menghitung jarak, membatasi memori matriks jarak
+    CHUNK = 4096
+
+    def __init__(self, classes=CLASSES, mean=None, scale=None, points=None, targets=None, k=5):
+        super().__init__(classes, mean, scale)
+        self.points = points
+        self.targets = targets
+        self.k = int(k)
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float32)
+        self._fit_scaler(X)
+        self.points = self._transform(X)
+        index = {c: i for i, c in enumerate(self.classes)}
+        self.targets = np.array([index[label] for label in y], dtype=np.int32)
+        return self
+
+    def predict_proba(self, X):
+        Z = self._transform(X)
+        k = min(self.k, len(self.points))
+        sq_points = (self.points ** 2).sum(axis=1)
+        proba = np.empty((len(Z), len(self.classes)), dtype=np.float32)
+        for start in range(0, len(Z), self.CHUNK):
+            z = Z[start:start + self.CHUNK]
+            # |a - b|^2 = |a|^2 - 2ab + |b|^2; |a|^2 konstan per baris, bisa diabaikan
+            dist = sq_points[None, :] - 2 * z @ self.points.T
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            votes = np.zeros((len(z), len(self.classes)), dtype=np.float32)
+            np.add.at(votes, (np.arange(len(z))[:, None], self.targets[nearest]), 1.0)
+            proba[start:start + len(z)] = votes / k
+        return proba
+
+    def params(self):
+        return {"points": self.points, "targets": self.targets, "k": np.int32(self.k)}
+
+
+MODEL_KINDS = {"logistic": LogisticModel, "knn": KNNModel}
+
+
+def save_model(model, path):
+    np.savez(path, kind=model.kind, classes=model.classes, feature_names=np.asarray(FEATURE_NAMES),
+             mean=model.mean, scale=model.scale, **model.params())
+
+
+def load_model(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    kind = str(arrays.pop("kind"))
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Jenis model tidak dikenal: {kind}")
+    if tuple(arrays.pop("feature_names")) != FEATURE_NAMES:
+        raise ValueError("Fitur model tidak cocok dengan versi engine ini; latih ulang model.")
+    return MODEL_KINDS[kind](**arrays)
+
+
+# --- Ekstraksi fitur (pool proses) ---
+_classifier = None
+
+
+def _init_worker(config=None):
+    global _classifier
+    cv2.setNumThreads(1)
+    _classifier = SpiceClassifier(config)
+
+
+def _extract(path):
+    # (path, fitur atau None jika tidak terdeteksi / gagal diproses, label)
+    label = label_from_path(path)
+    if label is None:
+        return None
+    try:
+        image, factor = load_image(path, working_target(_classifier.config))
+    except (OSError, ValueError):
+        return None
+    try:
+        result = _classifier.classify(image, decode_factor=factor)
+    except Exception as e:
+        # Satu gambar bermasalah tidak boleh menghentikan pool
+        print(f"Gagal memproses {path}: {type(e).__name__}: {e}", file=sys.stderr)
+        return path, None, label
+    return path, feature_vector(result) if result.detected else None, label
+
+
+def extract_features(root, config=None, workers=None):
+    """Jalankan pipeline pada gambar berlabel; kembalikan (X, y, paths, missed).
+
+    ``missed``: label gambar yang tidak terdeteksi / gagal diproses; teruskan
+    ke ``evaluate``/``cross_validate`` agar dihitung sebagai prediksi salah.
+    """
+    with mp.Pool(workers or os.cpu_count() or 1, initializer=_init_worker, initargs=(config,)) as pool:
+        rows = [r for r in pool.imap(_extract, iter_images(root), chunksize=4) if r is not None]
+    missed = np.asarray([label for _, features, label in rows if features is None], dtype=object)
+    rows = [r for r in rows if r[1] is not None]
+    if not rows:
+        raise SystemExit(f"Tidak ada gambar berlabel yang terdeteksi di {root}")
+    paths, X, y = zip(*rows)
+    return np.stack(X), np.asarray(y), list(paths), missed
+
+
+def _scores(y, pred, classes, missed=()):
+    # Gambar yang tidak terdeteksi masuk confusion matrix sebagai prediksi UNDETECTED
+    y = np.concatenate([np.asarray(y, dtype=object), np.asarray(missed, dtype=object)])
+    pred = np.concatenate([np.asarray(pred, dtype=object), np.full(len(missed), UNDETECTED, dtype=object)])
+    classes = [str(c) for c in classes]
+    confusion = {c: {p: int(((y == c) & (pred == p)).sum()) for p in classes + [UNDETECTED]} for c in classes}
+    return {"accuracy": round(float((pred == y).mean()), 4), "samples": len(y),
+            "not_detected": len(missed), "confusion": confusion}
+
+
+def evaluate(model, X, y, missed=()):
+    """Akurasi & confusion matrix; (X, y) harus data yang tidak dipakai melatih ``model``.
+
+    ``missed``: label gambar tanpa fitur (lihat ``extract_features``), dihitung salah.
+    """
+    return _scores(y, model.predict(X), model.classes, missed)
+
+
+def stratified_folds(y, folds=5, seed=0):
+    """Nomor fold (0..folds-1) per sampel; sampel tiap kelas dibagi rata ke semua fold."""
+    rng = np.random.default_rng(seed)
+    fold = np.empty(len(y), dtype=np.int64)
+    for c in np.unique(y):
+        index = np.flatnonzero(y == c)
+        rng.shuffle(index)
+        fold[index] = np.arange(len(index)) % folds
+    return fold
+
+
+def cross_validate(fit, X, y, folds=5, seed=0, missed=()):
+    """Evaluasi stratified k-fold: tiap sampel diprediksi model yang dilatih tanpa sampel itu.
+
+    ``fit(X, y)`` mengembalikan model terlatih; ``missed`` seperti pada ``evaluate``.
+    """
+    folds = min(folds, len(y))
+    if folds < 2:
+        raise SystemExit("Cross-validation butuh minimal 2 sampel.")
+    fold = stratified_folds(y, folds, seed)
+    pred = np.empty_like(y)
+    for k in range(folds):
+        test = fold == k
+        model = fit(X[~test], y[~test])
+        pred[test] = model.predict(X[test])
+    return dict(_scores(y, pred, model.classes, missed), folds=folds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m models", description="Latih/evaluasi backend model.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="Latih model dari direktori gambar berlabel.")
+    p_train.add_argument("root", help="Direktori gambar (label dari nama file, mis. cabai-merah-1.jpg).")
+    p_train.add_argument("--kind", choices=sorted(MODEL_KINDS), default="logistic")
+    p_train.add_argument("--output", "-o", default="model.npz", help="File model keluaran.")
+    p_train.add_argument("--k", type=int, default=5, help="Jumlah tetangga (knn).")
+    p_train.add_argument("--epochs", type=int, default=2000, help="Iterasi gradient descent (logistic).")
+    p_train.add_argument("--folds", type=int, default=5,
+                         help="Jumlah fold stratified k-fold untuk akurasi yang dilaporkan.")
+
+    p_eval = sub.add_parser("evaluate", help="Bandingkan model dengan decision tree default.")
+    p_eval.add_argument("root", help="Direktori gambar berlabel yang TIDAK dipakai saat train (held-out).")
+    p_eval.add_argument("--model", "-m", default=None, help="File model (default: hanya aturan).")
+
+    for p in (p_train, p_eval):
+        p.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker.")
+        p.add_argument("--working-size", type=int, default=0, help="Sisi terpanjang resolusi kerja (px).")
+        p.add_argument("--store", "-s", default=None,
+                       help="Direktori feature store; hanya gambar baru/berubah yang diproses ulang. "
+                            "Hanya baris milik gambar di bawah root yang dipakai.")
+    args = parser.parse_args(argv)
+
+    config = PipelineConfig(working_long_side=args.working_size)
+    if args.store:
+        from feature_store import FeatureStore
+        store = FeatureStore(args.store)
+        store.update(args.root, config, args.workers)
+        X, y = store.matrix(FEATURE_NAMES, root=args.root)
+        missed = store.missed_labels(root=args.root)
+        store.close()
+    else:
+        X, y, _, missed = extract_features(args.root, config, args.workers)
+    out = {"rules": evaluate(RuleModel(config), X, y, missed)}
+
+    if args.command == "train":
+        def fit(X, y):
+            if args.kind == "knn":
+                return KNNModel(k=args.k).fit(X, y)
+            return LogisticModel().fit(X, y, epochs=args.epochs)
+
+        # Akurasi dari stratified k-fold; model yang disimpan dilatih pada semua data
+        out[args.kind] = cross_validate(fit, X, y, args.folds, missed=missed)
+        model = fit(X, y)
+        save_model(model, args.output)
+        print(f"Model {args.kind} disimpan ke {args.output} ({os.path.getsize(args.output)} byte)", file=sys.stderr)
+    elif args.model:
+        model = load_model(args.model)
+        out[model.kind] = evaluate(model, X, y, missed)
+
+    json.dump(out, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Profil konfigurasi bernama (JSON/TOML/YAML) dengan hot reload.
+
+Format file (contoh TOML; JSON/YAML berstruktur sama):
+
+    [default]                      # dasar semua profil (opsional)
+    working_long_side = 1024
+
+    [profiles.redup]               # mis. kamera dengan cahaya redup
+    white = [[0, 0, 110], [180, 50, 255]]
+
+    [profiles.gudang-4k]
+    extends = "redup"              # turunan profil lain (opsional)
+    working_long_side = 1600
+
+Nilai divalidasi terhadap tipe ``PipelineConfig`` (lihat
+``engine.config_from_dict``). ``ProfileStore`` memeriksa mtime file paling
+sering tiap ``check_interval`` detik dan memuat ulang bila berubah; file yang
+rusak diabaikan (profil lama tetap dipakai) sehingga proses yang berjalan
+lama tidak pernah berhenti karena salah ketik.
+
+Contoh:
+    store = ProfileStore("profiles.toml")
+    clf = ProfiledClassifier(store, "redup")
+    result = clf.classify(image)       # result.config_hash = hash profil aktif
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+from engine import PipelineConfig, SpiceClassifier, config_from_dict
+
+
+DEFAULT_PROFILE = "default"
+
+
+def _read(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Profil YAML membutuhkan paket PyYAML (pip install pyyaml).")
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_profiles(data):
+    """Dict mentah -> {nama_profil: PipelineConfig}."""
+    unknown = set(data) - {"default", "profiles"}
+    if unknown:
+        raise ValueError(f"Bagian tidak dikenal: {', '.join(sorted(unknown))} (gunakan 'default'/'profiles').")
+    base = config_from_dict(data.get("default") or {})
+    raw = data.get("profiles") or {}
+    configs = {DEFAULT_PROFILE: base}
+
+    def resolve(name, chain=()):
+        if name in configs:
+            return configs[name]
+        if name not in raw:
+            raise ValueError(f"Profil tidak ditemukan: {name}")
+        if name in chain:
+            raise ValueError(f"Rantai 'extends' melingkar: {' -> '.join(chain + (name,))}")
+        values = dict(raw[name])
+        parent = resolve(values.pop("extends", DEFAULT_PROFILE), chain + (name,))
+        try:
+            configs[name] = config_from_dict(values, parent)
+        except ValueError as e:
+            raise ValueError(f"Profil {name}: {e}")
+        return configs[name]
+
+    for name in raw:
+        resolve(name)
+    return configs
+
+
+def load_profiles(path):
+    return parse_profiles(_read(path))
+
+
+def check_profile(path, name=DEFAULT_PROFILE):
+    """Validasi awal untuk CLI: pesan error singkat, bukan traceback di worker."""
+    try:
+        profiles = load_profiles(path)
+    except (OSError, ValueError, ImportError) as e:
+        return f"File profil {path} tidak valid: {e}"
+    if name not in profiles:
+        return f"Profil tidak ditemukan: {name} (tersedia: {', '.join(sorted(profiles))})"
+    return None
+
+
+def check_overrides(options):
+    """Pesan error jika opsi konfigurasi CLI diisi bersama ``--profiles``.
+
+    ``options``: {nama_opsi: nilai}; nilai kosong/0/False berarti tidak dipakai.
+    Dengan profil, konfigurasi sepenuhnya berasal dari file profil.
+    """
+    used = [name for name, value in options.items() if value]
+    if used:
+        return f"{', '.join(used)} tidak bisa dipakai bersama --profiles; atur nilainya di file profil."
+    return None
+
+
+class ProfileStore:
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self.profiles = load_profiles(path)
+        self._mtime = os.stat(path).st_mtime_ns
+        self._checked = time.monotonic()
+
+    @property
+    def names(self):
+        return sorted(self.profiles)
+
+    def reload(self):
+        """Muat ulang jika file berubah; True jika profil diperbarui."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return False
+                profiles = load_profiles(self.path)
+            except (OSError, ValueError, ImportError) as e:
+                # File sedang ditulis / tidak valid: tetap pakai profil lama
+                print(f"Profil {self.path} tidak dimuat ulang: {e}", file=sys.stderr)
+                return False
+            self._mtime = mtime
+            self.profiles = profiles
+            return True
+
+    def config(self, name=DEFAULT_PROFILE):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self.reload()
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise KeyError(f"Profil tidak ditemukan: {name} (tersedia: {', '.join(self.names)})")
+
+
+class ProfiledClassifier:
+    """SpiceClassifier yang mengikuti satu profil di ProfileStore (hot reload).
+
+    Classifier dibangun ulang hanya jika hash konfigurasi profil berubah;
+    argumen lain (instrumentation, on_stage, ...) diteruskan apa adanya.
+    """
+
+    def __init__(self, store, profile=DEFAULT_PROFILE, **kwargs):
+        self.store = store
+        self.profile = profile
+        self.kwargs = kwargs
+        self._classifier = SpiceClassifier(store.config(profile), **kwargs)
+
+    @property
+    def classifier(self):
+        config = self.store.config(self.profile)
+        if config is not self._classifier.config and config != self._classifier.config:
+            self._classifier = SpiceClassifier(config, **self.kwargs)
+        return self._classifier
+
+    @property
+    def config(self):
+        return self.classifier.config
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        return self.classifier.classify(image, keep_stages=keep_stages, decode_factor=decode_factor)
+
+    def classify_objects(self, image, keep_stages=False, decode_factor=1):
+        return self.classifier.classify_objects(image, keep_stages=keep_stages, decode_factor=decode_factor)
+
+
+def open_classifier(profiles_path=None, profile=DEFAULT_PROFILE, config=None, **kwargs):
+    """Classifier untuk CLI: berbasis profil jika ``profiles_path`` diisi.
+
+    ValueError jika ``config`` juga diisi: konfigurasi profil tidak digabung.
+    """
+    if profiles_path:
+        if config is not None:
+            raise ValueError("config tidak bisa dipakai bersama file profil; atur nilainya di file profil.")
+        return ProfiledClassifier(ProfileStore(profiles_path), profile, **kwargs)
+    return SpiceClassifier(config if config is not None else PipelineConfig(), **kwargs)
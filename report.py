@@ -0,0 +1,532 @@
+"""Pembuatan laporan HTML tanpa Qt (dipakai GUI maupun mode batch).
+
+* tiap citra unik di-encode SEKALI (features & final adalah array yang sama)
+  dan hanya citra yang benar-benar ditampilkan yang di-encode
+* citra diperkecil ke ukuran thumbnail sesuai tampilan (max-height 250 px)
+* mask biner disimpan sebagai PNG, citra lain sebagai JPEG
+* aset bisa di-inline (data URI) atau ditulis sebagai file sidecar
+* HTML ditulis bertahap ke file dari template (string.Template), bukan
+  dirangkai utuh di memori
+
+Mode batch (satu index untuk ribuan gambar, streaming):
+    python -m report dataset/ --output laporan/index.html --detail --workers 4
+"""
+import argparse
+import base64
+import datetime
+import html
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import Counter
+from string import Template
+
+import cv2
+
+from batch import iter_images
+from engine import CLASSES, PipelineConfig, SpiceClassifier
+from ingest import load_image
+
+
+# Tinggi maksimal citra di laporan (px). Ditampilkan max-height 250 px (hasil
+# akhir 400 px); disimpan 2x agar tetap tajam di layar HiDPI.
+THUMB_HEIGHT = 500
+FINAL_HEIGHT = 800
+MASK_HEIGHT = 240
+INDEX_THUMB_HEIGHT = 120
+JPEG_QUALITY = 85
+
+BINARY_STAGES = ("mask_red", "mask_green", "mask_white", "global_mask")
+
+
+HEAD = Template("""\
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Laporan Detil Klasifikasi Bumbu</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f4f9; color: #333; padding: 20px; }
+        h1, h2, h3 { color: #2c3e50; border-bottom: 2px solid #ddd; padding-bottom: 10px; }
+        .container { max-width: 1000px; margin: auto; background: white; padding: 30px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }
+        .summary-box { background-color: #e8f4fc; padding: 20px; border-radius: 8px; border-left: 5px solid #3498db; margin-bottom: 30px; }
+        .result-title { font-size: 32px; font-weight: bold; color: #e74c3c; margin: 0; }
+        .logic-text { font-size: 16px; font-style: italic; color: #555; margin-top: 5px; }
+        
+        .step-card { margin-bottom: 40px; }
+        .step-header { background-color: #34495e; color: white; padding: 10px 15px; font-size: 18px; border-radius: 5px 5px 0 0; }
+        .step-content { border: 1px solid #ddd; border-top: none; padding: 20px; display: flex; gap: 20px; align-items: flex-start; }
+        
+        table { width: 100%; border-collapse: collapse; font-size: 14px; }
+        th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+        th { background-color: #f2f2f2; }
+        
+        .img-container { flex: 1; text-align: center; }
+        .img-container img { max-width: 100%; max-height: 250px; border: 1px solid #999; box-shadow: 2px 2px 5px rgba(0,0,0,0.2); }
+        .text-container { flex: 1; }
+        .metric-value { font-weight: bold; color: #2980b9; }
+        .img-container img.mask { max-width: 32%; max-height: 120px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div style="text-align: center;">
+            <h1>Laporan Analisis Citra Komputer</h1>
+            <p>Waktu Analisis: $timestamp</p>
+            <p>Hash Konfigurasi: <code>$config_hash</code></p>
+        </div>
+
+        <div class="summary-box">
+            <h3>KESIMPULAN AKHIR</h3>
+            <p class="result-title">$prediction</p>
+            <p class="logic-text">" $logic_path "</p>
+        </div>
+
+        <h2>Rincian Proses & Analisis</h2>
+
+""")
+
+SECTION_PREPROCESS = Template("""\
+        <div class="step-card">
+            <div class="step-header">Tahap 1: Pre-processing (Noise Reduction)</div>
+            <div class="step-content">
+                <div class="img-container">
+                    <img src="$img_original" alt="Asli"><br><small>Citra Asli</small>
+                    <br><br>
+                    <img src="$img_blur" alt="Blur"><br><small>Median Blur</small>
+                </div>
+                <div class="text-container">
+                    <h4>Analisis:</h4>
+                    <p>Citra asli sering mengandung <i>noise</i> (bintik-bintik kecil) yang dapat mengganggu deteksi warna.</p>
+                    <ul>
+                        <li><b>Metode:</b> Median Blur (Kernel ${median_ksize}x${median_ksize}).</li>
+                        <li><b>Tujuan:</b> Menghaluskan tekstur bumbu tanpa menghilangkan tepi (edge) objek terlalu banyak. Ini penting agar bintik putih pada cabai tidak dianggap sebagai bawang putih.</li>
+                    </ul>
+                </div>
+            </div>
+        </div>
+
+""")
+
+SECTION_COLOR = Template("""\
+        <div class="step-card">
+            <div class="step-header">Tahap 2: Segmentasi Warna (HSV)</div>
+            <div class="step-content">
+                <div class="img-container">
+                    <img src="$img_hsv" alt="HSV V-Channel"><br><small>Channel V (Brightness)</small>
+            <br><br>
+            <img src="$img_mask_red" alt="Mask Merah" class="mask"><img src="$img_mask_green" alt="Mask Hijau" class="mask"><img src="$img_mask_white" alt="Mask Putih" class="mask">
+            <br><small>Mask Merah / Hijau / Putih</small>
+            <br><br>
+            <img src="$img_global_mask" alt="Segmentasi"><br><small>Segmentasi Objek Utama</small>
+                </div>
+                <div class="text-container">
+                    <h4>Analisis Warna:</h4>
+                    <p>Sistem mengonversi citra RGB ke HSV untuk memisahkan intensitas cahaya dari informasi warna.</p>
+                    <table>
+                        <tr><th>Target Warna</th><th>Deteksi Pixel</th><th>Persentase</th></tr>
+                        <tr><td><b>Merah</b> (Cabai/Bawang Merah)</td><td>$pixels_r px</td><td class="metric-value">$pct_red%</td></tr>
+                        <tr><td><b>Hijau</b> (Cabai Hijau)</td><td>$pixels_g px</td><td class="metric-value">$pct_green%</td></tr>
+                        <tr><td><b>Putih</b> (Bawang Putih)</td><td>$pixels_w px</td><td class="metric-value">$pct_white%</td></tr>
+                    </table>
+                    <p><i>*Persentase dihitung relatif terhadap luas area objek yang terdeteksi.</i></p>
+                </div>
+            </div>
+        </div>
+
+""")
+
+SECTION_SHAPE = Template("""\
+        <div class="step-card">
+            <div class="step-header">Tahap 3: Analisis Geometri (Bentuk)</div>
+            <div class="step-content">
+                <div class="img-container">
+                    <img src="$img_features" alt="Shape Analysis"><br><small>Bounding Box (Biru) & Convex Hull (Kuning)</small>
+                </div>
+                <div class="text-container">
+                    <h4>Analisis Morfologi:</h4>
+                    <p>Jika warna dominan adalah Merah, sistem membedakan Cabai dan Bawang Merah berdasarkan bentuk.</p>
+                    <table>
+                        <tr><th>Metrik</th><th>Nilai</th><th>Interpretasi</th></tr>
+                        <tr>
+                            <td><b>Aspect Ratio</b><br>(Panjang / Lebar)</td>
+                            <td class="metric-value">$aspect_ratio</td>
+                            <td>
+                                > $thr_aspect_ratio : Cenderung Lonjong (Cabai)<br>
+                                &le; $thr_aspect_ratio : Cenderung Bulat (Bawang)
+                            </td>
+                        </tr>
+                        <tr>
+                            <td><b>Solidity</b><br>(Area / Hull)</td>
+                            <td class="metric-value">$solidity</td>
+                            <td>
+                                < $thr_solidity : Melengkung/Tidak Padat (Cabai)<br>
+                                &ge; $thr_solidity : Padat/Cembung (Bawang)
+                            </td>
+                        </tr>
+                        <tr>
+                            <td><b>Circularity</b><br>(Kebulatan)</td>
+                            <td class="metric-value">$circularity</td>
+                            <td>
+                                Mendekati 1.0 = Lingkaran Sempurna.<br>
+                                < $thr_circularity : Tidak Bulat (Cabai)
+                            </td>
+                        </tr>
+                    </table>
+                </div>
+            </div>
+        </div>
+
+""")
+
+SECTION_FINAL = Template("""\
+        <div class="step-card">
+            <div class="step-header">Tahap 4: Hasil Visualisasi Akhir</div>
+            <div class="step-content">
+                <div class="img-container">
+                    <img src="$img_final" style="max-height: 400px;" alt="Final Result">
+                </div>
+                <div class="text-container">
+                    <h4>Keputusan Algoritma:</h4>
+                    <ol>
+                        <li>Cek Hijau: <b>$pct_green%</b> (Threshold > $thr_green%)</li>
+                        <li>Cek Merah: <b>$pct_red%</b> (Threshold > $thr_red%)</li>
+                        <li>Jika Merah Dominan, cek Rasio (> $thr_aspect_ratio), Solidity (< $thr_solidity) & Circularity (< $thr_circularity).</li>
+                        <li>Jika tidak ada warna kuat, diasumsikan Bawang Putih.</li>
+                    </ol>
+                    $model_note
+                    <p><b>Prediksi Final: $prediction</b></p>
+                    <p>Hash Konfigurasi: <code>$config_hash</code></p>
+                </div>
+            </div>
+        </div>
+
+""")
+
+SECTION_TIMING = Template("""\
+        <div class="step-card">
+            <div class="step-header">Tahap 5: Waktu Proses per Tahap</div>
+            <div class="step-content">
+                <div class="text-container">
+                    <table>
+                        <tr><th>Tahap</th><th>Waktu</th></tr>
+                        $timing_rows
+                        <tr><th>Total Pipeline</th><th>$total_ms ms</th></tr>
+                    </table>
+                </div>
+                <div class="text-container">
+                    <table>
+                        <tr><th>Info</th><th>Nilai</th></tr>
+                        <tr><td>Ukuran Citra</td><td>$width x $height px</td></tr>
+                        <tr><td>Resolusi Kerja</td><td>$work_width x $work_height px</td></tr>
+                        <tr><td>Jumlah Kontur</td><td>$contours</td></tr>
+                        <tr><td>Background Terdeteksi</td><td>$bg_detected</td></tr>
+                        <tr><td>Kontur Fallback</td><td>$fallback_text</td></tr>
+                        <tr><td>Cabang Keputusan</td><td>$branch</td></tr>
+                    </table>
+                </div>
+            </div>
+        </div>
+
+""")
+
+FOOT = Template("""\
+    </div>
+</body>
+</html>
+""")
+
+
+INDEX_HEAD = Template("""\
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Index Laporan Klasifikasi Bumbu</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f4f9; color: #333; padding: 20px; }
+        h1, h2 { color: #2c3e50; border-bottom: 2px solid #ddd; padding-bottom: 10px; }
+        table { width: 100%; border-collapse: collapse; font-size: 13px; background: white; }
+        th, td { border: 1px solid #ddd; padding: 6px; text-align: left; vertical-align: middle; }
+        th { background-color: #f2f2f2; }
+        td img { max-height: 80px; }
+        .error { color: #c0392b; }
+    </style>
+</head>
+<body>
+    <h1>Index Laporan Klasifikasi Bumbu</h1>
+    <p>Dibuat: $timestamp &mdash; sumber: $root</p>
+    <table>
+        <tr><th>#</th><th>Hasil</th><th>File</th><th>Prediksi</th><th>Merah</th><th>Hijau</th><th>Putih</th><th>Aspect Ratio</th><th>Solidity</th><th>Circularity</th></tr>
+""")
+
+INDEX_ROW = Template("""\
+        <tr><td>$index</td><td>$thumb</td><td>$file</td><td><b>$prediction</b></td><td>$pct_red%</td><td>$pct_green%</td><td>$pct_white%</td><td>$aspect_ratio</td><td>$solidity</td><td>$circularity</td></tr>
+""")
+
+INDEX_ERROR_ROW = Template("""\
+        <tr><td>$index</td><td></td><td>$file</td><td colspan="7" class="error">$error</td></tr>
+""")
+
+INDEX_FOOT = Template("""\
+    </table>
+    <h2>Ringkasan</h2>
+    <table>
+        <tr><th>Kelas</th><th>Jumlah</th></tr>
+        $summary_rows
+    </table>
+</body>
+</html>
+""")
+
+
+def thumbnail(img, max_height):
+    h, w = img.shape[:2]
+    if h <= max_height:
+        return img
+    size = (max(1, int(round(w * max_height / h))), max_height)
+    factor = h // max_height
+    if factor >= 2:
+        # INTER_AREA dengan faktor bulat memakai jalur cepat OpenCV (~5x lebih
+        # cepat pada 12 MP); sisa skala < 2x cukup dengan INTER_LINEAR
+        img = cv2.resize(img, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+        if img.shape[0] == max_height:
+            return img
+        return cv2.resize(img, size, interpolation=cv2.INTER_LINEAR)
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+class AssetWriter:
+    """Encode tiap citra unik sekali, sebagai data URI atau file sidecar.
+
+    Cache berbasis objek array saja: array yang sama (mis. features/final)
+    dipakai ulang apa pun ``max_height`` permintaan berikutnya, jadi minta
+    ukuran terbesar lebih dulu.
+    """
+
+    def __init__(self, sidecar_dir=None, rel_dir=None):
+        self.sidecar_dir = sidecar_dir
+        self.rel_dir = rel_dir
+        self.encode_seconds = 0.0
+        self._srcs = {}
+
+    def src(self, name, img, max_height=THUMB_HEIGHT, binary=False):
+        if img is None:
+            return ""
+        cached = self._srcs.get(id(img))
+        if cached is not None:
+            return cached[1]
+
+        t0 = time.perf_counter()
+        ext = ".png" if binary else ".jpg"
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 3] if binary else [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+        _, buffer = cv2.imencode(ext, thumbnail(img, max_height), params)
+        if self.sidecar_dir:
+            os.makedirs(self.sidecar_dir, exist_ok=True)
+            buffer.tofile(os.path.join(self.sidecar_dir, name + ext))
+            src = f"{self.rel_dir}/{name}{ext}"
+        else:
+            mime = "image/png" if binary else "image/jpeg"
+            src = f"data:{mime};base64,{base64.b64encode(buffer).decode('ascii')}"
+        self.encode_seconds += time.perf_counter() - t0
+        # Array ikut disimpan agar id() tidak dipakai ulang objek lain
+        self._srcs[id(img)] = (img, src)
+        return src
+
+
+def _asset_writer(path, assets):
+    if assets == "sidecar":
+        rel_dir = os.path.splitext(os.path.basename(path))[0] + "_files"
+        return AssetWriter(os.path.join(os.path.dirname(path) or ".", rel_dir), rel_dir)
+    return AssetWriter()
+
+
+def _timing_context(trace, encode_seconds):
+    tr = trace or {"stages": {}, "total": 0.0}
+    timing_rows = "".join(
+        f"<tr><td>{name}</td><td class=\"metric-value\">{sec * 1000:.2f} ms</td></tr>"
+        for name, sec in list(tr["stages"].items()) + [("report_encode", encode_seconds)]
+    )
+    fallback = tr.get("fallback_contours")
+    return {
+        "timing_rows": timing_rows,
+        "total_ms": f"{tr['total'] * 1000:.2f}",
+        "width": tr.get("width", "-"), "height": tr.get("height", "-"),
+        "work_width": tr.get("work_width", "-"), "work_height": tr.get("work_height", "-"),
+        "contours": tr.get("contours", "-"),
+        "bg_detected": "Ya" if tr.get("is_bg_detected") else "Tidak",
+        "fallback_text": f"merah {fallback['red']}, hijau {fallback['green']}" if fallback else "-",
+        "branch": tr.get("branch", "-"),
+    }
+
+
+def encode_assets(writer, stages):
+    """Encode semua citra yang ditampilkan laporan detail; mengembalikan {placeholder: src}."""
+    src = writer.src
+    # "final" lebih dulu (ukuran terbesar): "features" biasanya array yang sama
+    # dan cukup menunjuk ke file yang sama
+    final = src("final", stages.get("final"), FINAL_HEIGHT)
+    assets = {
+        "img_original": src("original", stages.get("original")),
+        "img_blur": src("blur", stages.get("blur")),
+        "img_hsv": src("hsv_v", stages.get("hsv_v")),
+        "img_features": src("features", stages.get("features")),
+        "img_final": final,
+    }
+    for name in BINARY_STAGES:
+        assets[f"img_{name}"] = src(name, stages.get(name), MASK_HEIGHT, binary=True)
+    return assets
+
+
+def _threshold_context(config):
+    # Teks ambang di laporan mengikuti konfigurasi yang benar-benar dipakai
+    cfg = config if config is not None else PipelineConfig()
+    model = os.path.basename(cfg.model_path) if cfg.model_path else ""
+    return {
+        "median_ksize": cfg.median_ksize,
+        "thr_green": f"{cfg.green_pct:g}", "thr_red": f"{cfg.red_pct:g}",
+        "thr_aspect_ratio": f"{cfg.aspect_ratio:g}", "thr_solidity": f"{cfg.solidity:g}",
+        "thr_circularity": f"{cfg.circularity:g}",
+        "model_note": f"<p><i>Keputusan akhir dibuat oleh model {html.escape(model)}; ambang di atas tidak dipakai.</i></p>"
+                      if model else "",
+    }
+
+
+def write_report(path, report, stages, trace=None, assets="inline", config=None):
+    """Tulis laporan detail satu gambar ke ``path`` secara streaming.
+
+    ``report`` berformat analysis_report, ``stages`` berisi citra per tahap
+    (key sesuai engine.STAGE_NAMES). ``assets`` = "inline" atau "sidecar".
+    ``config`` = PipelineConfig yang menghasilkan ``report`` (untuk teks
+    ambang; default PipelineConfig()). Mengembalikan lama encoding citra (detik).
+    """
+    r = report
+    e = html.escape
+    writer = _asset_writer(path, assets)
+    img = encode_assets(writer, stages)
+    thr = _threshold_context(config)
+    cfg_hash = e(r.get("config_hash") or "-")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEAD.substitute(timestamp=datetime.datetime.now().strftime("%d %B %Y, %H:%M WIB"),
+                                prediction=e(r["prediction"]), logic_path=e(r["logic_path"]), config_hash=cfg_hash))
+        f.write(SECTION_PREPROCESS.substitute(img, **thr))
+        f.write(SECTION_COLOR.substitute(
+            img,
+            pixels_r=r["pixels"]["R"], pixels_g=r["pixels"]["G"], pixels_w=r["pixels"]["W"],
+            pct_red=r["metrics"]["pct_red"], pct_green=r["metrics"]["pct_green"], pct_white=r["metrics"]["pct_white"]))
+        f.write(SECTION_SHAPE.substitute(img, **thr, aspect_ratio=r["aspect_ratio"], solidity=r["solidity"],
+                                         circularity=r["circularity"]))
+        f.write(SECTION_FINAL.substitute(img, **thr, pct_green=r["metrics"]["pct_green"],
+                                         pct_red=r["metrics"]["pct_red"], prediction=e(r["prediction"]),
+                                         config_hash=cfg_hash))
+        f.write(SECTION_TIMING.substitute(_timing_context(trace, writer.encode_seconds)))
+        f.write(FOOT.substitute())
+    return writer.encode_seconds
+
+
+# --- Mode batch: satu index untuk banyak gambar ---
+_classifier = None
+
+
+def _init_worker():
+    global _classifier
+    cv2.setNumThreads(1)
+    _classifier = SpiceClassifier()
+
+
+def _render_item(task):
+    # Dijalankan di worker: semua citra dibuang setelah baris index dibuat
+    index, path, out_dir, assets, detail = task
+    row = {"index": index, "file": html.escape(path)}
+    try:
+        image, _ = load_image(path)
+    except (OSError, ValueError) as e:
+        row["error"] = f"Gagal memuat gambar: {e}"
+        return row
+
+    try:
+        result = _classifier.classify(image, keep_stages=True)
+    except Exception as e:
+        # Gagal di pipeline hanya menggagalkan baris ini, bukan seluruh index
+        row["error"] = f"Gagal memproses gambar: {type(e).__name__}: {e}"
+        return row
+    report = result.to_report()
+    name = f"{index:06d}"
+    if assets == "sidecar":
+        thumbs = AssetWriter(os.path.join(out_dir, "index_files"), "index_files")
+    else:
+        thumbs = AssetWriter()
+    # Tanpa objek terdeteksi tidak ada tahap "final": thumbnail dari citra asli
+    stage = result.stages.get("final", result.stages["original"])
+    thumb = f'<img src="{thumbs.src(name, stage, INDEX_THUMB_HEIGHT)}" alt="{name}">'
+    if detail:
+        detail_path = os.path.join(out_dir, "reports", name + ".html")
+        write_report(detail_path, report, result.stages, result.trace, assets, _classifier.config)
+        thumb = f'<a href="reports/{name}.html">{thumb}</a>'
+
+    row.update(thumb=thumb, prediction=html.escape(report["prediction"]),
+               aspect_ratio=report["aspect_ratio"], solidity=report["solidity"],
+               circularity=report["circularity"], **report["metrics"])
+    return row
+
+
+def write_index(root, output, assets="sidecar", detail=False, workers=None):
+    out_dir = os.path.dirname(os.path.abspath(output))
+    if detail:
+        os.makedirs(os.path.join(out_dir, "reports"), exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = ((i, path, out_dir, assets, detail) for i, path in enumerate(iter_images(root), 1))
+
+    counts = Counter()
+    start = time.perf_counter()
+    pool = None
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(INDEX_HEAD.substitute(timestamp=datetime.datetime.now().strftime("%d %B %Y, %H:%M WIB"),
+                                      root=html.escape(root)))
+        try:
+            if workers == 1:
+                _init_worker()
+                rows = map(_render_item, tasks)
+            else:
+                pool = mp.Pool(workers, initializer=_init_worker)
+                # imap (berurutan) agar nomor baris index sesuai urutan file
+                rows = pool.imap(_render_item, tasks, chunksize=4)
+            for row in rows:
+                if "error" in row:
+                    counts["Gagal"] += 1
+                    f.write(INDEX_ERROR_ROW.substitute(row, error=html.escape(row["error"])))
+                else:
+                    counts[row["prediction"]] += 1
+                    f.write(INDEX_ROW.substitute(row))
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        labels = [c for c in CLASSES if counts[c]] + [c for c in counts if c not in CLASSES]
+        summary_rows = "".join(f"<tr><td>{c}</td><td>{counts[c]}</td></tr>" for c in labels)
+        f.write(INDEX_FOOT.substitute(summary_rows=summary_rows))
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    print(f"{total} gambar ditulis ke {output} dalam {elapsed:.2f} s", file=sys.stderr)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m report", description="Buat index laporan HTML untuk banyak gambar.")
+    parser.add_argument("root", help="Direktori atau file gambar.")
+    parser.add_argument("--output", "-o", default="laporan/index.html", help="File index HTML.")
+    parser.add_argument("--assets", choices=("sidecar", "inline"), default="sidecar",
+                        help="Simpan gambar sebagai file terpisah (default) atau inline base64.")
+    parser.add_argument("--detail", action="store_true", help="Tulis juga laporan detail per gambar.")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker.")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_index(args.root, args.output, args.assets, args.detail, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Layanan inferensi HTTP lokal (asyncio, tanpa dependensi tambahan).
+
+Contoh:
+    python -m server --port 8080 --workers 4
+
+Endpoint:
+    POST /classify   body = bytes gambar mentah (JPEG/PNG/WebP/BMP/TIFF), atau multipart/form-data
+                     (field "image" / file pertama). Balasan JSON dengan field
+                     yang sama seperti analysis_report di GUI.
+    GET  /health     status worker & antrean (termasuk RSS puncak per worker).
+
+Dengan ``--profiles FILE`` tiap request bisa memilih profil konfigurasi lewat
+query ``?profile=NAMA`` atau header ``X-Profile`` (mis. satu profil per
+kamera). File profil dimuat ulang otomatis tanpa restart server.
+
+Request dikumpulkan menjadi micro-batch (maks ``--batch-size`` gambar atau
+``--batch-window`` ms), dibagi rata ke semua worker, lalu dikirim ke pool
+proses yang sudah di-warm-up.
+Jika antrean penuh, server langsung membalas 503 (backpressure). Gambar yang
+hasil decode-nya melebihi ``--max-pixels`` ditolak dengan 413 sebelum decode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+
+import cv2
+import numpy as np
+
+from cache import CachedClassifier, ResultCache
+from engine import PipelineConfig, SpiceClassifier
+from ingest import MAX_PIXELS, ImageTooLarge, decode, working_target
+from instrumentation import peak_rss_mb
+from profiles import DEFAULT_PROFILE, check_overrides, check_profile, ProfiledClassifier, ProfileStore
+
+
+MAX_BODY_BYTES = 32 * 2 ** 20
+
+_classifiers = {}
+_profiles = None
+_config = None
+_cache = None
+_max_pixels = MAX_PIXELS
+
+
+# --- Sisi worker (proses terpisah) ---
+def _init_worker(config=None, cache_path=None, profiles_path=None, max_pixels=MAX_PIXELS):
+    global _profiles, _config, _cache, _max_pixels
+    cv2.setNumThreads(1)
+    _config = config
+    _max_pixels = max_pixels
+    _profiles = ProfileStore(profiles_path) if profiles_path else None
+    if cache_path:
+        # Tiap worker punya LRU memori sendiri; tingkat disk (SQLite) dipakai bersama.
+        # Key cache memuat hash konfigurasi, jadi aman dipakai bersama semua profil
+        _cache = ResultCache(disk_path=cache_path)
+
+
+def _get_classifier(profile):
+    clf = _classifiers.get(profile)
+    if clf is None:
+        if _profiles is not None:
+            _profiles.config(profile)   # KeyError jika profil tidak ada
+            clf = ProfiledClassifier(_profiles, profile)
+        else:
+            clf = SpiceClassifier(_config)
+        if _cache is not None:
+            clf = CachedClassifier(clf, _cache, shared=_profiles is not None)
+        clf = _classifiers[profile] = clf
+    return clf
+
+
+def _warmup():
+    # Memastikan proses worker sudah hidup & LUT sudah dibangun
+    _get_classifier(DEFAULT_PROFILE).classify(np.zeros((32, 32, 3), dtype=np.uint8))
+    return os.getpid()
+
+
+def classify_batch(items):
+    """Hasil per item beserta (pid, RSS puncak MB) worker yang memprosesnya."""
+    out = []
+    for data, profile in items:
+        try:
+            clf = _get_classifier(profile if _profiles is not None else DEFAULT_PROFILE)
+        except KeyError as e:
+            out.append({"error": e.args[0]})
+            continue
+        try:
+            image, factor = decode(data, working_target(clf.config), _max_pixels)
+        except ImageTooLarge as e:
+            out.append({"error": str(e), "status": 413})
+            continue
+        except ValueError as e:
+            out.append({"error": str(e)})
+            continue
+        try:
+            result = clf.classify(image, decode_factor=factor)
+        except Exception as e:
+            # Gagal di pipeline hanya menggagalkan item ini, bukan seluruh micro-batch
+            out.append({"error": f"Gagal memproses gambar: {e}", "status": 500})
+            continue
+        report = result.to_report()
+        report["detected"] = result.detected
+        report["cache_hit"] = getattr(clf, "last_hit", False)
+        out.append(report)
+    return (os.getpid(), peak_rss_mb()), out
+
+
+# --- Parsing HTTP minimal ---
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def extract_image(headers, body):
+    """Ambil bytes gambar dari body mentah atau multipart/form-data."""
+    ctype = headers.get("content-type", "")
+    if not ctype.startswith("multipart/form-data"):
+        return body
+
+    boundary = None
+    for param in ctype.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise HttpError(400, "Boundary multipart tidak ditemukan.")
+
+    fallback = None
+    for part in body.split(b"--" + boundary.encode("latin-1")):
+        head, sep, data = part.partition(b"\r\n\r\n")
+        if not sep:
+            continue
+        if data.endswith(b"\r\n"):
+            data = data[:-2]
+        head = head.decode("latin-1").lower()
+        if 'name="image"' in head:
+            return data
+        if fallback is None and "filename=" in head:
+            fallback = data
+    if fallback is None:
+        raise HttpError(400, "Tidak ada file gambar pada multipart.")
+    return fallback
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Request line tidak valid.")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Body melebihi {MAX_BODY_BYTES} byte.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def write_response(writer, status, payload, keep_alive=True, extra_headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+             "Content-Type: application/json; charset=utf-8",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    for key, value in (extra_headers or {}).items():
+        lines.append(f"{key}: {value}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+# --- Server ---
+class InferenceServer:
+    def __init__(self, workers=None, batch_size=8, batch_window_ms=5, queue_limit=256, config=None,
+                 cache_path=None, profiles_path=None, max_pixels=MAX_PIXELS):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.queue_limit = queue_limit
+        if profiles_path and config is not None:
+            raise ValueError("config tidak bisa dipakai bersama file profil; atur nilainya di file profil.")
+        self.config = config
+        self.cache_path = cache_path
+        self.profiles_path = profiles_path
+        self.max_pixels = max_pixels
+        self.pool = None
+        self.queue = None
+        self.inflight = 0
+        self.stats = {"requests": 0, "rejected": 0, "batches": 0, "errors": 0, "cache_hits": 0}
+        self.worker_rss = {}
+        self._batcher = None
+        self._slots = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(self.config, self.cache_path, self.profiles_path, self.max_pixels))
+        # Warm-up semua worker sebelum menerima request
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warmup) for _ in range(self.workers)))
+        self.queue = asyncio.Queue(maxsize=self.queue_limit)
+        # Maksimal 2 batch per worker sedang diproses agar antrean tetap di sisi server
+        self._slots = asyncio.Semaphore(self.workers * 2)
+        self._batcher = asyncio.create_task(self._batch_loop())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self.queue.get()
+            batch = [item]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Bagi rata ke semua worker: satu micro-batch utuh hanya memakai satu core
+            parts = min(self.workers, len(batch))
+            size = -(-len(batch) // parts)
+            for i in range(0, len(batch), size):
+                await self._slots.acquire()
+                asyncio.create_task(self._run_batch(batch[i:i + size]))
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        self.inflight += len(batch)
+        self.stats["batches"] += 1
+        try:
+            (pid, rss), results = await loop.run_in_executor(self.pool, classify_batch, [item for item, _ in batch])
+            self.worker_rss[pid] = rss
+            for (_, fut), res in zip(batch, results):
+                if res.get("cache_hit"):
+                    self.stats["cache_hits"] += 1
+                if not fut.done():
+                    fut.set_result(res)
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+        finally:
+            self.inflight -= len(batch)
+            self._slots.release()
+
+    async def classify(self, data, profile=DEFAULT_PROFILE):
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(((data, profile), fut))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise HttpError(503, "Antrean penuh, coba lagi.")
+        return await fut
+
+    def health(self):
+        return {"status": "ok", "workers": self.workers, "queue": self.queue.qsize(),
+                "queue_limit": self.queue_limit, "inflight": self.inflight, **self.stats,
+                "worker_peak_rss_mb": {str(pid): mb and round(mb, 1) for pid, mb in sorted(self.worker_rss.items())}}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    req = await read_request(reader)
+                except HttpError as e:
+                    write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if req is None:
+                    break
+                method, target, headers, body = req
+                path, _, query = target.partition("?")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra = 200, None, None
+                t0 = time.perf_counter()
+                try:
+                    if path == "/health":
+                        payload = self.health()
+                    elif path == "/classify":
+                        if method != "POST":
+                            raise HttpError(405, "Gunakan POST.")
+                        self.stats["requests"] += 1
+                        profile = (parse_qs(query).get("profile") or [headers.get("x-profile", DEFAULT_PROFILE)])[0]
+                        payload = await self.classify(extract_image(headers, body), profile)
+                        if "error" in payload:
+                            status = payload.pop("status", 400)
+                            if status >= 500:
+                                self.stats["errors"] += 1
+                        payload["latency_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+                    else:
+                        raise HttpError(404, "Endpoint tidak ditemukan.")
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                    if e.status == 503:
+                        extra = {"Retry-After": "1"}
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    status, payload = 500, {"error": str(e)}
+                write_response(writer, status, payload, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8080, **kwargs):
+    app = InferenceServer(**kwargs)
+    await app.start()
+    server = await asyncio.start_server(app.handle, host, port, limit=2 ** 20)
+    print(f"Server siap di http://{host}:{port} ({app.workers} worker)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await app.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m server", description="Layanan HTTP klasifikasi bumbu dapur.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker (default: jumlah core).")
+    parser.add_argument("--batch-size", type=int, default=8, help="Maksimal gambar per micro-batch.")
+    parser.add_argument("--batch-window", type=float, default=5, help="Waktu tunggu pengumpulan batch (ms).")
+    parser.add_argument("--queue-limit", type=int, default=256, help="Maksimal request menunggu sebelum 503.")
+    parser.add_argument("--working-size", type=int, default=0, help="Sisi terpanjang resolusi kerja (px).")
+    parser.add_argument("--cache", default=None, metavar="SQLITE",
+                        help="Aktifkan cache hasil (LRU memori + file SQLite ini).")
+    parser.add_argument("--model", default="", help="File model (python -m models train) pengganti decision tree.")
+    parser.add_argument("--profiles", default=None,
+                        help="File profil konfigurasi (JSON/TOML/YAML), dimuat ulang otomatis.")
+    parser.add_argument("--max-pixels", type=int, default=MAX_PIXELS,
+                        help="Batas piksel hasil decode per gambar; lebih besar dibalas 413 (0 = tanpa batas).")
+    args = parser.parse_args(argv)
+    error = None if not args.profiles else (
+        check_overrides({"--working-size": args.working_size, "--model": args.model}) or check_profile(args.profiles))
+    if error:
+        parser.error(error)
+
+    config = None if args.profiles else PipelineConfig(working_long_side=args.working_size, model_path=args.model)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, batch_size=args.batch_size,
+                          batch_window_ms=args.batch_window, queue_limit=args.queue_limit, config=config,
+                          cache_path=args.cache, profiles_path=args.profiles,
+                          max_pixels=args.max_pixels))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Klasifikasi real-time dari file video atau kamera (cv2.VideoCapture).
+
+Contoh:
+    python -m stream video.mp4 --window 7 --working-size 640
+    python -m stream 0                     # kamera /dev/video0
+
+Arsitektur:
+  * thread pembaca mengambil frame ke antrean berukuran kecil; bila antrean
+    penuh, frame TERLAMA dibuang (dihitung sebagai dropped) sehingga pipeline
+    selalu memproses frame terbaru
+  * thread klasifikasi menjalankan pipeline lalu menghaluskan label
+    (majority vote atau EMA atas beberapa prediksi terakhir) agar tidak berkedip
+  * konsumen (GUI/CLI) cukup membaca ``latest`` kapan pun ia mau refresh
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import cv2
+
+from engine import PipelineConfig
+from profiles import DEFAULT_PROFILE, check_overrides, check_profile, open_classifier
+
+
+class TemporalSmoother:
+    """Penghalus label: ``mode="vote"`` (mayoritas N terakhir) atau ``"ema"``."""
+
+    def __init__(self, mode="vote", window=5, alpha=0.3):
+        if mode not in ("vote", "ema"):
+            raise ValueError(f"Mode smoothing tidak dikenal: {mode}")
+        self.mode = mode
+        self.alpha = alpha
+        self.history = deque(maxlen=max(1, window))
+        self.scores = {}
+
+    def update(self, prediction):
+        if self.mode == "ema":
+            for label in set(self.scores) | {prediction}:
+                target = 1.0 if label == prediction else 0.0
+                self.scores[label] = (1 - self.alpha) * self.scores.get(label, 0.0) + self.alpha * target
+            return max(self.scores, key=self.scores.get)
+
+        self.history.append(prediction)
+        counts = Counter(self.history)
+        best = max(counts.values())
+        # Seri: pilih label terbaru di antara kandidat teratas
+        for label in reversed(self.history):
+            if counts[label] == best:
+                return label
+
+    def reset(self):
+        self.history.clear()
+        self.scores.clear()
+
+
+def open_capture(source):
+    # Angka = index kamera (V4L2), selain itu path file / URL
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Gagal membuka sumber video: {source}")
+    return cap
+
+
+class StreamClassifier:
+    def __init__(self, source, config=None, smoother=None, keep_stages=False, queue_size=2,
+                 realtime=True, on_result=None, profiles=None, profile=DEFAULT_PROFILE):
+        self.source = source
+        # Dengan profiles (path file profil) konfigurasi ikut dimuat ulang saat file berubah
+        self.classifier = open_classifier(profiles, profile, config)
+        self.smoother = smoother if smoother is not None else TemporalSmoother()
+        self.keep_stages = keep_stages
+        self.on_result = on_result
+        # File dibaca sesuai FPS aslinya (meniru kamera) kecuali realtime=False;
+        # kamera memang sudah real-time
+        self.realtime = realtime
+
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._latest = None
+        self._seq = 0
+
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.started_at = None
+        self.finished = threading.Event()
+
+    # --- Thread pembaca ---
+    def _read_loop(self, cap):
+        is_file = not (isinstance(self.source, int) or str(self.source).isdigit())
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        interval = 1.0 / fps if (self.realtime and is_file and fps > 0) else 0.0
+        next_t = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                self.captured += 1
+                self._put_latest(frame)
+                if interval:
+                    next_t += interval
+                    delay = next_t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            cap.release()
+            self._put_latest(None)   # sentinel akhir stream
+
+    def _put_latest(self, frame):
+        # Hanya ada satu produsen, jadi setelah membuang frame terlama put pasti berhasil
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    if self.frames.get_nowait() is not None:
+                        self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    # --- Thread klasifikasi ---
+    def _process_loop(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    frame = self.frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if frame is None:
+                    break
+                result = self.classifier.classify(frame, keep_stages=self.keep_stages)
+                label = self.smoother.update(result.prediction) if result.detected else None
+                self.processed += 1
+                with self._lock:
+                    self._seq += 1
+                    self._latest = (self._seq, frame, result, label)
+                if self.on_result is not None:
+                    self.on_result(frame, result, label)
+        finally:
+            self.finished.set()
+
+    def start(self):
+        cap = open_capture(self.source)
+        self.started_at = time.perf_counter()
+        self._threads = [threading.Thread(target=self._read_loop, args=(cap,), daemon=True),
+                         threading.Thread(target=self._process_loop, daemon=True)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    @property
+    def latest(self):
+        """(seq, frame, result, label_halus) terakhir, atau None."""
+        with self._lock:
+            return self._latest
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "elapsed_s": round(elapsed, 3),
+            "fps": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m stream", description="Klasifikasi bumbu dari video/kamera.")
+    parser.add_argument("source", help="Path file video, URL, atau index kamera (mis. 0).")
+    parser.add_argument("--smoothing", choices=("vote", "ema"), default="vote")
+    parser.add_argument("--window", type=int, default=5, help="Jumlah prediksi untuk majority vote.")
+    parser.add_argument("--alpha", type=float, default=0.3, help="Faktor EMA.")
+    parser.add_argument("--working-size", type=int, default=0, help="Sisi terpanjang resolusi kerja (px).")
+    parser.add_argument("--no-pacing", action="store_true",
+                        help="Baca file video secepat mungkin (default: sesuai FPS aslinya).")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Hanya tampilkan ringkasan akhir.")
+    parser.add_argument("--profiles", default=None,
+                        help="File profil konfigurasi (JSON/TOML/YAML), dimuat ulang otomatis.")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Nama profil yang dipakai.")
+    args = parser.parse_args(argv)
+    error = None if not args.profiles else (check_overrides({"--working-size": args.working_size})
+                                            or check_profile(args.profiles, args.profile))
+    if error:
+        parser.error(error)
+
+    def report(frame, result, label):
+        if not args.quiet:
+            print(f"{result.prediction:<14} -> {label or '-'}", flush=True)
+
+    config = None if args.profiles else PipelineConfig(working_long_side=args.working_size)
+    stream = StreamClassifier(args.source, config,
+                              TemporalSmoother(args.smoothing, args.window, args.alpha),
+                              realtime=not args.no_pacing, on_result=report,
+                              profiles=args.profiles, profile=args.profile).start()
+    try:
+        while not stream.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+
+    s = stream.stats()
+    print(f"{s['processed']} frame diproses, {s['dropped']} dibuang, {s['fps']} FPS "
+          f"({s['elapsed_s']} s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import csv
+
+import cv2
+import numpy as np
+
+import batch
+from engine import SpiceClassifier
+
+
+def test_pipeline_error_is_written_per_row(tmp_path, monkeypatch):
+    for name in ("a.png", "b.png"):
+        cv2.imwrite(str(tmp_path / name), np.zeros((32, 32, 3), dtype=np.uint8))
+    real = SpiceClassifier.classify
+    calls = []
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        calls.append(image.shape)
+        if len(calls) == 1:
+            raise RuntimeError("rusak")
+        return real(self, image, keep_stages)
+
+    monkeypatch.setattr(SpiceClassifier, "classify", classify)
+    out = tmp_path / "hasil.csv"
+    count, _ = batch.run_classify(str(tmp_path), str(out), workers=1)
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert count == 2 and len(rows) == 2
+    assert "rusak" in rows[0]["error"]
+    assert rows[1]["error"] == "" and rows[1]["prediction"]
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from cache import CachedClassifier, ResultCache
+from engine import CLASSES, PipelineConfig, SpiceClassifier, config_hash
+from instrumentation import Instrumentation
+from models import FEATURE_NAMES, LogisticModel, save_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hit_does_not_return_stale_trace(tmp_path):
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    image[8:24, 8:24] = (0, 0, 200)
+    clf = SpiceClassifier(instrumentation=Instrumentation())
+    for disk_path in (None, str(tmp_path / "cache.sqlite")):
+        cached = CachedClassifier(clf, ResultCache(disk_path=disk_path))
+        miss = cached.classify(image)
+        assert not cached.last_hit and miss.trace is not None
+        hit = cached.classify(image)
+        assert cached.last_hit and hit.trace is None
+        assert hit.prediction == miss.prediction
+
+
+def _red(size=32, seed=0):
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    image[8:24, 8:24] = (0, 0, 200)
+    image[0, 0] = seed
+    return image
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("c:a", {"v": 1})
+    cache.put("c:b", {"v": 2})
+    assert cache.get("c:a") == ({"v": 1}, None)     # a jadi paling baru dipakai
+    cache.put("c:c", {"v": 3})
+    assert cache.get("c:b") is None
+    assert cache.get("c:a") is not None and cache.get("c:c") is not None
+    assert cache.stats()["evictions_memory"] == 1
+
+
+def test_config_change_invalidates_old_entries(tmp_path):
+    cache = ResultCache(disk_path=str(tmp_path / "cache.sqlite"))
+    cached = CachedClassifier(SpiceClassifier(), cache)
+    cached.classify(_red())
+    assert cache.stats()["disk_entries"] == 1
+
+    cached.classifier = SpiceClassifier(PipelineConfig(red_pct=30))
+    stats = cache.stats()
+    assert stats["invalidated"] == 2 and stats["memory_entries"] == 0 and stats["disk_entries"] == 0
+    cached.classify(_red())
+    assert not cached.last_hit
+
+
+def test_retrained_model_changes_key(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, len(FEATURE_NAMES))).astype(np.float32)
+    y = np.asarray(CLASSES)[np.arange(40) % len(CLASSES)]
+    path = str(tmp_path / "model.npz")
+    save_model(LogisticModel().fit(X, y, epochs=10), path)
+    config = PipelineConfig(model_path=path)
+    before = config_hash(config)
+    assert before == config_hash(PipelineConfig(model_path=path))
+
+    cache = ResultCache(disk_path=str(tmp_path / "cache.sqlite"))
+    CachedClassifier(SpiceClassifier(config), cache).classify(_red())
+    # Dilatih ulang di path yang sama
+    save_model(LogisticModel().fit(X, y[::-1], epochs=10), path)
+    assert config_hash(config) != before
+    cached = CachedClassifier(SpiceClassifier(config), cache)
+    cached.classify(_red())
+    assert not cached.last_hit
+
+
+def test_second_process_reuses_disk_tier(tmp_path):
+    disk_path = str(tmp_path / "cache.sqlite")
+    image_path = str(tmp_path / "gambar.npy")
+    np.save(image_path, _red(seed=7))
+    cache = ResultCache(disk_path=disk_path)
+    first = CachedClassifier(SpiceClassifier(), cache).classify(np.load(image_path))
+    cache.close()
+
+    script = (
+        "import json, sys\n"
+        "import numpy as np\n"
+        "from cache import CachedClassifier, ResultCache\n"
+        "from engine import SpiceClassifier\n"
+        "cache = ResultCache(disk_path=sys.argv[1])\n"
+        "cached = CachedClassifier(SpiceClassifier(), cache)\n"
+        "result = cached.classify(np.load(sys.argv[2]))\n"
+        "print(json.dumps({'hit': cached.last_hit, 'stats': cache.stats(), 'prediction': result.prediction,\n"
+        "                  'pixels_red': result.pixels_red}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    out = subprocess.run([sys.executable, "-c", script, disk_path, image_path], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    second = json.loads(out)
+    assert second["hit"] and second["stats"]["hits_disk"] == 1 and second["stats"]["misses"] == 0
+    assert (second["prediction"], second["pixels_red"]) == (first.prediction, first.pixels_red)
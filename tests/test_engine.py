@@ -0,0 +1,224 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from engine import MORPH_MAX_MIXED, MORPH_TILE_MIN_PIXELS, PipelineConfig, PipelineContext, SpiceClassifier, mask_nonzero
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 7), (7, 1), (1, 4), (4, 1)])
+@pytest.mark.parametrize("keep_stages", [False, True])
+def test_tiny_images(shape, keep_stages):
+    # Regresi: cv2.compare(labels, 0, ...) gagal pada citra 1x1
+    image = np.full(shape + (3,), (0, 0, 255), dtype=np.uint8)
+    clf = SpiceClassifier()
+    result = clf.classify(image, keep_stages=keep_stages)
+    assert result.prediction
+    multi = clf.classify_objects(image, keep_stages=keep_stages)
+    assert multi.objects == []
+
+
+def test_logic_path_follows_config():
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[16:48, 16:48] = (0, 200, 0)
+    result = SpiceClassifier(PipelineConfig(green_pct=5)).classify(image)
+    assert result.branch == "green"
+    assert ">5%" in result.logic_path and "10%" not in result.logic_path
+
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+
+
+def _dataset_images(long_side=None):
+    for name in sorted(os.listdir(DATASET)):
+        image = cv2.imread(os.path.join(DATASET, name))
+        if image is None:
+            continue
+        if long_side:
+            s = long_side / max(image.shape[:2])
+            image = cv2.resize(image, None, fx=s, fy=s, interpolation=cv2.INTER_CUBIC)
+        yield name, image
+
+
+def _pct_diff(a, b):
+    return max(abs(getattr(a, k) - getattr(b, k)) for k in ("pct_red", "pct_green", "pct_white"))
+
+
+@pytest.mark.parametrize("working", [256, 512, 1024])
+def test_working_resolution_tolerance(working):
+    # Kondisi toleransi yang didokumentasikan di PipelineConfig (tanpa refine)
+    full, work = SpiceClassifier(), SpiceClassifier(PipelineConfig(working_long_side=working))
+    for name, image in _dataset_images():
+        a, b = full.classify(image), work.classify(image)
+        assert b.prediction == a.prediction, name
+        assert _pct_diff(a, b) <= 2.5, name
+        assert b.aspect_ratio == pytest.approx(a.aspect_ratio, rel=0.03), name
+        assert abs(b.solidity - a.solidity) <= 0.07, name
+        assert abs(b.circularity - a.circularity) <= 0.2, name
+
+
+def test_refine_matches_full_resolution():
+    # bawang-putih-1 diperbesar: objek resolusi penuh melewati ROI awal refine
+    full = SpiceClassifier()
+    refine = SpiceClassifier(PipelineConfig(working_long_side=256, refine_full_res=True))
+    for name, image in _dataset_images(long_side=2048):
+        a, b = full.classify(image), refine.classify(image)
+        assert _pct_diff(a, b) <= 0.1, name
+        assert b.bbox == a.bbox, name
+        assert abs(b.solidity - a.solidity) <= 0.01 and abs(b.circularity - a.circularity) <= 0.01, name
+
+
+def test_object_mask_matches_classify():
+    image = np.zeros((64, 96, 3), dtype=np.uint8)
+    image[16:48, 16:80] = (0, 0, 200)
+    clf = SpiceClassifier()
+    blur, labels, mask = clf.object_mask(image)
+    result = clf.classify(image)
+    assert blur.shape == image.shape and labels.shape == mask.shape == image.shape[:2]
+    x, y, w, h = cv2.boundingRect(mask)
+    assert (x, y, w, h) == tuple(result.bbox)
+    assert clf.object_mask(np.zeros_like(image)) is None
+
+
+def _random_mask(seed, shape=(1531, 1400)):
+    # Objek acak yang jarang (termasuk di tepi citra), satu objek besar
+    # (tile seragam 255) + satu area noise
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(shape, dtype=np.uint8)
+    h, w = shape
+    y, x = int(rng.integers(0, h - 400)), int(rng.integers(0, w - 400))
+    mask[y:y + 400, x:x + 400] = 255
+    for _ in range(6):
+        x, y = int(rng.integers(-20, w + 20)), int(rng.integers(-20, h + 20))
+        if rng.random() < 0.5:
+            cv2.circle(mask, (x, y), int(rng.integers(3, 40)), 255, -1)
+        else:
+            cv2.rectangle(mask, (x, y), (x + int(rng.integers(1, 60)), y + int(rng.integers(1, 60))), 255, -1)
+    y, x = int(rng.integers(0, h - 100)), int(rng.integers(0, w - 100))
+    mask[y:y + 100, x:x + 100] = np.where(rng.random((100, 100)) < 0.5, 255, 0)
+    return mask
+
+
+@pytest.mark.parametrize("ksize", [3, 5, 9])
+@pytest.mark.parametrize("close_iterations,open_iterations", [(1, 1), (2, 1), (3, 0), (0, 2)])
+def test_tiled_morphology_matches_full_frame(ksize, close_iterations, open_iterations, monkeypatch):
+    clf = SpiceClassifier(PipelineConfig(close_iterations=close_iterations, open_iterations=open_iterations))
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (ksize, ksize))
+    full_calls = []
+    full = clf._morphology_full
+    monkeypatch.setattr(clf, "_morphology_full",
+                        lambda m, k, out=None: full_calls.append(m.shape) or full(m, k, out))
+    for seed in range(3):
+        mask = _random_mask(seed)
+        assert mask.size >= MORPH_TILE_MIN_PIXELS
+        expected = full(mask.copy(), kernel)
+        full_calls.clear()
+        out = np.empty_like(mask)
+        assert clf._morphology(mask, kernel, out) is out
+        # Jalur tile benar-benar dipakai: tidak ada pass frame penuh
+        assert full_calls and mask.shape not in full_calls
+        assert np.array_equal(out, expected)
+        assert np.array_equal(clf._morphology(mask, kernel), expected)
+
+
+def test_morphology_falls_back_when_mostly_mixed(monkeypatch):
+    clf = SpiceClassifier()
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    rng = np.random.default_rng(0)
+    mask = np.zeros((1531, 1400), dtype=np.uint8)
+    # Noise di > MORPH_MAX_MIXED bagian citra
+    rows = int(mask.shape[0] * (MORPH_MAX_MIXED + 0.15))
+    mask[:rows] = np.where(rng.random((rows, mask.shape[1])) < 0.3, 255, 0)
+    full_calls = []
+    full = clf._morphology_full
+    monkeypatch.setattr(clf, "_morphology_full",
+                        lambda m, k, out=None: full_calls.append(m.shape) or full(m, k, out))
+    out = clf._morphology(mask, kernel)
+    assert full_calls == [mask.shape]
+    assert np.array_equal(out, full(mask.copy(), kernel))
+
+
+def test_early_background_skips_morphology():
+    image = np.full((1531, 1400, 3), 255, dtype=np.uint8)
+    cv2.circle(image, (700, 700), 200, (0, 0, 200), -1)
+    full, early = SpiceClassifier(), SpiceClassifier(PipelineConfig(early_background=True))
+    ksize, kernel, _ = full._params(1.0)
+
+    # Frame background (> bg_ratio piksel berlabel): mask global tidak dihitung
+    _, labels, combined = early._segment(image, ksize, kernel, timed=False, early_background=True)
+    assert combined is None and cv2.countNonZero(labels) > early.config.bg_ratio * labels.size
+    a, b = full.classify(image), early.classify(image)
+    assert b.is_bg_detected and (b.prediction, b.pixels_red, b.pixels_white, b.bbox) == \
+        (a.prediction, a.pixels_red, a.pixels_white, a.bbox)
+
+    # Frame biasa: early_background sama dengan jalur penuh
+    image[:] = 0
+    cv2.circle(image, (700, 700), 200, (0, 0, 200), -1)
+    _, labels, combined = early._segment(image, ksize, kernel, timed=False, early_background=True)
+    assert np.array_equal(combined, full._morphology_full(mask_nonzero(labels), kernel))
+    assert early.classify(image).pixels_red == full.classify(image).pixels_red
+
+
+@pytest.mark.parametrize("working_long_side", [0, 128])
+def test_context_reuses_buffers(working_long_side):
+    def image(w, h):
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+        cv2.ellipse(img, (w // 2, h // 2), (w // 3, h // 4), 20, 0, 360, (0, 0, 200), -1)
+        return img
+
+    ctx = PipelineContext(max_shapes=2)
+    clf = SpiceClassifier(PipelineConfig(working_long_side=working_long_side), context=ctx)
+    # Rasio sisi berbeda: resolusi kerja juga berbeda saat working_long_side diisi
+    small, large, other = image(320, 240), image(480, 320), image(400, 400)
+
+    clf.classify(small)
+    first = ctx.allocations
+    assert first > 0
+    for _ in range(3):
+        clf.classify(small)
+    assert ctx.allocations == first
+
+    # Ukuran baru: buffer dialokasikan sekali, lalu dipakai ulang
+    clf.classify(large)
+    grown = ctx.allocations
+    assert grown > first
+    for img in (large, small, large, small):
+        clf.classify(img)
+    assert ctx.allocations == grown
+    # keep_stages tidak memakai buffer konteks
+    clf.classify(small, keep_stages=True)
+    assert ctx.allocations == grown
+
+    # Resolusi ketiga menggeser yang paling lama; jumlah grup dibatasi max_shapes
+    for img in (other, small, large, other):
+        clf.classify(img)
+        assert len(ctx._groups) <= ctx.max_shapes
+    assert ctx.allocations > grown
+
+
+def test_classify_objects_separates_classes():
+    image = np.zeros((300, 400, 3), dtype=np.uint8)
+    cv2.rectangle(image, (20, 40), (59, 199), (0, 0, 200), -1)        # merah, memanjang
+    cv2.rectangle(image, (100, 40), (139, 199), (0, 200, 0), -1)      # hijau
+    cv2.circle(image, (250, 100), 40, (0, 0, 200), -1)                # merah, bulat
+    cv2.circle(image, (330, 220), 35, (230, 230, 230), -1)            # putih
+    drawn = {  # kelas -> (bbox, channel, luas digambar)
+        "CABAI MERAH": ((20, 40, 40, 160), "pixels_red", 40 * 160),
+        "CABAI HIJAU": ((100, 40, 40, 160), "pixels_green", 40 * 160),
+        "BAWANG MERAH": ((211, 61, 79, 79), "pixels_red", 5025),
+        "BAWANG PUTIH": ((296, 186, 69, 69), "pixels_white", 3853),
+    }
+
+    result = SpiceClassifier().classify_objects(image)
+    assert not result.is_bg_detected
+    assert result.counts == {c: 1 for c in drawn}
+    assert sorted(o.prediction for o in result.objects) == sorted(drawn)
+    for obj in result.objects:
+        bbox, channel, area = drawn[obj.prediction]
+        assert tuple(obj.bbox) == bbox, obj.prediction
+        # Sudut persegi sedikit membulat oleh median blur & morfologi
+        assert abs(getattr(obj, channel) - area) <= 0.01 * area, obj.prediction
+        others = {"pixels_red", "pixels_green", "pixels_white"} - {channel}
+        assert all(getattr(obj, name) == 0 for name in others), obj.prediction
+        assert obj.area == getattr(obj, channel)
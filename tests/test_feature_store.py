@@ -0,0 +1,68 @@
+import os
+
+import cv2
+import numpy as np
+
+from feature_store import FeatureStore
+
+
+def _write(path, color):
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[16:48, 8:56] = color
+    cv2.imwrite(str(path), image)
+
+
+def test_rerun_with_different_path_spelling(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    data.mkdir()
+    for i in range(3):
+        _write(data / f"cabai-merah-{i}.png", (0, 0, 200))
+    monkeypatch.chdir(tmp_path)
+    store = FeatureStore(str(tmp_path / "store"))
+    try:
+        assert store.update("data", workers=1)["added"] == 3
+        for root in (str(data), "./data/", os.path.join("data", "..", "data")):
+            assert store.update(root, workers=1) == {"added": 0, "updated": 0, "unchanged": 3, "failed": 0}
+        assert len(store) == 3
+        assert len(store.matrix(["pct_red"], root="data")[1]) == 3
+        assert len(store.matrix(["pct_red"], root=str(data))[1]) == 3
+    finally:
+        store.close()
+
+
+def test_modified_file_invalidates_old_row(tmp_path):
+    path = tmp_path / "cabai-hijau-1.png"
+    _write(path, (0, 0, 200))
+    store = FeatureStore(str(tmp_path / "store"))
+    try:
+        store.update(str(tmp_path), workers=1)
+        _write(path, (0, 200, 0))
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        assert store.update(str(tmp_path), workers=1)["updated"] == 1
+        assert list(store.column("valid")) == [0, 1]
+        X, y = store.matrix(["pct_green"])
+        assert len(y) == 1 and X[0, 0] > 50
+    finally:
+        store.close()
+
+
+def test_legacy_manifest_paths_are_normalized(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    _write(tmp_path / "data" / "cabai-merah-1.png", (0, 0, 200))
+    monkeypatch.chdir(tmp_path)
+    store = FeatureStore(str(tmp_path / "store"))
+    store.update("data", workers=1)
+    # Manifest versi lama: path relatif & absolut untuk file yang sama
+    row = store._db.execute("SELECT mtime_ns, size FROM files").fetchone()
+    store._db.execute("DELETE FROM files")
+    store._db.execute("INSERT INTO files VALUES (?, ?, ?, 0)", ("data/cabai-merah-1.png", *row))
+    store._db.execute("DELETE FROM meta WHERE key = 'paths'")
+    store._db.commit()
+    store.close()
+
+    store = FeatureStore(str(tmp_path / "store"))
+    try:
+        assert store.update(str(tmp_path / "data"), workers=1)["unchanged"] == 1
+        assert len(store) == 1
+    finally:
+        store.close()
@@ -0,0 +1,89 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from engine import PipelineConfig, SpiceClassifier
+from ingest import ImageTooLarge, decode, probe
+
+
+def _jpeg_with_object():
+    image = np.full((1536, 2048, 3), 255, dtype=np.uint8)
+    cv2.ellipse(image, (1000, 760), (600, 180), 15, 0, 360, (0, 0, 200), -1)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+
+def test_reduced_decode_keeps_source_units():
+    data = _jpeg_with_object()
+    clf = SpiceClassifier(PipelineConfig(working_long_side=256))
+    full, full_factor = decode(data)
+    reduced, factor = decode(data, 256)
+    assert full_factor == 1 and factor == 8
+    assert reduced.shape[1] == 256
+
+    a = clf.classify(full)
+    b = clf.classify(reduced, decode_factor=factor)
+    assert b.decode_factor == factor and b.prediction == a.prediction
+    assert b.pixels_red == pytest.approx(a.pixels_red, rel=0.05)
+    assert np.allclose(b.bbox, a.bbox, atol=0.02 * full.shape[1])
+
+    ma = clf.classify_objects(full)
+    mb = clf.classify_objects(reduced, decode_factor=factor)
+    assert len(ma.objects) == len(mb.objects) == 1
+    assert mb.objects[0].area == pytest.approx(ma.objects[0].area, rel=0.05)
+
+
+def _encode(ext, channels=3, params=()):
+    image = np.zeros((37, 53, channels), dtype=np.uint8)
+    image[..., 2] = 200
+    if channels == 4:
+        image[..., 3] = 128
+    return cv2.imencode(ext, image, list(params))[1].tobytes()
+
+
+@pytest.mark.parametrize("ext,channels,params,fmt,chunk", [
+    (".webp", 3, (cv2.IMWRITE_WEBP_QUALITY, 80), "webp", b"VP8 "),
+    (".webp", 3, (cv2.IMWRITE_WEBP_QUALITY, 101), "webp", b"VP8L"),    # > 100 = lossless
+    (".webp", 4, (cv2.IMWRITE_WEBP_QUALITY, 80), "webp", b"VP8X"),     # alpha lossy
+    (".bmp", 3, (), "bmp", None),
+    (".tif", 3, (), "tiff", None),
+    (".png", 3, (), "png", None),
+    (".jpg", 3, (), "jpeg", None),
+])
+def test_probe_formats(ext, channels, params, fmt, chunk):
+    data = _encode(ext, channels, params)
+    if chunk is not None:
+        assert data[12:16] == chunk
+    info = probe(data)
+    assert (info.format, info.width, info.height, info.orientation) == (fmt, 53, 37, 1)
+    image, factor = decode(data)
+    assert image.shape == (37, 53, 3) and factor == 1
+
+
+def test_probe_jpeg_exif_orientation():
+    data = _encode(".jpg")
+    # APP1 Exif: TIFF little-endian, IFD0 dengan satu tag Orientation (SHORT) = 6
+    tiff = b"II*\x00" + struct.pack("<I", 8) + struct.pack("<H", 1) + \
+        struct.pack("<HHIHH", 0x0112, 3, 1, 6, 0) + struct.pack("<I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    data = data[:2] + app1 + data[2:]
+    info = probe(data)
+    assert (info.format, info.width, info.height, info.orientation) == ("jpeg", 53, 37, 6)
+    # Decoder menerapkan orientasi: lebar & tinggi tertukar
+    image, _ = decode(data)
+    assert image.shape[:2] == (53, 37)
+
+
+def test_decode_rejects_oversize_before_decode(monkeypatch):
+    data = _encode(".png")
+    monkeypatch.setattr(cv2, "imdecode", lambda *a: pytest.fail("imdecode tidak boleh dipanggil"))
+    with pytest.raises(ImageTooLarge):
+        decode(data, max_pixels=37 * 53 - 1)
+
+
+@pytest.mark.parametrize("data", [b"", b"bukan gambar", _encode(".png")[:20], _encode(".jpg")[:30]])
+def test_probe_rejects_unknown_or_truncated(data):
+    with pytest.raises(ValueError):
+        probe(data)
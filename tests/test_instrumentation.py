@@ -0,0 +1,97 @@
+import re
+
+import cv2
+import numpy as np
+import pytest
+
+from engine import STAGE_NAMES, PipelineConfig, SpiceClassifier
+from instrumentation import (CallbackInstrumentation, MultiInstrumentation, PrometheusExporter, StatsDExporter,
+                             parse_statsd_address)
+from jobs import PIPELINE_STAGES
+
+
+def _image():
+    image = np.zeros((300, 400, 3), dtype=np.uint8)
+    cv2.ellipse(image, (200, 150), (120, 40), 10, 0, 360, (0, 0, 200), -1)
+    return image
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr):
+        self.sent.append((data.decode("ascii"), addr))
+
+
+@pytest.mark.parametrize("config,skipped", [
+    (PipelineConfig(), {"resize", "refine"}),
+    (PipelineConfig(working_long_side=128, refine_full_res=True), set()),
+])
+def test_trace_times_every_stage(config, skipped):
+    calls, frames = [], []
+    clf = SpiceClassifier(config, instrumentation=CallbackInstrumentation(
+        on_stage=lambda name, sec: calls.append(name), on_frame=frames.append))
+    result = clf.classify(_image(), keep_stages=True)
+    assert set(result.stages) == set(STAGE_NAMES)
+
+    trace = result.trace
+    assert frames == [trace]
+    assert list(trace["stages"]) == [s for s in PIPELINE_STAGES if s not in skipped]
+    assert calls == list(trace["stages"])
+    assert all(sec >= 0 for sec in trace["stages"].values())
+    assert sum(trace["stages"].values()) <= trace["total"]
+    assert (trace["width"], trace["height"]) == (400, 300)
+    assert trace["detected"] and trace["prediction"] == result.prediction and trace["branch"] == result.branch
+    if config.working_long_side:
+        assert (trace["work_width"], trace["work_height"]) == (128, 96)
+
+    # Tanpa keep_stages tidak ada citra tahap yang dibuat atau digambar
+    fast = clf.classify(_image()).trace
+    assert "stage_images" not in fast["stages"] and "render" not in fast["stages"]
+
+
+def test_statsd_format():
+    exporter = parse_statsd_address("localhost:9125")
+    assert exporter.addr == ("localhost", 9125) and parse_statsd_address(":8126").addr == ("127.0.0.1", 8126)
+    exporter.sock.close()
+    exporter.sock = _FakeSocket()
+    clf = SpiceClassifier(instrumentation=MultiInstrumentation(exporter, None))
+    result = clf.classify(_image())
+
+    (payload, addr), = exporter.sock.sent
+    assert addr == ("localhost", 9125)
+    lines = payload.split("\n")
+    for line in lines:
+        assert re.fullmatch(r"spice\.[a-z_.]+:\d+(\.\d+)?\|(ms|h|c)", line), line
+    stages = [line.split(":")[0][len("spice.stage."):] for line in lines if line.startswith("spice.stage.")]
+    assert stages == list(result.trace["stages"])
+    assert f"spice.frame:{result.trace['total'] * 1000:.3f}|ms" in lines
+    assert f"spice.branch.{result.branch}:1|c" in lines
+    assert ("spice.bg_detected:1|c" in lines) == result.is_bg_detected
+
+
+def test_prometheus_format():
+    exporter = PrometheusExporter(prefix="uji")
+    clf = SpiceClassifier(instrumentation=exporter)
+    background = np.full((300, 400, 3), 255, dtype=np.uint8)
+    cv2.circle(background, (200, 150), 60, (0, 0, 200), -1)
+    results = [clf.classify(_image()), clf.classify(_image()), clf.classify(background)]
+    text = exporter.render()
+    assert text.endswith("\n")
+
+    sample = re.compile(r'uji_[a-z_]+(\{[^}]*\})? \d+(\.\d+)?')
+    for line in text.splitlines():
+        assert line.startswith("# TYPE ") or sample.fullmatch(line), line
+
+    # Histogram kumulatif: bucket +Inf = _count = jumlah frame
+    for stage in ("blur", "labels", "morphology", "contours", "total"):
+        buckets = [int(v) for v in re.findall(rf'uji_stage_seconds_bucket\{{stage="{stage}",le="[^"]+"\}} (\d+)',
+                                              text)]
+        assert len(buckets) == len(PrometheusExporter.BUCKETS) + 1
+        assert buckets == sorted(buckets) and buckets[-1] == 3
+        assert f'uji_stage_seconds_count{{stage="{stage}"}} 3' in text
+    frames = sum(int(n) for n in re.findall(r"uji_frames_total\{[^}]*\} (\d+)", text))
+    assert frames == 3
+    assert f"uji_bg_detected_total {sum(r.is_bg_detected for r in results)}" in text
+    assert results[2].is_bg_detected
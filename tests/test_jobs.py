@@ -0,0 +1,52 @@
+import numpy as np
+
+from cache import CachedClassifier, ResultCache
+from engine import STAGE_NAMES, SpiceClassifier
+from jobs import ClassificationJob, FunctionJob
+
+
+def _image():
+    image = np.zeros((64, 96, 3), dtype=np.uint8)
+    image[16:48, 16:80] = (0, 0, 200)
+    return image
+
+
+def test_classification_job_runs_without_event_loop():
+    clf = SpiceClassifier()
+    progress, images = [], []
+    job = ClassificationJob(clf, _image(), on_progress=lambda n, f: progress.append((n, f)),
+                            on_stage_image=lambda n, img: images.append(n))
+    result = job.run()
+    assert result is not None and result.detected
+    assert set(result.stages) == set(STAGE_NAMES)
+    assert progress[-1] == ("done", 1.0)
+    assert [f for _, f in progress] == sorted(f for _, f in progress)
+    assert images == list(STAGE_NAMES[1:])
+    # Callback engine dikembalikan setelah job selesai
+    assert clf.on_stage is None and clf.on_stage_image is None
+
+
+def test_classification_job_cancel_at_stage_boundary():
+    clf = SpiceClassifier()
+    seen = []
+
+    def on_progress(name, fraction):
+        seen.append(name)
+        if name == "labels":
+            job.cancel()
+
+    job = ClassificationJob(CachedClassifier(clf, ResultCache()), _image(), on_progress=on_progress)
+    assert job.run() is None and job.cancelled
+    assert seen[-1] == "labels" and "features" not in seen
+    assert clf.on_stage is None and clf.on_stage_image is None
+    assert clf.classify(_image()).detected
+
+
+def test_function_job():
+    calls = []
+    job = FunctionJob(lambda a, b=0: calls.append((a, b)) or a + b, 2, b=3)
+    assert job.run() == 5 and calls == [(2, 3)]
+
+    cancelled = FunctionJob(calls.append, "tidak dipanggil")
+    cancelled.cancel()
+    assert cancelled.run() is None and calls == [(2, 3)]
@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+
+from engine import CLASSES
+from feature_store import FeatureStore
+import models
+from models import UNDETECTED, KNNModel, RuleModel, cross_validate, evaluate, extract_features, stratified_folds
+
+
+def test_stratified_folds_balance_classes():
+    y = np.array(["a"] * 10 + ["b"] * 5)
+    fold = stratified_folds(y, folds=5)
+    for k in range(5):
+        assert (y[fold == k] == "a").sum() == 2 and (y[fold == k] == "b").sum() == 1
+
+
+def test_cross_validation_is_not_training_accuracy():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 13)).astype(np.float32)
+    y = np.asarray(CLASSES)[rng.integers(0, len(CLASSES), 200)]
+
+    def fit(X, y):
+        return KNNModel(k=1).fit(X, y)
+
+    # Label acak: 1-NN hafal data latih, tapi tidak lebih baik dari tebakan pada fold uji
+    assert evaluate(fit(X, y), X, y)["accuracy"] == 1.0
+    scores = cross_validate(fit, X, y, folds=5)
+    assert scores["folds"] == 5 and scores["samples"] == 200
+    assert scores["accuracy"] < 0.5
+
+
+def test_store_matrix_filters_by_root(tmp_path):
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[16:48, 8:56] = (0, 0, 200)
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        cv2.imwrite(str(tmp_path / sub / "cabai-merah-1.png"), image)
+    store = FeatureStore(str(tmp_path / "store"))
+    try:
+        for sub in ("a", "b"):
+            store.update(str(tmp_path / sub), workers=1)
+        assert len(store.matrix(["pct_red"])[1]) == 2
+        X, y = store.matrix(["pct_red"], root=str(tmp_path / "a"))
+        assert len(y) == 1
+    finally:
+        store.close()
+
+
+def test_undetected_images_count_as_wrong(tmp_path):
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[16:48, 8:56] = (0, 0, 200)
+    cv2.imwrite(str(tmp_path / "bawang-merah-1.png"), image)
+    cv2.imwrite(str(tmp_path / "bawang-merah-2.png"), image)
+    cv2.imwrite(str(tmp_path / "cabai-hijau-1.png"), np.zeros((64, 64, 3), dtype=np.uint8))
+    X, y, paths, missed = extract_features(str(tmp_path), workers=1)
+    assert len(y) == 2 and list(missed) == ["CABAI HIJAU"]
+
+    scores = evaluate(RuleModel(), X, y, missed)
+    assert scores["samples"] == 3 and scores["not_detected"] == 1
+    assert scores["accuracy"] == round(2 / 3, 4)
+    assert scores["confusion"]["CABAI HIJAU"][UNDETECTED] == 1
+
+    store = FeatureStore(str(tmp_path / "store"))
+    try:
+        store.update(str(tmp_path), workers=1)
+        assert list(store.missed_labels(root=str(tmp_path))) == ["CABAI HIJAU"]
+    finally:
+        store.close()
+
+
+def test_classify_error_does_not_stop_extraction(tmp_path, monkeypatch):
+    cv2.imwrite(str(tmp_path / "cabai-merah-1.png"), np.zeros((8, 8, 3), dtype=np.uint8))
+    models._init_worker()
+
+    def boom(image, decode_factor=1):
+        raise RuntimeError("rusak")
+
+    monkeypatch.setattr(models._classifier, "classify", boom)
+    path = str(tmp_path / "cabai-merah-1.png")
+    assert models._extract(path) == (path, None, "CABAI MERAH")
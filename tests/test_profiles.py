@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+import batch
+from engine import PipelineConfig
+from profiles import ProfileStore, ProfiledClassifier, check_overrides, open_classifier, parse_profiles
+
+
+def _write(path, data, mtime_step=0):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    if mtime_step:
+        # mtime resolusi kasar di sebagian filesystem: pastikan berubah
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + mtime_step * 10 ** 9))
+
+
+def test_extends_chain_and_default():
+    profiles = parse_profiles({
+        "default": {"working_long_side": 1024},
+        "profiles": {"redup": {"green_pct": 5}, "gudang": {"extends": "redup", "working_long_side": 1600}},
+    })
+    assert profiles["redup"].working_long_side == 1024 and profiles["redup"].green_pct == 5
+    assert profiles["gudang"].working_long_side == 1600 and profiles["gudang"].green_pct == 5
+
+
+@pytest.mark.parametrize("data, message", [
+    ({"profiles": {"a": {"extends": "b"}, "b": {"extends": "a"}}}, "melingkar"),
+    ({"profiles": {"a": {"extends": "tidak-ada"}}}, "tidak ditemukan"),
+    ({"profiles": {"a": {"warna": 1}}}, "tidak dikenal"),
+    ({"profiles": {"a": {"working_long_side": "besar"}}}, "tipe int"),
+    ({"profiles": {"a": {"refine_full_res": 1}}}, "tipe bool"),
+    ({"profiles": {"a": {"morph_kernel": [5, 5, 5]}}}, "tipe tuple"),
+    ({"kamera": {}}, "Bagian tidak dikenal"),
+])
+def test_invalid_profiles(data, message):
+    with pytest.raises(ValueError, match=message):
+        parse_profiles(data)
+
+
+def test_hot_reload_on_mtime_change(tmp_path, capsys):
+    path = tmp_path / "profil.json"
+    _write(path, {"profiles": {"redup": {"green_pct": 5}}})
+    store = ProfileStore(str(path), check_interval=0)
+    clf = ProfiledClassifier(store, "redup")
+    first = clf.classifier
+    assert clf.config.green_pct == 5
+
+    _write(path, {"profiles": {"redup": {"green_pct": 7}}}, mtime_step=1)
+    assert clf.config.green_pct == 7 and clf.classifier is not first
+
+    # File rusak / tidak valid: profil lama tetap dipakai
+    _write(path, "{rusak", mtime_step=2)
+    assert clf.config.green_pct == 7
+    _write(path, {"profiles": {"redup": {"green_pct": "x"}}}, mtime_step=3)
+    assert clf.config.green_pct == 7
+    assert capsys.readouterr().err.count("tidak dimuat ulang") == 2
+
+
+def test_cli_config_is_not_silently_ignored(tmp_path):
+    path = tmp_path / "profil.json"
+    _write(path, {"default": {}})
+    assert check_overrides({"--working-size": 0, "--refine": False}) is None
+    assert "--refine" in check_overrides({"--working-size": 0, "--refine": True})
+    with pytest.raises(SystemExit):
+        batch.main(["classify", str(tmp_path), "--profiles", str(path), "--working-size", "512"])
+    with pytest.raises(ValueError):
+        open_classifier(str(path), config=PipelineConfig())
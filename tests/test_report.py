@@ -0,0 +1,70 @@
+from unittest import mock
+
+import cv2
+import numpy as np
+
+import report
+from engine import PipelineConfig, SpiceClassifier
+
+
+def _result(config):
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+    image[30:90, 40:120] = (0, 0, 220)
+    return SpiceClassifier(config).classify(image, keep_stages=True)
+
+
+def test_thresholds_follow_config(tmp_path):
+    config = PipelineConfig(green_pct=5, red_pct=30, aspect_ratio=2.5, median_ksize=3)
+    result = _result(config)
+    path = tmp_path / "r.html"
+    report.write_report(str(path), result.to_report(), result.stages, config=config)
+    text = path.read_text(encoding="utf-8")
+    assert "Threshold &gt; 5%" in text or "Threshold > 5%" in text
+    assert "> 30%" in text and "Kernel 3x3" in text and "2.5" in text
+    assert "10%" not in text and "40%" not in text
+
+
+def test_shared_final_image_encoded_once(tmp_path):
+    result = _result(PipelineConfig())
+    real = report.cv2.imencode
+    with mock.patch.object(report.cv2, "imencode", side_effect=real) as imencode:
+        report.write_report(str(tmp_path / "r.html"), result.to_report(), result.stages, assets="sidecar")
+    files = sorted(p.name for p in (tmp_path / "r_files").iterdir())
+    assert imencode.call_count == len(files) == 8
+    assert "features.jpg" not in files and "final.jpg" in files
+
+
+def test_report_records_config_hash(tmp_path):
+    result = _result(PipelineConfig())
+    path = tmp_path / "r.html"
+    report.write_report(str(path), result.to_report(), result.stages)
+    assert path.read_text(encoding="utf-8").count(result.config_hash) == 2
+
+
+
+def test_index_handles_undetected_and_failing_images(tmp_path):
+    src = tmp_path / "gambar"
+    src.mkdir()
+    cv2.imwrite(str(src / "a-kosong.png"), np.zeros((40, 60, 3), dtype=np.uint8))
+    cv2.imwrite(str(src / "b-merah.png"), _result(PipelineConfig()).stages["original"])
+    (src / "c-rusak.png").write_bytes(b"bukan gambar")
+    out = tmp_path / "laporan" / "index.html"
+    out.parent.mkdir()
+    counts = report.write_index(str(src), str(out), detail=True, workers=1)
+    assert sum(counts.values()) == 3 and counts["Tidak Dikenali"] == 1 and counts["Gagal"] == 1
+    assert (tmp_path / "laporan" / "reports" / "000001.html").exists()
+    assert (tmp_path / "laporan" / "index_files" / "000001.jpg").exists()
+
+
+def test_index_error_row_is_escaped(tmp_path, monkeypatch):
+    cv2.imwrite(str(tmp_path / "x.png"), np.zeros((8, 8, 3), dtype=np.uint8))
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        raise RuntimeError("<script>")
+
+    monkeypatch.setattr(SpiceClassifier, "classify", classify)
+    out = tmp_path / "index.html"
+    counts = report.write_index(str(tmp_path / "x.png"), str(out), workers=1)
+    text = out.read_text(encoding="utf-8")
+    assert counts["Gagal"] == 1
+    assert "&lt;script&gt;" in text and "<script>" not in text
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import cv2
+import numpy as np
+
+import server
+from server import InferenceServer
+
+
+def _jpeg():
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    cv2.circle(image, (32, 32), 20, (0, 0, 255), -1)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_classify_batch_isolates_failing_item(monkeypatch):
+    server._init_worker()
+    original = server.SpiceClassifier.classify
+    calls = []
+
+    def classify(self, image, keep_stages=False, decode_factor=1):
+        calls.append(image.shape)
+        if len(calls) == 2:
+            raise RuntimeError("rusak")
+        return original(self, image, keep_stages)
+
+    monkeypatch.setattr(server.SpiceClassifier, "classify", classify)
+    _, out = server.classify_batch([(_jpeg(), server.DEFAULT_PROFILE)] * 3)
+    assert [r.get("status") for r in out] == [None, 500, None]
+    assert "prediction" in out[0] and "prediction" in out[2]
+
+
+def test_classify_batch_rejects_bad_bytes():
+    server._init_worker()
+    _, out = server.classify_batch([(b"bukan gambar", server.DEFAULT_PROFILE)])
+    assert "error" in out[0] and out[0].get("status", 400) == 400
+
+
+def _post(port, body):
+    async def run():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /classify HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/octet-stream\r\n"
+                     b"Connection: close\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+    return run()
+
+
+def test_http_rejects_oversize_image_with_413():
+    async def scenario():
+        app = InferenceServer(workers=1, max_pixels=32 * 32)
+        await app.start()
+        srv = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+        port = srv.sockets[0].getsockname()[1]
+        try:
+            big = await _post(port, _jpeg())                      # 64x64 > batas 32x32
+            small = cv2.imencode(".png", np.zeros((16, 16, 3), dtype=np.uint8))[1].tobytes()
+            ok = await _post(port, small)
+        finally:
+            srv.close()
+            await srv.wait_closed()
+            await app.close()
+        return big, ok
+
+    (status, payload), (ok_status, ok_payload) = asyncio.run(scenario())
+    assert status == 413 and "terlalu besar" in payload["error"]
+    assert ok_status == 200 and "prediction" in ok_payload
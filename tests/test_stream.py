@@ -0,0 +1,66 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from stream import StreamClassifier, TemporalSmoother
+
+
+def _clip(path, frames=20):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (96, 64))
+    if not writer.isOpened():
+        pytest.skip("VideoWriter MJPG tidak tersedia")
+    for i in range(frames):
+        frame = np.zeros((64, 96, 3), dtype=np.uint8)
+        frame[16:48, 24:72] = (0, 0, 200)
+        frame[0, i] = 255       # frame tidak identik, objek tetap
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_file_source_processes_every_frame(tmp_path):
+    seen = []
+    stream = StreamClassifier(_clip(tmp_path / "klip.avi"), queue_size=64, realtime=False,
+                              on_result=lambda frame, result, label: seen.append(label)).start()
+    assert stream.wait(30)
+    stream.stop()
+    stats = stream.stats()
+    assert stats["captured"] == stats["processed"] == 20 and stats["dropped"] == 0
+    assert len(seen) == 20 and len(set(seen)) == 1 and seen[0] is not None
+    seq, frame, result, label = stream.latest
+    assert seq == 20 and frame.shape == (64, 96, 3) and label == seen[-1]
+
+
+def test_slow_consumer_drops_oldest_frames(tmp_path):
+    stream = StreamClassifier(_clip(tmp_path / "klip.avi"), queue_size=1, realtime=False,
+                              on_result=lambda *args: time.sleep(0.02)).start()
+    assert stream.wait(30)
+    stream.stop()
+    stats = stream.stats()
+    assert stats["captured"] == 20
+    assert stats["dropped"] > 0 and stats["processed"] + stats["dropped"] == 20
+
+
+def test_majority_vote():
+    smoother = TemporalSmoother("vote", window=3)
+    out = [smoother.update(p) for p in ["A", "B", "A", "B", "B", "C", "A"]]
+    # Jendela 3: [A] [A,B] [A,B,A] [B,A,B] [A,B,B] [B,B,C] [B,C,A]; seri -> label terbaru
+    assert out == ["A", "B", "A", "B", "B", "B", "A"]
+    smoother.reset()
+    assert smoother.update("C") == "C"
+
+
+def test_ema():
+    smoother = TemporalSmoother("ema", alpha=0.3)
+    out = [smoother.update(p) for p in ["A", "A", "A", "B", "B", "B"]]
+    # Satu outlier tidak membalik label; B menang setelah skornya melewati A
+    assert out == ["A", "A", "A", "A", "B", "B"]
+    assert smoother.scores["A"] == pytest.approx(0.657 * 0.7 ** 3)
+    assert smoother.scores["B"] == pytest.approx(1 - 0.7 ** 3)
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        TemporalSmoother("median")
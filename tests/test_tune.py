@@ -0,0 +1,39 @@
+import os
+
+import cv2
+import numpy as np
+
+from batch import iter_images
+from engine import PipelineConfig, SpiceClassifier
+from tune import COLOR_GRID, _box, bin_edges, build_tables, color_params
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset")
+
+
+def test_histogram_counts_match_classify():
+    base = PipelineConfig()
+    edges = bin_edges(COLOR_GRID)
+    sat, shape, labels, missed = build_tables(DATASET, base, edges, 1)
+
+    clf = SpiceClassifier(base)
+    results = [clf.classify(cv2.imread(p)) for p in iter_images(DATASET)]
+    results = [r for r in results if r.detected]
+    assert missed == 0 and len(results) == len(sat)
+
+    # Rentang inklusif [lo, hi] konfigurasi dasar -> index tepi bin SAT
+    p = color_params(base)
+    h, s, v = (list(e) for e in edges)
+    top = (np.array([len(h) - 1]), np.array([len(s) - 1]), np.array([len(v) - 1]))
+
+    def at(e, x):
+        return np.array([e.index(x)])
+
+    zero = np.array([0])
+    red = _box(sat, (zero, at(h, p["red_h_max"] + 1)), (at(s, p["sat_min"]), top[1]), (at(v, p["val_min"]), top[2])) \
+        + _box(sat, (at(h, p["red2_h_min"]), top[0]), (at(s, p["sat_min"]), top[1]), (at(v, p["val_min"]), top[2]))
+    white = _box(sat, (zero, top[0]), (zero, at(s, p["white_s_max"] + 1)), (at(v, p["white_v_min"]), top[2]))
+    white = np.where(shape[:, 3:4] > 0, 0, white)
+
+    assert red[:, 0].tolist() == [r.pixels_red for r in results]
+    assert white[:, 0].tolist() == [r.pixels_white for r in results]
+
@@ -0,0 +1,326 @@
+"""Auto-tuning ambang HSV & decision tree dengan grid search tervektorisasi.
+
+Langkah:
+  1. Setiap gambar berlabel diproses SEKALI dengan konfigurasi dasar. Dari
+     piksel objek utama dibuat histogram HSV 3D yang tepi bin-nya adalah
+     semua nilai ambang kandidat, jadi jumlah piksel untuk rentang kandidat
+     mana pun bisa dihitung persis.
+  2. Histogram diubah menjadi cumulative sum 3D (summed-area table). Jumlah
+     piksel merah/hijau/putih satu kandidat = 8 lookup per rentang, untuk
+     semua gambar sekaligus.
+  3. Kombinasi ambang warna dibagi ke beberapa proses. Tiap proses menilai
+     semua kombinasi ambang keputusan dengan operasi array (akurasi +
+     confusion matrix).
+  4. Konfigurasi terbaik divalidasi dengan menjalankan pipeline penuh, lalu
+     ditulis ke file JSON yang dimuat GUI saat start (``spice_config.json``).
+
+Catatan: mask objek & fitur bentuk diambil dari segmentasi konfigurasi dasar.
+Ambang HSV juga memengaruhi segmentasi, karena itu langkah 4 melaporkan
+akurasi pipeline sebenarnya.
+
+Contoh:
+    python -m tune dataset/ --output spice_config.json --top 10
+    python -m tune dataset/ --grid grid.json --csv semua_kombinasi.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from batch import iter_images
+from engine import CLASSES, PipelineConfig, SpiceClassifier, label_from_path, load_config, save_config
+from ingest import load_image, working_target
+from models import RuleModel, evaluate, extract_features
+
+
+# Grid default; nilai PipelineConfig() ada di tiap baris sehingga
+# konfigurasi saat ini selalu ikut dinilai
+COLOR_GRID = {
+    "red_h_max": [12, 15, 18],       # batas atas H merah bawah (red1)
+    "red2_h_min": [150, 155, 160],   # batas bawah H merah atas (red2)
+    "green_h_min": [30, 35, 40],
+    "green_h_max": [85, 90, 95],
+    "sat_min": [30, 40, 50],         # S minimum merah & hijau
+    "val_min": [40],                 # V minimum merah & hijau
+    "white_s_max": [30, 40, 50],
+    "white_v_min": [120, 140, 160],
+}
+DECISION_GRID = {
+    "green_pct": [5, 10, 15],
+    "red_pct": [30, 40, 50],
+    "aspect_ratio": [1.4, 1.6, 1.8],
+    "solidity": [0.8],
+    "circularity": [0.4],
+}
+
+
+def color_params(config):
+    """Parameter grid warna dari PipelineConfig (kebalikan ``apply_params``)."""
+    return {
+        "red_h_max": config.red1[1][0], "red2_h_min": config.red2[0][0],
+        "green_h_min": config.green[0][0], "green_h_max": config.green[1][0],
+        "sat_min": config.red1[0][1], "val_min": config.red1[0][2],
+        "white_s_max": config.white[1][1], "white_v_min": config.white[0][2],
+    }
+
+
+def apply_params(config, params):
+    p = {**color_params(config), **{k: getattr(config, k) for k in DECISION_GRID}, **params}
+    s, v = p["sat_min"], p["val_min"]
+    return replace(
+        config,
+        red1=((0, s, v), (p["red_h_max"], 255, 255)),
+        red2=((p["red2_h_min"], s, v), (180, 255, 255)),
+        green=((p["green_h_min"], s, v), (p["green_h_max"], 255, 255)),
+        white=((0, 0, p["white_v_min"]), (180, p["white_s_max"], 255)),
+        **{k: p[k] for k in DECISION_GRID},
+    )
+
+
+def bin_edges(grid):
+    # Rentang inklusif [lo, hi] -> tepi bin di lo dan hi + 1
+    h = {0, 181, *grid["red2_h_min"], *grid["green_h_min"],
+         *(x + 1 for x in grid["red_h_max"]), *(x + 1 for x in grid["green_h_max"])}
+    s = {0, 256, *grid["sat_min"], *(x + 1 for x in grid["white_s_max"])}
+    v = {0, 256, *grid["val_min"], *grid["white_v_min"]}
+    return tuple(np.array(sorted(e), dtype=np.int32) for e in (h, s, v))
+
+
+# --- Langkah 1: histogram per objek (pool proses) ---
+_classifier = None
+_edges = None
+
+
+def _init_histogram_worker(config, edges):
+    global _classifier, _edges
+    cv2.setNumThreads(1)
+    _classifier = SpiceClassifier(config)
+    _edges = edges
+
+
+def _object_histogram(path):
+    label = label_from_path(path)
+    if label is None:
+        return None
+    try:
+        image, factor = load_image(path, working_target(_classifier.config))
+    except (OSError, ValueError):
+        return None
+    # Mask objek utama & citra blur resolusi kerja; fitur bentuk dari classify
+    main = _classifier.object_mask(image, decode_factor=factor)
+    if main is None:
+        return label, None, None
+    img_blur, _, mask = main
+    result = _classifier.classify(image, decode_factor=factor)
+
+    hsv = cv2.cvtColor(img_blur, cv2.COLOR_BGR2HSV)[mask > 0]
+    h_edges, s_edges, v_edges = _edges
+    idx = [np.searchsorted(e, hsv[:, i], side="right") - 1 for i, e in enumerate(_edges)]
+    shape = (len(h_edges) - 1, len(s_edges) - 1, len(v_edges) - 1)
+    hist = np.bincount(np.ravel_multi_index(idx, shape), minlength=int(np.prod(shape))).reshape(shape)
+    shape_features = (result.aspect_ratio, result.solidity, result.circularity, result.is_bg_detected)
+    return label, hist.astype(np.int64), shape_features
+
+
+def build_tables(root, config, edges, workers):
+    """Kembalikan (SAT [n, H+1, S+1, V+1], fitur bentuk [n, 4], label [n], n_tidak_terdeteksi)."""
+    with mp.Pool(workers, initializer=_init_histogram_worker, initargs=(config, edges)) as pool:
+        rows = [r for r in pool.imap(_object_histogram, iter_images(root), chunksize=4) if r is not None]
+    missed = sum(1 for r in rows if r[1] is None)
+    rows = [r for r in rows if r[1] is not None]
+    if not rows:
+        raise SystemExit(f"Tidak ada gambar berlabel yang terdeteksi di {root}")
+
+    hists = np.stack([r[1] for r in rows])
+    sat = np.zeros((len(rows),) + tuple(d + 1 for d in hists.shape[1:]), dtype=np.int64)
+    sat[:, 1:, 1:, 1:] = hists.cumsum(1).cumsum(2).cumsum(3)
+    shape = np.array([r[2] for r in rows], dtype=np.float64)
+    labels = np.array([CLASSES.index(r[0]) for r in rows], dtype=np.int64)
+    return sat, shape, labels, missed
+
+
+# --- Langkah 2-3: penilaian (pool proses) ---
+_tables = None
+
+
+def _init_score_worker(tables):
+    global _tables
+    _tables = tables
+
+
+def _box(sat, h, s, v):
+    # Jumlah bin [h0, h1) x [s0, s1) x [v0, v1) untuk K kandidat -> (n_gambar, K)
+    (h0, h1), (s0, s1), (v0, v1) = h, s, v
+    return (sat[:, h1, s1, v1] - sat[:, h0, s1, v1] - sat[:, h1, s0, v1] - sat[:, h1, s1, v0]
+            + sat[:, h0, s0, v1] + sat[:, h0, s1, v0] + sat[:, h1, s0, v0] - sat[:, h0, s0, v0])
+
+
+def score_chunk(color_idx):
+    """Nilai semua kombinasi keputusan untuk satu blok kombinasi warna.
+
+    ``color_idx``: (K, 8) index tepi bin per parameter warna. Mengembalikan
+    (akurasi [K, M], confusion [K, M, C, C]).
+    """
+    sat, shape, labels, decisions, h_top, s_top, v_top = _tables
+    red_h1, red2_h0, green_h0, green_h1, sat0, val0, white_s1, white_v0 = color_idx.T
+    zero = np.zeros_like(red_h1)
+    s_top = np.full_like(red_h1, s_top)
+    v_top = np.full_like(red_h1, v_top)
+    h_top = np.full_like(red_h1, h_top)
+
+    red = _box(sat, (zero, red_h1), (sat0, s_top), (val0, v_top)) \
+        + _box(sat, (red2_h0, h_top), (sat0, s_top), (val0, v_top))
+    green = _box(sat, (green_h0, green_h1), (sat0, s_top), (val0, v_top))
+    white = _box(sat, (zero, h_top), (zero, white_s1), (white_v0, v_top))
+    aspect, solidity, circularity, is_bg = shape.T
+    white = np.where(is_bg[:, None] > 0, 0, white)
+
+    total = np.maximum(red + green + white, 1)
+    pct_red = (red / total * 100).T[:, None, :]       # (K, 1, n)
+    pct_green = (green / total * 100).T[:, None, :]
+    gp, rp, ar, so, ci = (decisions[:, i][None, :, None] for i in range(5))   # (1, M, 1)
+
+    elongated = (aspect > ar) | (solidity < so) | (circularity < ci)        # (1, M, n)
+    c = {name: i for i, name in enumerate(CLASSES)}
+    pred = np.where(pct_green > gp, c["CABAI HIJAU"],
+                    np.where(pct_red > rp, np.where(elongated, c["CABAI MERAH"], c["BAWANG MERAH"]),
+                             c["BAWANG PUTIH"]))                              # (K, M, n)
+
+    n_cls = len(CLASSES)
+    accuracy = (pred == labels).sum(axis=2)
+    K, M, n = pred.shape
+    cells = (np.arange(K * M)[:, None] * n_cls * n_cls + labels[None, :] * n_cls + pred.reshape(K * M, n)).ravel()
+    confusion = np.bincount(cells, minlength=K * M * n_cls * n_cls).reshape(K, M, n_cls, n_cls)
+    return accuracy, confusion
+
+
+def run_tuning(root, base=None, color_grid=None, decision_grid=None, workers=None, top=10, csv_path=None):
+    base = base if base is not None else PipelineConfig()
+    color_grid = color_grid or COLOR_GRID
+    decision_grid = decision_grid or DECISION_GRID
+    workers = workers or os.cpu_count() or 1
+    edges = bin_edges(color_grid)
+    t0 = time.perf_counter()
+    sat, shape, labels, missed = build_tables(root, base, edges, workers)
+    t_hist = time.perf_counter() - t0
+
+    h_edges, s_edges, v_edges = (list(e) for e in edges)
+    color_names = list(color_grid)
+    axis_edges = {"red_h_max": (h_edges, 1), "red2_h_min": (h_edges, 0), "green_h_min": (h_edges, 0),
+                  "green_h_max": (h_edges, 1), "sat_min": (s_edges, 0), "val_min": (v_edges, 0),
+                  "white_s_max": (s_edges, 1), "white_v_min": (v_edges, 0)}
+    color_combos = list(itertools.product(*(color_grid[k] for k in color_names)))
+    color_idx = np.array([[axis_edges[k][0].index(val + axis_edges[k][1]) for k, val in zip(color_names, combo)]
+                          for combo in color_combos], dtype=np.int64)
+    decision_names = list(decision_grid)
+    decisions = np.array(list(itertools.product(*(decision_grid[k] for k in decision_names))), dtype=np.float64)
+
+    # Ukuran blok dibatasi agar array (K, M, n) tetap kecil
+    chunk = max(1, 2_000_000 // (len(decisions) * len(labels)))
+    blocks = [color_idx[i:i + chunk] for i in range(0, len(color_idx), chunk)]
+    tables = (sat, shape, labels, decisions, len(h_edges) - 1, len(s_edges) - 1, len(v_edges) - 1)
+    t0 = time.perf_counter()
+    with mp.Pool(workers, initializer=_init_score_worker, initargs=(tables,)) as pool:
+        scored = pool.map(score_chunk, blocks)
+    accuracy = np.concatenate([a for a, _ in scored])                 # (n_warna, n_keputusan)
+    confusion = np.concatenate([c for _, c in scored])
+    t_score = time.perf_counter() - t0
+
+    n_total = len(labels) + missed
+    decision_combos = list(itertools.product(*(decision_grid[k] for k in decision_names)))
+
+    def params_of(ci, di):
+        return {**dict(zip(color_names, color_combos[ci])), **dict(zip(decision_names, decision_combos[di]))}
+
+    # Seri akurasi: pilih kombinasi yang paling dekat dengan konfigurasi dasar
+    ref = {**color_params(base), **{k: getattr(base, k) for k in decision_names}}
+    scale = np.array([abs(ref[k]) or 1 for k in color_names])
+    color_dist = (np.abs(np.array(color_combos) - [ref[k] for k in color_names]) / scale).sum(axis=1)
+    scale = np.array([abs(ref[k]) or 1 for k in decision_names])
+    decision_dist = (np.abs(decisions - [ref[k] for k in decision_names]) / scale).sum(axis=1)
+    dist = (color_dist[:, None] + decision_dist[None, :]).ravel()
+
+    flat = accuracy.ravel()
+    ranked = np.lexsort((dist, -flat))[:max(top, 1)]
+
+    def entry(i):
+        ci, di = np.unravel_index(i, accuracy.shape)
+        return {"params": params_of(ci, di), "accuracy": round(float(flat[i]) / n_total, 4),
+                "confusion": {CLASSES[a]: {CLASSES[b]: int(confusion[ci, di, a, b]) for b in range(len(CLASSES))}
+                              for a in range(len(CLASSES))}}
+
+    if csv_path:
+        _write_csv(csv_path, accuracy, confusion, params_of, n_total)
+
+    best = entry(ranked[0])
+    best_config = apply_params(base, best["params"])
+    return {
+        "images": n_total,
+        "not_detected": missed,
+        "combinations": int(flat.size),
+        "histogram_s": round(t_hist, 3),
+        "score_s": round(t_score, 3),
+        "best_accuracy_grid": round(float(flat[ranked[0]]) / n_total, 4),
+        "top": [entry(i) for i in ranked],
+    }, best_config
+
+
+def _write_csv(path, accuracy, confusion, params_of, n_total):
+    cells = [f"{a}->{b}" for a in CLASSES for b in CLASSES]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        for ci in range(accuracy.shape[0]):
+            for di in range(accuracy.shape[1]):
+                row = {**params_of(ci, di), "accuracy": round(float(accuracy[ci, di]) / n_total, 4),
+                       **dict(zip(cells, confusion[ci, di].ravel().tolist()))}
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+
+
+def validate(root, config, workers):
+    """Akurasi pipeline penuh dengan konfigurasi hasil tuning."""
+    X, y, _, missed = extract_features(root, config, workers)
+    return evaluate(RuleModel(config), X, y, missed)["accuracy"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tune", description="Grid search ambang HSV & decision tree.")
+    parser.add_argument("root", help="Direktori gambar berlabel (label dari nama file).")
+    parser.add_argument("--output", "-o", default="spice_config.json", help="File konfigurasi terbaik.")
+    parser.add_argument("--base", default=None, help="Konfigurasi dasar (JSON); default PipelineConfig().")
+    parser.add_argument("--grid", default=None,
+                        help='JSON {"color": {...}, "decision": {...}} pengganti grid default.')
+    parser.add_argument("--top", type=int, default=10, help="Jumlah kombinasi terbaik yang ditampilkan.")
+    parser.add_argument("--csv", default=None, help="Tulis akurasi & confusion semua kombinasi ke CSV.")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Jumlah proses worker.")
+    args = parser.parse_args(argv)
+
+    base = load_config(args.base) if args.base else PipelineConfig()
+    color_grid = decision_grid = None
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+        color_grid = {**COLOR_GRID, **grid.get("color", {})}
+        decision_grid = {**DECISION_GRID, **grid.get("decision", {})}
+
+    report, best = run_tuning(args.root, base, color_grid, decision_grid, args.workers, args.top, args.csv)
+    report["validated_accuracy"] = validate(args.root, best, args.workers)
+    save_config(best, args.output)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    print(f"{report['combinations']} kombinasi dinilai dalam {report['score_s']} s; "
+          f"konfigurasi terbaik ditulis ke {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()